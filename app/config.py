@@ -2,9 +2,50 @@ import os
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
+    DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", -64000))  # negativo = KiB
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    SQLITE_TEMP_STORE: str = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your_secret_key")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+    TOKEN_CACHE_MAX_SIZE: int = int(os.getenv("TOKEN_CACHE_MAX_SIZE", 10000))
+    TOKEN_CACHE_TTL_SECONDS: int = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", 300))
+    TOKEN_VERSION_TTL_SECONDS: float = float(os.getenv("TOKEN_VERSION_TTL_SECONDS", 5))
+    PASSWORD_POOL_WORKERS: int = int(os.getenv("PASSWORD_POOL_WORKERS", 4))
+    PASSWORD_POOL_QUEUE_DEPTH: int = int(os.getenv("PASSWORD_POOL_QUEUE_DEPTH", 16))
+    CATALOG_CACHE_MAX_SIZE: int = int(os.getenv("CATALOG_CACHE_MAX_SIZE", 1024))
+    CATALOG_CACHE_MAX_AGE_SECONDS: int = int(os.getenv("CATALOG_CACHE_MAX_AGE_SECONDS", 0))
+    SALES_BULK_MAX_PRODUCT_IDS: int = int(os.getenv("SALES_BULK_MAX_PRODUCT_IDS", 1000))
+    SALES_ANALYTICS_DEFAULT_DAYS: int = int(os.getenv("SALES_ANALYTICS_DEFAULT_DAYS", 30))
+    STOCK_SNAPSHOT_INTERVAL: int = int(os.getenv("STOCK_SNAPSHOT_INTERVAL", 100))
+    RESERVATION_TTL_SECONDS: int = int(os.getenv("RESERVATION_TTL_SECONDS", 900))
+    RESERVATION_SWEEP_INTERVAL_SECONDS: int = int(os.getenv("RESERVATION_SWEEP_INTERVAL_SECONDS", 30))
+    RESERVATION_SWEEP_BATCH_SIZE: int = int(os.getenv("RESERVATION_SWEEP_BATCH_SIZE", 500))
+    CART_BATCH_MAX_ITEMS: int = int(os.getenv("CART_BATCH_MAX_ITEMS", 500))
+    CART_ABANDONED_AFTER_SECONDS: int = int(os.getenv("CART_ABANDONED_AFTER_SECONDS", 2592000))
+    CART_JANITOR_INTERVAL_SECONDS: int = int(os.getenv("CART_JANITOR_INTERVAL_SECONDS", 3600))
+    CART_JANITOR_BATCH_SIZE: int = int(os.getenv("CART_JANITOR_BATCH_SIZE", 200))
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 86400))
+    IDEMPOTENCY_LOCK_SECONDS: int = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", 30))
+    IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 10))
+    IDEMPOTENCY_SWEEP_INTERVAL_SECONDS: int = int(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL_SECONDS", 300))
+    IDEMPOTENCY_SWEEP_BATCH_SIZE: int = int(os.getenv("IDEMPOTENCY_SWEEP_BATCH_SIZE", 500))
+    PAYMENT_WORKER_ENABLED: bool = os.getenv("PAYMENT_WORKER_ENABLED", "true").lower() in ("1", "true", "yes")
+    PAYMENT_WORKER_BATCH_SIZE: int = int(os.getenv("PAYMENT_WORKER_BATCH_SIZE", 50))
+    PAYMENT_WORKER_CONCURRENCY: int = int(os.getenv("PAYMENT_WORKER_CONCURRENCY", 8))
+    PAYMENT_WORKER_POLL_SECONDS: float = float(os.getenv("PAYMENT_WORKER_POLL_SECONDS", 1))
+    PAYMENT_CLAIM_LEASE_SECONDS: int = int(os.getenv("PAYMENT_CLAIM_LEASE_SECONDS", 60))
+    PAYMENT_MAX_ATTEMPTS: int = int(os.getenv("PAYMENT_MAX_ATTEMPTS", 5))
+    PAYMENT_RETRY_BASE_SECONDS: float = float(os.getenv("PAYMENT_RETRY_BASE_SECONDS", 2))
+    PAYMENT_RETRY_MAX_SECONDS: float = float(os.getenv("PAYMENT_RETRY_MAX_SECONDS", 300))
+    DEBUG: bool = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+    SQL_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 5))
 
     class Config:
         env_file = ".venv"
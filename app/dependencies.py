@@ -1,49 +1,19 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends, HTTPException, status
-from database import SessionLocal
-from app.domain.user.models import User
-from fastapi.security import OAuth2PasswordBearer
-from database import get_db
-from app.domain.user.service import get_current_user
-from jose import JWTError, jwt  
-from app.domain.user import schemas
+from database import get_async_db
+from app.domain.user.async_service import get_token_user
+from app.domain.user.service import oauth2_scheme
 
-SECRET_KEY = "your_secret_key"
-ALGORITHM = "HS256"
+def require_role(*roles: str, detail: str = "Operation not permitted"):
+    # Dependencia declarativa: el rol sale de los claims verificados, sin leer la tabla users
+    async def role_guard(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)):
+        current_user = await get_token_user(db, token)
+        if current_user.role not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=detail,
+            )
+        return current_user
+    return role_guard
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-    user = db.query(User).filter(User.correo == token_data.username).first()
-    if user is None:
-        raise credentials_exception
-    return user
-
-def get_admin_user(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == current_user.id).first()
-    if not user or user.role != "Administrador":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Operation not permitted",
-        )
-    return current_user
+get_admin_user = require_role("Administrador")
@@ -0,0 +1,12 @@
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import service
+
+async def get_top_products(db: AsyncSession, limit: int = 10, by: str = "revenue", since: date | None = None, until: date | None = None):
+    return await db.run_sync(service.get_top_products, limit, by, since, until)
+
+async def get_revenue(db: AsyncSession, period: str = "day", since: date | None = None, until: date | None = None):
+    return await db.run_sync(service.get_revenue, period, since, until)
+
+async def get_product_sales(db: AsyncSession, product_id: int, since: date | None = None, until: date | None = None):
+    return await db.run_sync(service.get_product_sales, product_id, since, until)
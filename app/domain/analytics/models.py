@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Date, DateTime, Float, Index, Integer
+from database import Base
+
+# Agregados que el checkout actualiza en la misma transacción que descuenta el stock.
+# Sin FK a inventory: el histórico de ventas sobrevive al borrado del producto
+
+class DailySales(Base):
+    __tablename__ = "sales_daily"
+
+    day = Column(Date, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+class ProductDailySales(Base):
+    __tablename__ = "sales_product_daily"
+    __table_args__ = (
+        # Rango de fechas de un solo producto
+        Index("ix_sales_product_daily_product_id_day", "product_id", "day"),
+    )
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+class ProductSales(Base):
+    __tablename__ = "sales_product_totals"
+
+    product_id = Column(Integer, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0, index=True)
+    revenue = Column(Float, nullable=False, default=0, index=True)
+    last_sold_at = Column(DateTime, nullable=True)
@@ -0,0 +1,134 @@
+from datetime import date, datetime
+from sqlalchemy import Date, func, literal, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from app.domain.inventory.models import Inventory
+from . import models
+
+def _accumulate(model, rows, index_elements, *replaced):
+    # Upsert aditivo: la primera venta crea la fila, las siguientes suman sobre ella
+    statement = insert(model).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={
+            "orders": model.orders + statement.excluded.orders,
+            "units": model.units + statement.excluded.units,
+            "revenue": model.revenue + statement.excluded.revenue,
+            **{column: getattr(statement.excluded, column) for column in replaced},
+        },
+    )
+
+def record_checkout(db: Session, sold_at: datetime, lines):
+    # lines: (product_id, quantity, total) de un checkout, una por producto.
+    # Tres sentencias por checkout, sin importar cuántos productos lleve
+    lines = list(lines)
+    if not lines:
+        return
+    day = sold_at.date()
+    products = [
+        {"product_id": product_id, "orders": 1, "units": quantity, "revenue": total}
+        for product_id, quantity, total in lines
+    ]
+    db.execute(_accumulate(
+        models.DailySales,
+        [{"day": day, "orders": 1, "units": sum(row["units"] for row in products), "revenue": sum(row["revenue"] for row in products)}],
+        [models.DailySales.day],
+    ))
+    db.execute(_accumulate(
+        models.ProductDailySales,
+        [{**row, "day": day} for row in products],
+        [models.ProductDailySales.day, models.ProductDailySales.product_id],
+    ))
+    db.execute(_accumulate(
+        models.ProductSales,
+        [{**row, "last_sold_at": sold_at} for row in products],
+        [models.ProductSales.product_id],
+        "last_sold_at",
+    ))
+
+def _metric(columns, by: str):
+    return columns.units if by == "units" else columns.revenue
+
+def _named(source):
+    # Solo las filas de la página van contra inventory, por clave primaria
+    return (
+        select(
+            source.c.product_id,
+            Inventory.product_name,
+            source.c.orders,
+            source.c.units,
+            source.c.revenue,
+        )
+        .select_from(source)
+        .outerjoin(Inventory, Inventory.id == source.c.product_id)
+    )
+
+def get_top_products(db: Session, limit: int = 10, by: str = "revenue"):
+    # Histórico completo: recorre el índice de la métrica y corta en LIMIT
+    totals = models.ProductSales.__table__
+    top = (
+        select(totals.c.product_id, totals.c.orders, totals.c.units, totals.c.revenue)
+        .order_by(_metric(totals.c, by).desc(), totals.c.product_id)
+        .limit(limit)
+        .subquery()
+    )
+    return db.execute(_named(top).order_by(_metric(top.c, by).desc(), top.c.product_id)).all()
+
+def get_top_products_between(db: Session, since: date, until: date, limit: int = 10, by: str = "revenue"):
+    daily = models.ProductDailySales
+    top = (
+        select(
+            daily.product_id,
+            func.sum(daily.orders).label("orders"),
+            func.sum(daily.units).label("units"),
+            func.sum(daily.revenue).label("revenue"),
+        )
+        .where(daily.day >= since, daily.day <= until)
+        .group_by(daily.product_id)
+        .order_by(func.sum(_metric(daily, by)).desc(), daily.product_id)
+        .limit(limit)
+        .subquery()
+    )
+    return db.execute(_named(top).order_by(_metric(top.c, by).desc(), top.c.product_id)).all()
+
+def _period_start(day, period: str):
+    if period == "week":
+        # Lunes de la semana: retrocede 6 días y avanza al próximo lunes
+        return func.date(day, "-6 days", "weekday 1", type_=Date)
+    if period == "month":
+        return func.date(day, "start of month", type_=Date)
+    return day
+
+def get_revenue(db: Session, since: date, until: date, period: str = "day"):
+    daily = models.DailySales
+    start = _period_start(daily.day, period).label("period")
+    return db.execute(
+        select(
+            start,
+            func.sum(daily.orders).label("orders"),
+            func.sum(daily.units).label("units"),
+            func.sum(daily.revenue).label("revenue"),
+        )
+        .where(daily.day >= since, daily.day <= until)
+        .group_by(start)
+        .order_by(start)
+    ).all()
+
+def get_product_sales(db: Session, product_id: int, since: date | None = None, until: date | None = None):
+    # Sin rango sale de los totales; con rango suma los días del producto. Sin ventas, todo en cero
+    if since is None and until is None:
+        source, conditions = models.ProductSales, [models.ProductSales.product_id == product_id]
+    else:
+        source = models.ProductDailySales
+        conditions = [
+            source.product_id == product_id,
+            source.day >= (since or date.min),
+            source.day <= (until or date.max),
+        ]
+    totals = select(
+        literal(product_id).label("product_id"),
+        func.coalesce(func.sum(source.orders), 0).label("orders"),
+        func.coalesce(func.sum(source.units), 0).label("units"),
+        func.coalesce(func.sum(source.revenue), 0).label("revenue"),
+    ).where(*conditions)
+    return db.execute(_named(totals.subquery())).one()
@@ -0,0 +1,29 @@
+from datetime import date
+from typing import Literal
+from pydantic import BaseModel
+
+Metric = Literal["revenue", "units"]
+Period = Literal["day", "week", "month"]
+
+class ProductSales(BaseModel):
+    product_id: int
+    # Producto borrado: el histórico queda y el nombre viene en null
+    product_name: str | None
+    orders: int
+    units: int
+    revenue: float
+
+    model_config = {
+        "from_attributes": True
+    }
+
+class PeriodSales(BaseModel):
+    # Primer día del período: el lunes de la semana o el día 1 del mes
+    period: date
+    orders: int
+    units: int
+    revenue: float
+
+    model_config = {
+        "from_attributes": True
+    }
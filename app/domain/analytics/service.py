@@ -0,0 +1,30 @@
+from datetime import date, timedelta
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.domain.reservation.service import utcnow
+from . import repository
+
+def _check_range(since: date | None, until: date | None):
+    if since is not None and until is not None and since > until:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since must not be after until")
+
+def get_top_products(db: Session, limit: int = 10, by: str = "revenue", since: date | None = None, until: date | None = None):
+    _check_range(since, until)
+    if since is None and until is None:
+        return repository.get_top_products(db, limit, by)
+    return repository.get_top_products_between(db, since or date.min, until or date.max, limit, by)
+
+def get_revenue(db: Session, period: str = "day", since: date | None = None, until: date | None = None):
+    # Sin rango: los últimos SALES_ANALYTICS_DEFAULT_DAYS días (en UTC, igual que los agregados)
+    until = until or utcnow().date()
+    since = since or until - timedelta(days=settings.SALES_ANALYTICS_DEFAULT_DAYS - 1)
+    _check_range(since, until)
+    return repository.get_revenue(db, since, until, period)
+
+def get_product_sales(db: Session, product_id: int, since: date | None = None, until: date | None = None):
+    _check_range(since, until)
+    sales = repository.get_product_sales(db, product_id, since, until)
+    if sales.product_name is None and not sales.orders:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return sales
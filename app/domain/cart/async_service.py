@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.reservation.service import utcnow
+from . import schemas, service
+
+logger = logging.getLogger(__name__)
+
+# Totales del janitor en este proceso, para /metrics/cart-janitor
+janitor_stats = {"runs": 0, "reclaimed": 0, "last_reclaimed": 0, "last_run_at": None}
+
+async def create_cart_item(db: AsyncSession, cart_item: schemas.CartItemCreate, user_id: int):
+    return await db.run_sync(service.create_cart_item, cart_item, user_id)
+
+async def create_cart_items(db: AsyncSession, batch: schemas.CartBatchCreate, user_id: int):
+    return await db.run_sync(service.create_cart_items, batch, user_id)
+
+async def update_cart_items(db: AsyncSession, batch: schemas.CartBatchUpdate, user_id: int):
+    return await db.run_sync(service.update_cart_items, batch, user_id)
+
+async def clear_cart(db: AsyncSession, user_id: int):
+    return await db.run_sync(service.clear_cart, user_id)
+
+async def get_cart_items(db: AsyncSession, user_id: int, skip: int = 0, limit: int | None = None, after_id: int | None = None):
+    return await db.run_sync(service.get_cart_items, user_id, skip, limit, after_id)
+
+async def get_cart_item(db: AsyncSession, item_id: int, user_id: int):
+    return await db.run_sync(service.get_cart_item, item_id, user_id)
+
+async def update_cart_item(db: AsyncSession, item_id: int, cart_item: schemas.CartItemCreate, user_id: int):
+    return await db.run_sync(service.update_cart_item, item_id, cart_item, user_id)
+
+async def delete_cart_item(db: AsyncSession, item_id: int, user_id: int):
+    return await db.run_sync(service.delete_cart_item, item_id, user_id)
+
+async def get_cart_summary(db: AsyncSession, user_id: int):
+    return await db.run_sync(service.get_cart_summary, user_id)
+
+async def sweep_abandoned(db: AsyncSession):
+    return await db.run_sync(service.sweep_abandoned)
+
+async def run_janitor(session_factory, interval_seconds: float):
+    while True:
+        try:
+            async with session_factory() as db:
+                reclaimed = await sweep_abandoned(db)
+            janitor_stats["runs"] += 1
+            janitor_stats["reclaimed"] += reclaimed
+            janitor_stats["last_reclaimed"] = reclaimed
+            janitor_stats["last_run_at"] = utcnow().isoformat()
+            if reclaimed:
+                logger.info("Eliminadas %d líneas de carritos abandonados", reclaimed)
+        except Exception:
+            logger.exception("Fallo el barrido de carritos abandonados")
+        await asyncio.sleep(interval_seconds)
@@ -1,14 +1,27 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        # Una línea por oferta y usuario: agregar la misma oferta suma sobre la línea existente
+        Index("ix_cart_items_user_id_sale_id", "user_id", "sale_id", unique=True),
+        Index("ix_cart_items_sale_id", "sale_id"),
+        # El janitor recorre las líneas más viejas primero
+        Index("ix_cart_items_updated_at", "updated_at"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False)
     quantity = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=_utcnow)
+    updated_at = Column(DateTime, nullable=False, default=_utcnow, onupdate=_utcnow)
 
     user = relationship("User", back_populates="cart_items")
-    sale = relationship("Sale")
\ No newline at end of file
+    sale = relationship("Sale")
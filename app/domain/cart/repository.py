@@ -1,19 +1,143 @@
-from sqlalchemy.orm import Session
+from datetime import datetime
+from sqlalchemy import and_, delete, func, inspect, select, text, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, aliased
 from . import models, schemas
 from app.domain.sales.models import Sale
+from app.domain.inventory.models import Inventory
+from app.domain.reservation.models import Reservation
+from app.pagination import paginate
 
-def get_cart_items(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.CartItem).offset(skip).limit(limit).all()
+_USER_SALE_INDEX = "ix_cart_items_user_id_sale_id"
 
-def create_cart_item(db: Session, cart_item: schemas.CartItemCreate):
-    db_cart_item = models.CartItem(**cart_item.model_dump())
-    db.add(db_cart_item)
+def ensure_schema(engine):
+    if not inspect(engine).has_table(models.CartItem.__tablename__):
+        return
+    # Bases anteriores a los timestamps: las líneas existentes cuentan como tocadas ahora,
+    # así el janitor no las trata de abandonadas en el primer arranque
+    columns = {column["name"] for column in inspect(engine).get_columns(models.CartItem.__tablename__)}
+    missing = [column for column in ("created_at", "updated_at") if column not in columns]
+    if missing:
+        with engine.begin() as connection:
+            for column in missing:
+                connection.execute(text(f"ALTER TABLE cart_items ADD COLUMN {column} DATETIME"))
+                connection.execute(text(f"UPDATE cart_items SET {column} = CURRENT_TIMESTAMP"))
+            connection.execute(text("CREATE INDEX IF NOT EXISTS ix_cart_items_updated_at ON cart_items (updated_at)"))
+    # Bases anteriores a la clave única: se fusionan las líneas repetidas y el índice se recrea como UNIQUE
+    indexes = {index["name"]: index for index in inspect(engine).get_indexes(models.CartItem.__tablename__)}
+    if indexes.get(_USER_SALE_INDEX, {}).get("unique"):
+        return
+    with Session(bind=engine) as db:
+        compact_cart_items(db)
+        db.execute(text(f"DROP INDEX IF EXISTS {_USER_SALE_INDEX}"))
+        db.execute(text(f"CREATE UNIQUE INDEX {_USER_SALE_INDEX} ON cart_items (user_id, sale_id)"))
+        db.commit()
+
+def compact_cart_items(db: Session):
+    # Cuatro sentencias para todas las líneas repetidas: la de menor id se queda con la suma
+    # de cantidades y de holds, y las demás se borran junto con sus reservas
+    groups = (
+        select(
+            models.CartItem.user_id,
+            models.CartItem.sale_id,
+            func.min(models.CartItem.id).label("keep_id"),
+            func.sum(models.CartItem.quantity).label("quantity"),
+        )
+        .group_by(models.CartItem.user_id, models.CartItem.sale_id)
+        .having(func.count() > 1)
+        .subquery("groups")
+    )
+    same_group = and_(models.CartItem.user_id == groups.c.user_id, models.CartItem.sale_id == groups.c.sale_id)
+    held = (
+        select(groups.c.keep_id, func.sum(Reservation.quantity).label("quantity"))
+        .select_from(Reservation)
+        .join(models.CartItem, Reservation.cart_item_id == models.CartItem.id)
+        .join(groups, same_group)
+        .group_by(groups.c.keep_id)
+        .subquery("held")
+    )
+    duplicates = select(models.CartItem.id).join(groups, same_group).where(models.CartItem.id != groups.c.keep_id)
+    options = {"synchronize_session": False}
+    db.execute(update(Reservation).where(Reservation.cart_item_id == held.c.keep_id).values(quantity=held.c.quantity), execution_options=options)
+    db.execute(update(models.CartItem).where(models.CartItem.id == groups.c.keep_id).values(quantity=groups.c.quantity), execution_options=options)
+    db.execute(delete(Reservation).where(Reservation.cart_item_id.in_(duplicates)), execution_options=options)
+    return db.execute(delete(models.CartItem).where(models.CartItem.id.in_(duplicates)), execution_options=options).rowcount
+
+def get_cart_items(db: Session, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    return paginate(db.query(models.CartItem), models.CartItem.id, skip, limit, after_id)
+
+def create_cart_item(db: Session, cart_item: schemas.CartItemCreate, user_id: int):
+    (db_cart_item,) = upsert_cart_items(db, [{**cart_item.model_dump(), "user_id": user_id}])
     db.commit()
     db.refresh(db_cart_item)
     return db_cart_item
 
+def upsert_cart_items(db: Session, cart_items: list[dict]):
+    # Un INSERT multi-fila con RETURNING: los ids llegan sin refresh por línea.
+    # Si el usuario ya tiene la oferta, ON CONFLICT suma la cantidad sobre esa línea.
+    # Cada oferta debe venir una sola vez: dos filas del mismo VALUES devolverían la línea dos veces.
+    # El orden del RETURNING no está garantizado; se ordena por id
+    statement = insert(models.CartItem)
+    statement = statement.on_conflict_do_update(
+        index_elements=[models.CartItem.user_id, models.CartItem.sale_id],
+        set_={
+            "quantity": models.CartItem.quantity + statement.excluded.quantity,
+            "updated_at": statement.excluded.updated_at,
+        },
+    ).returning(models.CartItem)
+    # populate_existing: una línea ya cargada en la sesión recibe la cantidad sumada
+    rows = db.scalars(statement, cart_items, execution_options={"populate_existing": True}).all()
+    return sorted(rows, key=lambda item: item.id)
+
+def get_user_cart_items(db: Session, user_id: int, cart_item_ids: list[int]):
+    return (
+        db.query(models.CartItem)
+        .filter(models.CartItem.user_id == user_id, models.CartItem.id.in_(cart_item_ids))
+        .all()
+    )
+
+def clear_cart(db: Session, user_id: int):
+    statement = delete(models.CartItem).where(models.CartItem.user_id == user_id)
+    return db.execute(statement, execution_options={"synchronize_session": False}).rowcount
+
+def delete_abandoned(db: Session, cutoff: datetime, batch_size: int):
+    # Un carrito está abandonado si ninguna de sus líneas se tocó desde el corte: una línea vieja
+    # de un carrito activo se queda. Lote por el índice de updated_at, las más viejas primero
+    stale = aliased(models.CartItem, name="stale")
+    recent = (
+        select(models.CartItem.id)
+        .where(models.CartItem.user_id == stale.user_id, models.CartItem.updated_at > cutoff)
+        .exists()
+    )
+    abandoned = (
+        select(stale.id)
+        .where(stale.updated_at <= cutoff, ~recent)
+        .order_by(stale.updated_at)
+        .limit(batch_size)
+    )
+    statement = delete(models.CartItem).where(models.CartItem.id.in_(abandoned)).returning(models.CartItem.id)
+    return db.scalars(statement, execution_options={"synchronize_session": False}).all()
+
 def get_cart_item(db: Session, cart_item_id: int):
     return db.query(models.CartItem).filter(models.CartItem.id == cart_item_id).first()
 
 def get_cart_item_details(db: Session):
     return db.query(models.CartItem, Sale).join(Sale).all()
+
+def get_cart_summary_lines(db: Session, user_id: int):
+    # Una sola consulta: el total del carrito viaja en cada fila como función de ventana
+    line_total = models.CartItem.quantity * Sale.price
+    return (
+        db.query(
+            Inventory.product_name,
+            models.CartItem.quantity,
+            Sale.price,
+            line_total.label("total"),
+            func.sum(line_total).over().label("total_amount"),
+        )
+        .join(Sale, models.CartItem.sale_id == Sale.id)
+        .join(Inventory, Sale.product_id == Inventory.id)
+        .filter(models.CartItem.user_id == user_id)
+        .order_by(models.CartItem.id)
+        .all()
+    )
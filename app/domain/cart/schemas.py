@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Annotated
+from app.config import settings
 
 class CartItemBase(BaseModel):
     sale_id: int
@@ -8,9 +9,31 @@ class CartItemBase(BaseModel):
 class CartItemCreate(CartItemBase):
     pass
 
+class CartItemUpdate(CartItemBase):
+    id: int
+
+class CartBatchCreate(BaseModel):
+    items: Annotated[list[CartItemCreate], Field(min_length=1, max_length=settings.CART_BATCH_MAX_ITEMS)]
+
+class CartBatchUpdate(BaseModel):
+    items: Annotated[list[CartItemUpdate], Field(min_length=1, max_length=settings.CART_BATCH_MAX_ITEMS)]
+
+class CartCleared(BaseModel):
+    deleted: int
+
 class CartItem(CartItemBase):
     id: int
     user_id: int
 
     class Config:
         from_attributes = True
+
+class CartSummaryItem(BaseModel):
+    product_name: str
+    quantity: int
+    price: float
+    total: float
+
+class CartSummary(BaseModel):
+    items: list[CartSummaryItem]
+    total_amount: float
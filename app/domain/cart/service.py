@@ -1,16 +1,94 @@
+from datetime import timedelta
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from . import models, schemas
+from . import models, schemas, repository
 from fastapi import HTTPException, status
+from app.config import settings
+from app.pagination import paginate
+from app.domain.sales import repository as sales_repository
+from app.domain.reservation import repository as reservation_repository, service as reservation_service
+
+def _hold_stock(db: Session, db_cart_item: models.CartItem):
+    sale = sales_repository.get_sale(db, db_cart_item.sale_id)
+    if not sale:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Sale not found")
+    try:
+        reservation_service.hold_stock(db, db_cart_item.id, sale.product_id, db_cart_item.quantity)
+    except HTTPException:
+        db.rollback()
+        raise
+
+def _flush_cart_changes(db: Session):
+    # Cambiar la oferta de una línea a otra que el usuario ya tiene chocaría con la clave única
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Cart already has a line for that sale")
+
+def _merge_lines(cart_items, user_id: int):
+    # Las ofertas repetidas del lote se suman antes del upsert, en el orden en que aparecen
+    quantities = {}
+    for item in cart_items:
+        quantities[item.sale_id] = quantities.get(item.sale_id, 0) + item.quantity
+    return [{"sale_id": sale_id, "quantity": quantity, "user_id": user_id} for sale_id, quantity in quantities.items()]
 
 def create_cart_item(db: Session, cart_item: schemas.CartItemCreate, user_id: int):
-    db_cart_item = models.CartItem(**cart_item.model_dump(), user_id=user_id)
-    db.add(db_cart_item)
+    # La misma oferta dos veces suma sobre la línea existente; el hold se rehace por el total.
+    # La línea y su reserva de stock se confirman juntas
+    (db_cart_item,) = repository.upsert_cart_items(db, _merge_lines([cart_item], user_id))
+    _hold_stock(db, db_cart_item)
     db.commit()
-    db.refresh(db_cart_item)
     return db_cart_item
 
-def get_cart_items(db: Session, user_id: int):
-    return db.query(models.CartItem).filter(models.CartItem.user_id == user_id).all()
+def _check_sales_exist(db: Session, cart_items):
+    sale_ids = {item.sale_id for item in cart_items}
+    if sales_repository.get_existing_sale_ids(db, sale_ids) != sale_ids:
+        raise HTTPException(status_code=404, detail="Sale not found")
+
+def _hold_stock_many(db: Session, cart_item_ids: list[int]):
+    try:
+        reservation_service.hold_stock_many(db, cart_item_ids)
+    except HTTPException:
+        db.rollback()
+        raise
+
+def create_cart_items(db: Session, batch: schemas.CartBatchCreate, user_id: int):
+    # Un upsert para todas las líneas y un INSERT para sus reservas, en un solo commit
+    _check_sales_exist(db, batch.items)
+    db_cart_items = repository.upsert_cart_items(db, _merge_lines(batch.items, user_id))
+    _hold_stock_many(db, [item.id for item in db_cart_items])
+    db.commit()
+    return db_cart_items
+
+def update_cart_items(db: Session, batch: schemas.CartBatchUpdate, user_id: int):
+    item_ids = [item.id for item in batch.items]
+    if len(set(item_ids)) != len(item_ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Duplicate cart item ids")
+    db_cart_items = {item.id: item for item in repository.get_user_cart_items(db, user_id, item_ids)}
+    if len(db_cart_items) != len(item_ids):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart item not found")
+    _check_sales_exist(db, batch.items)
+    for item in batch.items:
+        db_cart_items[item.id].sale_id = item.sale_id
+        db_cart_items[item.id].quantity = item.quantity
+    # El flush agrupa los UPDATE por clave primaria en un executemany
+    _flush_cart_changes(db)
+    _hold_stock_many(db, item_ids)
+    db.commit()
+    return [db_cart_items[item_id] for item_id in item_ids]
+
+def clear_cart(db: Session, user_id: int):
+    reservation_service.release_user_holds(db, user_id)
+    deleted = repository.clear_cart(db, user_id)
+    db.commit()
+    return schemas.CartCleared(deleted=deleted)
+
+def get_cart_items(db: Session, user_id: int, skip: int = 0, limit: int | None = None, after_id: int | None = None):
+    # Sin limit se devuelve el carrito completo, como antes
+    query = db.query(models.CartItem).filter(models.CartItem.user_id == user_id)
+    return paginate(query, models.CartItem.id, skip, limit, after_id)
 
 def get_cart_item(db: Session, item_id: int, user_id: int):
     db_cart_item = db.query(models.CartItem).filter(models.CartItem.id == item_id, models.CartItem.user_id == user_id).first()
@@ -22,6 +100,8 @@ def update_cart_item(db: Session, item_id: int, cart_item: schemas.CartItemCreat
     db_cart_item = get_cart_item(db, item_id, user_id)
     db_cart_item.sale_id = cart_item.sale_id
     db_cart_item.quantity = cart_item.quantity
+    _flush_cart_changes(db)
+    _hold_stock(db, db_cart_item)
     db.commit()
     db.refresh(db_cart_item)
     return db_cart_item
@@ -29,8 +109,41 @@ def update_cart_item(db: Session, item_id: int, cart_item: schemas.CartItemCreat
 def delete_cart_item(db: Session, item_id: int, user_id: int):
     db_cart_item = db.query(models.CartItem).filter(models.CartItem.id == item_id, models.CartItem.user_id == user_id).first()
     if db_cart_item:
+        reservation_service.release_hold(db, db_cart_item.id)
         db.delete(db_cart_item)
         db.commit()
         return db_cart_item
     else:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart item not found")
+
+def get_cart_summary(db: Session, user_id: int):
+    lines = repository.get_cart_summary_lines(db, user_id)
+    items = [
+        schemas.CartSummaryItem(
+            product_name=line.product_name,
+            quantity=line.quantity,
+            price=line.price,
+            total=line.total,
+        )
+        for line in lines
+    ]
+    total_amount = lines[0].total_amount if lines else 0
+    return schemas.CartSummary(items=items, total_amount=total_amount)
+
+def sweep_abandoned(
+    db: Session,
+    max_age_seconds: int = settings.CART_ABANDONED_AFTER_SECONDS,
+    batch_size: int = settings.CART_JANITOR_BATCH_SIZE,
+):
+    # Lotes cortos con commit entre medio: el lock de escritura de SQLite se suelta en cada lote
+    cutoff = reservation_service.utcnow() - timedelta(seconds=max_age_seconds)
+    reclaimed = 0
+    while True:
+        cart_item_ids = repository.delete_abandoned(db, cutoff, batch_size)
+        if cart_item_ids:
+            # Sin ON DELETE CASCADE en SQLite: los holds de esas líneas se borran a mano
+            reservation_repository.delete_holds(db, cart_item_ids)
+        db.commit()
+        reclaimed += len(cart_item_ids)
+        if len(cart_item_ids) < batch_size:
+            return reclaimed
@@ -0,0 +1,8 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import service
+
+async def get_entries(db: AsyncSession, skip: int = 0, limit: int = 10, after_id: int | None = None, in_stock: bool = False):
+    return await db.run_sync(service.get_entries, skip, limit, after_id, in_stock)
+
+async def get_entry(db: AsyncSession, product_id: int):
+    return await db.run_sync(service.get_entry, product_id)
@@ -0,0 +1,68 @@
+from sqlalchemy import Column, Float, ForeignKey, Integer, String, event, text
+from database import Base
+
+class CatalogEntry(Base):
+    # Catálogo desnormalizado: nombre y stock de inventory, precio de la oferta vigente.
+    # Lo mantienen los triggers de abajo: ningún camino de escritura lo toca a mano
+    __tablename__ = "catalog_entries"
+
+    product_id = Column(Integer, ForeignKey("inventory.id", ondelete="CASCADE"), primary_key=True)
+    product_name = Column(String)
+    description = Column(String)
+    # Oferta más reciente del producto; sin ofertas, el precio es el de la fila de inventario
+    sale_id = Column(Integer, nullable=True)
+    price = Column(Float, nullable=True)
+    stock = Column(Integer, nullable=False, default=0)
+
+def _newest_sale(column: str, product_id: str):
+    return f"(SELECT {column} FROM sales WHERE sales.product_id = {product_id} ORDER BY sales.id DESC LIMIT 1)"
+
+def _stock(inventory: str):
+    # Igual que Inventory.on_hand: snapshot de la fila + cola del ledger
+    return (
+        f"coalesce({inventory}.quantity, 0) + (SELECT coalesce(sum(delta), 0) FROM stock_movements "
+        f"WHERE stock_movements.product_id = {inventory}.id AND stock_movements.id > {inventory}.ledger_position)"
+    )
+
+def _refresh_price(product_id: str):
+    return (
+        f"UPDATE catalog_entries SET sale_id = {_newest_sale('id', product_id)}, "
+        f"price = coalesce({_newest_sale('price', product_id)}, (SELECT price FROM inventory WHERE inventory.id = {product_id})) "
+        f"WHERE product_id = {product_id};"
+    )
+
+POPULATE = text(
+    "INSERT INTO catalog_entries (product_id, product_name, description, sale_id, price, stock) "
+    f"SELECT inventory.id, inventory.product_name, inventory.description, {_newest_sale('id', 'inventory.id')}, "
+    f"coalesce({_newest_sale('price', 'inventory.id')}, inventory.price), {_stock('inventory')} FROM inventory"
+)
+
+CATALOG_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS catalog_inventory_insert AFTER INSERT ON inventory BEGIN "
+    "INSERT OR REPLACE INTO catalog_entries (product_id, product_name, description, sale_id, price, stock) "
+    f"VALUES (NEW.id, NEW.product_name, NEW.description, {_newest_sale('id', 'NEW.id')}, "
+    f"coalesce({_newest_sale('price', 'NEW.id')}, NEW.price), {_stock('NEW')}); END",
+    # También cubre los snapshots del ledger: cambian quantity y ledger_position, no el stock
+    "CREATE TRIGGER IF NOT EXISTS catalog_inventory_update AFTER UPDATE ON inventory BEGIN "
+    f"UPDATE catalog_entries SET product_name = NEW.product_name, description = NEW.description, "
+    f"price = coalesce({_newest_sale('price', 'NEW.id')}, NEW.price), stock = {_stock('NEW')} "
+    "WHERE product_id = NEW.id; END",
+    "CREATE TRIGGER IF NOT EXISTS catalog_inventory_delete AFTER DELETE ON inventory BEGIN "
+    "DELETE FROM catalog_entries WHERE product_id = OLD.id; END",
+    # El ledger es de solo inserción: el stock se mueve por delta, sin volver a sumar la cola
+    "CREATE TRIGGER IF NOT EXISTS catalog_stock_movement AFTER INSERT ON stock_movements BEGIN "
+    "UPDATE catalog_entries SET stock = stock + NEW.delta WHERE product_id = NEW.product_id; END",
+    f"CREATE TRIGGER IF NOT EXISTS catalog_sale_insert AFTER INSERT ON sales BEGIN {_refresh_price('NEW.product_id')} END",
+    "CREATE TRIGGER IF NOT EXISTS catalog_sale_update AFTER UPDATE ON sales BEGIN "
+    f"{_refresh_price('OLD.product_id')} {_refresh_price('NEW.product_id')} END",
+    f"CREATE TRIGGER IF NOT EXISTS catalog_sale_delete AFTER DELETE ON sales BEGIN {_refresh_price('OLD.product_id')} END",
+]
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_catalog_triggers(metadata, connection, tables=(), **kw):
+    # Solo cuando se crea la tabla del catálogo: en una base existente se llena una vez con lo que ya hay
+    if connection.dialect.name != "sqlite" or CatalogEntry.__table__ not in tables:
+        return
+    for trigger in CATALOG_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+    connection.execute(POPULATE)
@@ -0,0 +1,19 @@
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from . import models
+from app.pagination import paginate
+
+def get_entries(db: Session, skip: int = 0, limit: int = 10, after_id: int | None = None, in_stock: bool = False):
+    query = db.query(models.CatalogEntry)
+    if in_stock:
+        query = query.filter(models.CatalogEntry.stock > 0)
+    return paginate(query, models.CatalogEntry.product_id, skip, limit, after_id)
+
+def get_entry(db: Session, product_id: int):
+    return db.get(models.CatalogEntry, product_id)
+
+def rebuild(db: Session):
+    # Reparación manual: los triggers mantienen la tabla, esto la recalcula entera desde las fuentes
+    db.execute(delete(models.CatalogEntry))
+    db.execute(models.POPULATE)
+    db.commit()
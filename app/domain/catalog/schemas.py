@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+class CatalogEntry(BaseModel):
+    product_id: int
+    product_name: str | None
+    description: str | None
+    sale_id: int | None
+    price: float | None
+    stock: int
+
+    model_config = {
+        "from_attributes": True
+    }
@@ -0,0 +1,12 @@
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from . import repository
+
+def get_entries(db: Session, skip: int = 0, limit: int = 10, after_id: int | None = None, in_stock: bool = False):
+    return repository.get_entries(db, skip, limit, after_id, in_stock)
+
+def get_entry(db: Session, product_id: int):
+    entry = repository.get_entry(db, product_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return entry
@@ -0,0 +1,6 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.idempotency.service import Claim
+from . import schemas, service
+
+async def checkout(db: AsyncSession, checkout: schemas.CheckoutCreate, user, idempotency_claim: Claim | None = None):
+    return await db.run_sync(service.checkout, checkout, user, idempotency_claim)
@@ -0,0 +1,56 @@
+from datetime import datetime
+from sqlalchemy import DateTime, func, literal, select
+from sqlalchemy.orm import Session
+from app.domain.cart.models import CartItem
+from app.domain.inventory import ledger
+from app.domain.inventory.models import MOVEMENT_SALE, Inventory
+from app.domain.reservation.models import Reservation
+from app.domain.sales.models import Sale
+
+def get_checkout_lines(db: Session, user_id: int):
+    # Una fila por oferta: varias líneas de la misma oferta se suman
+    quantity = func.sum(CartItem.quantity)
+    return db.execute(
+        select(
+            Sale.id.label("sale_id"),
+            Sale.product_id,
+            Inventory.product_name,
+            quantity.label("quantity"),
+            Sale.price,
+            (quantity * Sale.price).label("total"),
+        )
+        .select_from(CartItem)
+        .join(Sale, CartItem.sale_id == Sale.id)
+        .join(Inventory, Sale.product_id == Inventory.id)
+        .where(CartItem.user_id == user_id)
+        .group_by(Sale.id)
+        .order_by(Sale.id)
+    ).all()
+
+def withdraw_cart_stock(db: Session, user_id: int, now: datetime):
+    # Un movimiento 'sale' por producto, en un solo INSERT ... SELECT.
+    # Un producto solo entra si el stock vigente, descontando los holds de otros carritos, alcanza.
+    requested = (
+        select(Sale.product_id, func.sum(CartItem.quantity).label("quantity"))
+        .join(Sale, CartItem.sale_id == Sale.id)
+        .where(CartItem.user_id == user_id)
+        .group_by(Sale.product_id)
+        .subquery()
+    )
+    on_hand = select(Inventory.on_hand).where(Inventory.id == requested.c.product_id).scalar_subquery()
+    held_by_others = (
+        select(func.coalesce(func.sum(Reservation.quantity), 0))
+        .where(
+            Reservation.product_id == requested.c.product_id,
+            Reservation.expires_at > now,
+            Reservation.cart_item_id.not_in(select(CartItem.id).where(CartItem.user_id == user_id)),
+        )
+        .scalar_subquery()
+    )
+    source = select(
+        requested.c.product_id,
+        literal(MOVEMENT_SALE),
+        -requested.c.quantity,
+        literal(now, type_=DateTime()),
+    ).where(on_hand - held_by_others >= requested.c.quantity)
+    return ledger.record_movements(db, source)
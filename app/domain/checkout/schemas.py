@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from app.domain.cart.schemas import CartSummaryItem
+from app.domain.dispatch.schemas import Dispatch, DispatchCreate
+from app.domain.payment.schemas import PaymentResponse
+
+class CheckoutCreate(BaseModel):
+    dispatch: DispatchCreate
+
+class Checkout(BaseModel):
+    items: list[CartSummaryItem]
+    total_amount: float
+    payment: PaymentResponse
+    dispatch: Dispatch
@@ -0,0 +1,63 @@
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from app.domain.analytics import repository as analytics_repository
+from app.domain.cart import repository as cart_repository
+from app.domain.cart.schemas import CartSummaryItem
+from app.domain.dispatch import schemas as dispatch_schemas
+from app.domain.dispatch.models import Dispatch
+from app.domain.dispatch.service import DISPATCH_COST
+from app.domain.idempotency import service as idempotency_service
+from app.domain.inventory.catalog_cache import catalog_cache
+from app.domain.payment.models import STATUS_PENDING, Payment
+from app.domain.payment.schemas import PaymentResponse
+from app.domain.reservation import service as reservation_service
+from app.domain.reservation.service import utcnow
+from app.domain.user.models import User
+from . import repository, schemas
+
+def _by_product(lines):
+    # Varias ofertas del mismo producto cuentan como un solo producto vendido
+    totals = {}
+    for line in lines:
+        quantity, total = totals.get(line.product_id, (0, 0))
+        totals[line.product_id] = (quantity + line.quantity, total + line.total)
+    return [(product_id, quantity, total) for product_id, (quantity, total) in totals.items()]
+
+def checkout(db: Session, checkout: schemas.CheckoutCreate, user: User, idempotency_claim: idempotency_service.Claim | None = None):
+    # Todo en una transacción: si algo falla no queda stock descontado ni pago a medias
+    lines = repository.get_checkout_lines(db, user.id)
+    if not lines:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cart is empty")
+
+    now = utcnow()
+    withdrawn = repository.withdraw_cart_stock(db, user.id, now)
+    if len(withdrawn) < len({line.product_id for line in lines}):
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Not enough stock available")
+
+    total_amount = sum(line.total for line in lines)
+    # El pago cubre productos más despacho; el worker de pagos lo toma como cualquier otro pendiente
+    db_payment = Payment(user_id=user.id, amount=round(total_amount) + DISPATCH_COST, status=STATUS_PENDING)
+    db_dispatch = Dispatch(**checkout.dispatch.model_dump(), user_id=user.id, total_cost=DISPATCH_COST)
+    db.add_all([db_payment, db_dispatch])
+    # Los agregados de ventas avanzan en la misma transacción que el stock
+    analytics_repository.record_checkout(db, now, _by_product(lines))
+    reservation_service.release_user_holds(db, user.id)
+    cart_repository.clear_cart(db, user.id)
+    db.flush()
+
+    result = schemas.Checkout(
+        items=[
+            CartSummaryItem(product_name=line.product_name, quantity=line.quantity, price=line.price, total=line.total)
+            for line in lines
+        ],
+        total_amount=total_amount,
+        payment=PaymentResponse.model_validate(db_payment),
+        dispatch=dispatch_schemas.Dispatch.model_validate(db_dispatch),
+    )
+    if idempotency_claim is not None:
+        idempotency_service.complete(db, idempotency_claim, status.HTTP_200_OK, result.model_dump_json())
+    db.commit()
+    # El stock del catálogo cambió
+    catalog_cache.publish()
+    return result
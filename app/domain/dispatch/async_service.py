@@ -0,0 +1,17 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import schemas, service
+
+async def create_dispatch(db: AsyncSession, dispatch: schemas.DispatchCreate, user_id: int):
+    return await db.run_sync(service.create_dispatch, dispatch, user_id)
+
+async def get_dispatch(db: AsyncSession, dispatch_id: int):
+    return await db.run_sync(service.get_dispatch, dispatch_id)
+
+async def update_dispatch(db: AsyncSession, dispatch_id: int, dispatch: schemas.DispatchCreate):
+    return await db.run_sync(service.update_dispatch, dispatch_id, dispatch)
+
+async def delete_dispatch(db: AsyncSession, dispatch_id: int):
+    return await db.run_sync(service.delete_dispatch, dispatch_id)
+
+async def list_dispatches(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    return await db.run_sync(service.list_dispatches, user_id, skip, limit, after_id)
@@ -5,12 +5,12 @@ from database import Base
 class Dispatch(Base):
     __tablename__ = "dispatches"
 
-    id = Column(Integer, primary_key=True, index=True)
-    address = Column(String, index=True)
-    username = Column(String, index=True)
-    email = Column(String, index=True)
-    phone = Column(String, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    id = Column(Integer, primary_key=True)
+    address = Column(String)
+    username = Column(String)
+    email = Column(String)
+    phone = Column(String)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     total_cost = Column(Float, default=3000) 
 
     user = relationship("User", back_populates="dispatches")
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from . import models, schemas
+from app.pagination import paginate
 
 def create_dispatch(db: Session, dispatch: schemas.DispatchCreate, user_id: int, total_cost: int):
     db_dispatch = models.Dispatch(**dispatch.dict(), user_id=user_id, total_cost=total_cost)
@@ -27,5 +28,6 @@ def delete_dispatch(db: Session, dispatch_id: int):
         db.commit()
     return db_dispatch
 
-def list_dispatches(db: Session, user_id: int, skip: int = 0, limit: int = 10):
-    return db.query(models.Dispatch).filter(models.Dispatch.user_id == user_id).offset(skip).limit(limit).all()
+def list_dispatches(db: Session, user_id: int, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    query = db.query(models.Dispatch).filter(models.Dispatch.user_id == user_id)
+    return paginate(query, models.Dispatch.id, skip, limit, after_id)
@@ -1,9 +1,12 @@
 from sqlalchemy.orm import Session
 from . import models, schemas
 from fastapi import HTTPException
+from app.pagination import paginate
+
+DISPATCH_COST = 3000
 
 def create_dispatch(db: Session, dispatch: schemas.DispatchCreate, user_id: int):
-    db_dispatch = models.Dispatch(**dispatch.dict(), user_id=user_id, total_cost=3000)
+    db_dispatch = models.Dispatch(**dispatch.dict(), user_id=user_id, total_cost=DISPATCH_COST)
     db.add(db_dispatch)
     db.commit()
     db.refresh(db_dispatch)
@@ -21,7 +24,7 @@ def update_dispatch(db: Session, dispatch_id: int, dispatch: schemas.DispatchCre
         raise HTTPException(status_code=404, detail="Dispatch not found")
     for key, value in dispatch.dict().items():
         setattr(db_dispatch, key, value)
-    db_dispatch.total_cost = db_dispatch.total_cost or 3000
+    db_dispatch.total_cost = db_dispatch.total_cost or DISPATCH_COST
     db.commit()
     db.refresh(db_dispatch)
     return db_dispatch
@@ -34,5 +37,6 @@ def delete_dispatch(db: Session, dispatch_id: int):
     db.commit()
     return db_dispatch
 
-def list_dispatches(db: Session, user_id: int, skip: int = 0, limit: int = 10):
-    return db.query(models.Dispatch).filter(models.Dispatch.user_id == user_id).offset(skip).limit(limit).all()
+def list_dispatches(db: Session, user_id: int, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    query = db.query(models.Dispatch).filter(models.Dispatch.user_id == user_id)
+    return paginate(query, models.Dispatch.id, skip, limit, after_id)
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from . import service
+
+logger = logging.getLogger(__name__)
+
+REPLAY_HEADER = "Idempotent-Replayed"
+POLL_INTERVAL_SECONDS = 0.05
+
+# Peticiones en curso en este proceso: los duplicados esperan el evento en vez de consultar la BD
+_in_flight: dict[tuple[int, str], asyncio.Event] = {}
+
+async def begin(db: AsyncSession, user_id: int, key: str, request_fingerprint: str, wait_seconds: float = settings.IDEMPOTENCY_WAIT_SECONDS):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait_seconds
+    while True:
+        claim, stored = await db.run_sync(service.begin, user_id, key, request_fingerprint)
+        if claim is not None:
+            _in_flight.setdefault((user_id, key), asyncio.Event())
+            return claim, None
+        if stored.status_code is not None:
+            return None, stored
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+            )
+        event = _in_flight.get((user_id, key))
+        if event is None:
+            # La primera petición vive en otro proceso: solo queda sondear
+            await asyncio.sleep(min(remaining, POLL_INTERVAL_SECONDS))
+            continue
+        try:
+            await asyncio.wait_for(event.wait(), remaining)
+        except asyncio.TimeoutError:
+            pass
+
+@asynccontextmanager
+async def in_flight(db: AsyncSession, claim: service.Claim):
+    try:
+        yield
+    except BaseException:
+        # Sin respuesta guardada: el siguiente reintento vuelve a ejecutar
+        try:
+            await db.run_sync(service.release, claim)
+        except Exception:
+            logger.exception("No se pudo liberar la clave de idempotencia %s", claim.key)
+        raise
+    finally:
+        event = _in_flight.pop((claim.user_id, claim.key), None)
+        if event is not None:
+            event.set()
+
+def replay_response(stored):
+    return Response(
+        content=stored.response_body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={REPLAY_HEADER: "true"},
+    )
+
+async def sweep_expired(db: AsyncSession):
+    return await db.run_sync(service.sweep_expired)
+
+async def run_sweeper(session_factory, interval_seconds: float):
+    while True:
+        try:
+            async with session_factory() as db:
+                removed = await sweep_expired(db)
+            if removed:
+                logger.info("Eliminadas %d claves de idempotencia vencidas", removed)
+        except Exception:
+            logger.exception("Fallo el barrido de claves de idempotencia")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from database import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Barrido de claves vencidas sin recorrer la tabla
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    # La clave es por usuario: dos clientes pueden elegir el mismo valor
+    user_id = Column(Integer, primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    # NULL mientras la primera petición sigue en curso
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
@@ -0,0 +1,73 @@
+from datetime import datetime
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from . import models
+
+def claim_key(db: Session, user_id: int, key: str, fingerprint: str, now: datetime, expires_at: datetime):
+    # Un solo INSERT ... ON CONFLICT: gana la primera petición, o quien encuentre la clave vencida
+    statement = insert(models.IdempotencyKey).values(
+        user_id=user_id,
+        key=key,
+        fingerprint=fingerprint,
+        created_at=now,
+        expires_at=expires_at,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id", "key"],
+        set_={
+            "fingerprint": statement.excluded.fingerprint,
+            "status_code": None,
+            "response_body": None,
+            "created_at": statement.excluded.created_at,
+            "expires_at": statement.excluded.expires_at,
+        },
+        where=models.IdempotencyKey.expires_at <= now,
+    )
+    return db.execute(statement).rowcount == 1
+
+def get_key(db: Session, user_id: int, key: str):
+    return db.execute(
+        select(
+            models.IdempotencyKey.fingerprint,
+            models.IdempotencyKey.status_code,
+            models.IdempotencyKey.response_body,
+        ).where(models.IdempotencyKey.user_id == user_id, models.IdempotencyKey.key == key)
+    ).first()
+
+def complete_key(db: Session, user_id: int, key: str, claimed_at: datetime, status_code: int, response_body: str, expires_at: datetime):
+    # Solo el dueño del claim: si el lease venció y otra petición lo reclamó, created_at ya es otro
+    statement = (
+        update(models.IdempotencyKey)
+        .where(
+            models.IdempotencyKey.user_id == user_id,
+            models.IdempotencyKey.key == key,
+            models.IdempotencyKey.created_at == claimed_at,
+            models.IdempotencyKey.status_code.is_(None),
+        )
+        .values(status_code=status_code, response_body=response_body, expires_at=expires_at)
+    )
+    return db.execute(statement, execution_options={"synchronize_session": False}).rowcount
+
+def release_key(db: Session, user_id: int, key: str, claimed_at: datetime):
+    # Solo se suelta una clave en curso y propia: ni una respuesta guardada ni el claim de otro
+    statement = delete(models.IdempotencyKey).where(
+        models.IdempotencyKey.user_id == user_id,
+        models.IdempotencyKey.key == key,
+        models.IdempotencyKey.created_at == claimed_at,
+        models.IdempotencyKey.status_code.is_(None),
+    )
+    return db.execute(statement, execution_options={"synchronize_session": False}).rowcount
+
+def delete_expired(db: Session, now: datetime, batch_size: int):
+    expired = (
+        select(models.IdempotencyKey.user_id, models.IdempotencyKey.key)
+        .where(models.IdempotencyKey.expires_at <= now)
+        .order_by(models.IdempotencyKey.expires_at)
+        .limit(batch_size)
+    )
+    statement = delete(models.IdempotencyKey).where(
+        models.IdempotencyKey.expires_at <= now,
+        tuple_(models.IdempotencyKey.user_id, models.IdempotencyKey.key).in_(expired),
+    )
+    return db.execute(statement, execution_options={"synchronize_session": False}).rowcount
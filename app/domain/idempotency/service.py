@@ -0,0 +1,77 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from app.config import settings
+from . import repository
+
+# Reintentos si la clave se barre entre el INSERT y la lectura
+CLAIM_ATTEMPTS = 3
+
+class Claim(NamedTuple):
+    user_id: int
+    key: str
+    # created_at de la fila: distingue a este dueño de quien reclame la clave al vencer el lease
+    claimed_at: datetime
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def fingerprint(operation: str, payload: dict):
+    # JSON canónico: el mismo cuerpo con otro orden de claves es la misma petición
+    canonical = json.dumps([operation, payload], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def _in_progress():
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still in progress",
+    )
+
+def begin(db: Session, user_id: int, key: str, request_fingerprint: str):
+    # (claim, None): la clave es nuestra y hay que ejecutar. (None, fila): la guardada, completa o en curso
+    for _ in range(CLAIM_ATTEMPTS):
+        now = utcnow()
+        # El lease corto deja reintentar si el dueño murió antes de terminar
+        lease = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+        claimed = repository.claim_key(db, user_id, key, request_fingerprint, now, lease)
+        db.commit()
+        if claimed:
+            return Claim(user_id, key, now), None
+        stored = repository.get_key(db, user_id, key)
+        db.rollback()
+        if stored is None:
+            # Barrida entre el INSERT y la lectura: se vuelve a intentar
+            continue
+        if stored.fingerprint != request_fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request",
+            )
+        return None, stored
+    raise _in_progress()
+
+def complete(db: Session, claim: Claim, status_code: int, response_body: str):
+    # No hace commit: la respuesta se guarda en la misma transacción que el efecto.
+    # Si el lease venció y otra petición reclamó la clave, esta pierde: el efecto se deshace
+    expires_at = utcnow() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+    if not repository.complete_key(db, claim.user_id, claim.key, claim.claimed_at, status_code, response_body, expires_at):
+        db.rollback()
+        raise _in_progress()
+
+def release(db: Session, claim: Claim):
+    db.rollback()
+    repository.release_key(db, claim.user_id, claim.key, claim.claimed_at)
+    db.commit()
+
+def sweep_expired(db: Session, batch_size: int = settings.IDEMPOTENCY_SWEEP_BATCH_SIZE):
+    now = utcnow()
+    removed = 0
+    while True:
+        count = repository.delete_expired(db, now, batch_size)
+        db.commit()
+        removed += count
+        if count < batch_size:
+            return removed
@@ -0,0 +1,26 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.inventory import schemas, service
+
+async def get_inventory_item(db: AsyncSession, item_id: int):
+    return await db.run_sync(service.get_inventory_item, item_id)
+
+async def get_inventory_items(db: AsyncSession, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    return await db.run_sync(service.get_inventory_items, skip, limit, after_id)
+
+async def search_inventory_items(db: AsyncSession, query: str, skip: int = 0, limit: int = 10):
+    return await db.run_sync(service.search_inventory_items, query, skip, limit)
+
+async def create_inventory_item(db: AsyncSession, item: schemas.InventoryCreate, current_user):
+    return await db.run_sync(service.create_inventory_item, item, current_user)
+
+async def update_inventory_item(db: AsyncSession, item_id: int, item_update: schemas.InventoryCreate, current_user):
+    return await db.run_sync(service.update_inventory_item, item_id, item_update, current_user)
+
+async def delete_inventory_item(db: AsyncSession, item_id: int, quantity: int, current_user):
+    return await db.run_sync(service.delete_inventory_item, item_id, quantity, current_user)
+
+async def receive_stock(db: AsyncSession, item_id: int, quantity: int, current_user):
+    return await db.run_sync(service.receive_stock, item_id, quantity, current_user)
+
+async def get_stock_at(db: AsyncSession, item_id: int, at):
+    return await db.run_sync(service.get_stock_at, item_id, at)
@@ -0,0 +1,93 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+from app.config import settings
+from . import schemas
+
+_items_adapter = TypeAdapter(list[schemas.Inventory])
+
+class CachedPage(NamedTuple):
+    body: bytes
+    etag: str
+    headers: dict[str, str]
+
+def render_page(body: bytes, headers: dict[str, str] | None = None):
+    # ETag por contenido: sobrevive reinicios y coincide entre procesos que sirven lo mismo
+    return CachedPage(body, f'"{hashlib.sha256(body).hexdigest()[:32]}"', headers or {})
+
+def render_item(item):
+    return render_page(schemas.Inventory.model_validate(item).model_dump_json().encode())
+
+def render_items(items, headers: dict[str, str] | None = None):
+    return render_page(_items_adapter.dump_json(_items_adapter.validate_python(items, from_attributes=True)), headers)
+
+class CatalogCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, CachedPage] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        with self._lock:
+            page = self._entries.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return page
+
+    def put(self, key: tuple, page: CachedPage, version: int):
+        # Una página leída antes de la última escritura no entra: la versión ya cambió
+        with self._lock:
+            if version != self.version:
+                return False
+            self._entries[key] = page
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return True
+
+    def bump(self):
+        # Cualquier escritura del catálogo invalida todas las páginas: los listados mezclan productos
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            return self.version
+
+    def publish(self):
+        # Después del commit y solo invalida: dos escrituras pueden publicar en otro orden que el de
+        # sus commits, así que la página la llena la siguiente lectura y no quien escribió
+        return self.bump()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+def respond(request: Request, page: CachedPage):
+    headers = {
+        **page.headers,
+        "ETag": page.etag,
+        "Cache-Control": f"public, max-age={settings.CATALOG_CACHE_MAX_AGE_SECONDS}, must-revalidate",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if page.etag in {tag.strip() for tag in if_none_match.split(",")} or if_none_match.strip() == "*":
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=page.body, media_type="application/json", headers=headers)
+
+catalog_cache = CatalogCache(settings.CATALOG_CACHE_MAX_SIZE)
@@ -0,0 +1,138 @@
+from datetime import datetime, timezone
+from sqlalchemy import DateTime, func, insert, inspect, literal, literal_column, select, text, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from . import models
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def ensure_schema(engine):
+    # Bases anteriores al ledger: la fila de inventario pasa a ser el snapshot en la posición 0
+    if not inspect(engine).has_table(models.Inventory.__tablename__):
+        return
+    columns = {column["name"] for column in inspect(engine).get_columns(models.Inventory.__tablename__)}
+    if "ledger_position" in columns:
+        return
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE inventory ADD COLUMN ledger_position INTEGER NOT NULL DEFAULT 0"))
+        # Corre antes de create_all (el catálogo se llena leyendo ledger_position): la tabla de snapshots se crea aquí
+        models.StockSnapshot.__table__.create(connection, checkfirst=True)
+        # Snapshot de apertura: sin él stock_at no encuentra punto de partida para los productos existentes
+        connection.execute(text(
+            "INSERT INTO stock_snapshots (product_id, movement_id, quantity, taken_at) "
+            "SELECT id, 0, quantity, CURRENT_TIMESTAMP FROM inventory"
+        ))
+
+# Evaluado en el RETURNING: largo de la cola del producto incluyendo el movimiento recién insertado.
+# Va como SQL literal porque el compilador no califica las columnas del RETURNING.
+_tail_length_of_inserted = literal_column(
+    "(SELECT count(*) FROM stock_movements AS later "
+    "WHERE later.product_id = stock_movements.product_id "
+    "AND later.id > (SELECT ledger_position FROM inventory WHERE inventory.id = stock_movements.product_id))"
+)
+
+def record_movements(db: Session, source):
+    # Varias filas en un solo INSERT ... SELECT: source da (product_id, kind, delta, created_at)
+    statement = (
+        insert(models.StockMovement)
+        .from_select(["product_id", "kind", "delta", "created_at"], source)
+        .returning(models.StockMovement.product_id, models.StockMovement.id, _tail_length_of_inserted)
+    )
+    rows = db.execute(statement).all()
+    for product_id, movement_id, tail_length in rows:
+        if tail_length >= settings.STOCK_SNAPSHOT_INTERVAL:
+            take_snapshot(db, product_id, movement_id)
+    return [(product_id, movement_id) for product_id, movement_id, _ in rows]
+
+def _insert_movement(db: Session, product_id: int, source):
+    rows = record_movements(db, source)
+    return rows[0][1] if rows else None
+
+def _on_hand(product_id: int):
+    return select(models.Inventory.on_hand).where(models.Inventory.id == product_id).scalar_subquery()
+
+def record_movement(db: Session, product_id: int, delta: int, kind: str, minimum: int | None = None):
+    # Solo INSERT: la fila del producto no se toca salvo al tomar snapshot.
+    # Con minimum el movimiento solo entra si el stock vigente alcanza (atómico en una sentencia).
+    on_hand = _on_hand(product_id)
+    source = select(
+        literal(product_id),
+        literal(kind),
+        literal(delta),
+        literal(_utcnow(), type_=DateTime()),
+    ).where(on_hand.is_not(None))
+    if minimum is not None:
+        source = source.where(on_hand >= minimum)
+    return _insert_movement(db, product_id, source)
+
+def adjust_to(db: Session, product_id: int, quantity: int):
+    # Conteo físico: el delta se calcula en SQL contra el stock vigente
+    on_hand = _on_hand(product_id)
+    source = select(
+        literal(product_id),
+        literal(models.MOVEMENT_ADJUSTMENT),
+        literal(quantity) - on_hand,
+        literal(_utcnow(), type_=DateTime()),
+    ).where(on_hand.is_not(None), on_hand != quantity)
+    return _insert_movement(db, product_id, source)
+
+def tail_length(db: Session, product_id: int):
+    return db.execute(
+        select(func.count())
+        .select_from(models.StockMovement)
+        .join(models.Inventory, models.Inventory.id == models.StockMovement.product_id)
+        .where(models.StockMovement.product_id == product_id, models.StockMovement.id > models.Inventory.ledger_position)
+    ).scalar()
+
+def take_snapshot(db: Session, product_id: int, movement_id: int):
+    # Pliega la cola hasta movement_id en la fila y deja registro para consultas históricas
+    tail = (
+        select(func.coalesce(func.sum(models.StockMovement.delta), 0))
+        .where(
+            models.StockMovement.product_id == models.Inventory.id,
+            models.StockMovement.id > models.Inventory.ledger_position,
+            models.StockMovement.id <= movement_id,
+        )
+        .correlate(models.Inventory)
+        .scalar_subquery()
+    )
+    quantity = db.execute(
+        update(models.Inventory)
+        .where(models.Inventory.id == product_id, models.Inventory.ledger_position < movement_id)
+        .values(quantity=func.coalesce(models.Inventory.quantity, 0) + tail, ledger_position=movement_id)
+        .returning(models.Inventory.quantity)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if quantity is None:
+        return None
+    db.execute(
+        insert(models.StockSnapshot).values(
+            product_id=product_id, movement_id=movement_id, quantity=quantity, taken_at=_utcnow()
+        )
+    )
+    return quantity
+
+def open_ledger(db: Session, product_id: int, quantity: int):
+    # Snapshot inicial: sin él no hay punto de partida para stock_at
+    db.execute(
+        insert(models.StockSnapshot).values(product_id=product_id, movement_id=0, quantity=quantity, taken_at=_utcnow())
+    )
+
+def stock_at(db: Session, product_id: int, at: datetime):
+    snapshot = (
+        db.query(models.StockSnapshot)
+        .filter(models.StockSnapshot.product_id == product_id, models.StockSnapshot.taken_at <= at)
+        .order_by(models.StockSnapshot.taken_at.desc(), models.StockSnapshot.movement_id.desc())
+        .first()
+    )
+    if snapshot is None:
+        return None
+    tail = db.execute(
+        select(func.coalesce(func.sum(models.StockMovement.delta), 0)).where(
+            models.StockMovement.product_id == product_id,
+            models.StockMovement.id > snapshot.movement_id,
+            models.StockMovement.created_at <= at,
+        )
+    ).scalar()
+    return snapshot.quantity + tail
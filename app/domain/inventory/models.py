@@ -1,14 +1,74 @@
-from sqlalchemy import Column, Integer, String, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, Column, DateTime, ForeignKey, Index, Integer, String, Float, event, func, select
+from sqlalchemy.orm import column_property, relationship
 from database import Base
 
 class Inventory(Base):
     __tablename__ = "inventory"
+    # Sin reutilizar ids: el ledger de un producto borrado no debe pasar a otro
+    __table_args__ = {"sqlite_autoincrement": True}
 
-    id = Column(Integer, primary_key=True, index=True)
-    product_name = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    product_name = Column(String)
     description = Column(String)
     price = Column(Float)  # Asegúrate de que Float esté correctamente importado
+    # Último snapshot del ledger: stock al movimiento ledger_position
     quantity = Column(Integer)
+    ledger_position = Column(Integer, nullable=False, default=0, server_default="0")
     
     sale = relationship("Sale", uselist=False, back_populates="product")
+
+MOVEMENT_RECEIPT = "receipt"
+MOVEMENT_WITHDRAWAL = "withdrawal"
+MOVEMENT_SALE = "sale"
+MOVEMENT_ADJUSTMENT = "adjustment"
+
+class StockMovement(Base):
+    __tablename__ = "stock_movements"
+    # id = posición en el ledger, siempre creciente
+    __table_args__ = (
+        Index("ix_stock_movements_product_id", "product_id"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("inventory.id"), nullable=False)
+    kind = Column(String, nullable=False)
+    delta = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+class StockSnapshot(Base):
+    __tablename__ = "stock_snapshots"
+    __table_args__ = (
+        Index("ix_stock_snapshots_product_id_taken_at", "product_id", "taken_at"),
+    )
+
+    product_id = Column(Integer, ForeignKey("inventory.id"), primary_key=True)
+    movement_id = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False)
+    taken_at = Column(DateTime, nullable=False)
+
+# Stock vigente = snapshot en la fila + movimientos posteriores (la cola es corta)
+Inventory.on_hand = column_property(
+    func.coalesce(Inventory.quantity, 0)
+    + select(func.coalesce(func.sum(StockMovement.delta), 0))
+    .where(StockMovement.product_id == Inventory.id, StockMovement.id > Inventory.ledger_position)
+    .correlate_except(StockMovement)
+    .scalar_subquery()
+)
+
+FTS_TABLE = "inventory_fts"
+
+# Índice FTS5 con rowid = inventory.id; guarda su propia copia del texto para poder
+# borrar por rowid aunque la fila nunca se haya indexado
+create_search_index_ddl = [
+    DDL(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "product_name, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ),
+    # rank = bm25 con más peso al nombre que a la descripción
+    DDL(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 1.0)')"),
+]
+
+for ddl in create_search_index_ddl:
+    event.listen(Inventory.__table__, "after_create", ddl.execute_if(dialect="sqlite"))
+event.listen(Inventory.__table__, "before_drop", DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"))
@@ -1,23 +1,24 @@
 from sqlalchemy.orm import Session
-from . import models, schemas
+from . import ledger, models, schemas
+from app.pagination import paginate
 
 def get_inventory_item(db: Session, item_id: int):
     return db.query(models.Inventory).filter(models.Inventory.id == item_id).first()
 
-def get_inventory_items(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Inventory).offset(skip).limit(limit).all()
+def get_inventory_items(db: Session, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    return paginate(db.query(models.Inventory), models.Inventory.id, skip, limit, after_id)
 
 def create_inventory_item(db: Session, item: schemas.InventoryCreate):
+    # Sin commit: el servicio confirma la fila junto con su snapshot de apertura y su entrada FTS
     db_item = models.Inventory(**item.model_dump())
     db.add(db_item)
-    db.commit()
+    db.flush()
     db.refresh(db_item)
     return db_item
 
 def update_inventory_item(db: Session, db_item: models.Inventory, item_update: schemas.InventoryCreate):
     db_item.product_name = item_update.product_name
     db_item.description = item_update.description
-    db_item.quantity = item_update.quantity
     db.commit()
     db.refresh(db_item)
     return db_item
@@ -25,3 +26,16 @@ def update_inventory_item(db: Session, db_item: models.Inventory, item_update: s
 def delete_inventory_item(db: Session, db_item: models.Inventory):
     db.delete(db_item)
     db.commit()
+
+def withdraw_stock(db: Session, item_id: int, quantity: int):
+    # Un solo INSERT condicional en el ledger: sin stock suficiente no entra el movimiento
+    movement_id = ledger.record_movement(db, item_id, -quantity, models.MOVEMENT_WITHDRAWAL, minimum=quantity)
+    if movement_id is None:
+        return None
+    return db.get(models.Inventory, item_id, populate_existing=True)
+
+def receive_stock(db: Session, item_id: int, quantity: int):
+    movement_id = ledger.record_movement(db, item_id, quantity, models.MOVEMENT_RECEIPT)
+    if movement_id is None:
+        return None
+    return db.get(models.Inventory, item_id, populate_existing=True)
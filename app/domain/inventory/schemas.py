@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field
+from datetime import datetime
+from pydantic import AliasChoices, BaseModel, Field
 
 class InventoryBase(BaseModel):
     product_name: str = Field(..., json_schema_extra={"example": "martillo"})
@@ -10,7 +11,17 @@ class InventoryCreate(InventoryBase):
 
 class Inventory(InventoryBase):
     id: int
+    # Stock vigente según el ledger, no el snapshot guardado en la fila
+    quantity: int = Field(..., validation_alias=AliasChoices("on_hand", "quantity"))
 
     model_config = {
         "from_attributes": True
     }
+
+class StockReceipt(BaseModel):
+    quantity: int = Field(..., gt=0, json_schema_extra={"example": 5})
+
+class StockLevel(BaseModel):
+    product_id: int
+    at: datetime
+    quantity: int
@@ -0,0 +1,60 @@
+import re
+from sqlalchemy import column, inspect, table, text
+from sqlalchemy.orm import Session
+from . import models
+from .models import FTS_TABLE, create_search_index_ddl
+
+def ensure_index(engine):
+    # Bases creadas antes del índice: crear la tabla FTS y poblarla una vez
+    if engine.dialect.name != "sqlite" or inspect(engine).has_table(FTS_TABLE):
+        return
+    if not inspect(engine).has_table(models.Inventory.__tablename__):
+        return
+    with engine.begin() as connection:
+        for ddl in create_search_index_ddl:
+            connection.execute(ddl)
+        connection.execute(_populate)
+
+_populate = text(
+    f"INSERT INTO {FTS_TABLE}(rowid, product_name, description) "
+    "SELECT id, coalesce(product_name, ''), coalesce(description, '') FROM inventory"
+)
+
+def rebuild(db: Session):
+    db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    db.execute(_populate)
+    db.commit()
+
+def unindex_item(db: Session, item_id: int):
+    db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": item_id})
+
+def index_item(db: Session, item_id: int, product_name: str, description: str):
+    unindex_item(db, item_id)
+    db.execute(
+        text(f"INSERT INTO {FTS_TABLE}(rowid, product_name, description) VALUES (:id, :product_name, :description)"),
+        {"id": item_id, "product_name": product_name or "", "description": description or ""},
+    )
+
+def match_expression(query: str):
+    # Palabras entre comillas (sin operadores FTS5 del usuario); la última como prefijo
+    terms = [f'"{term}"' for term in re.findall(r"\w+", query)]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+fts_table = table(FTS_TABLE, column("rowid"), column("rank"))
+
+def search_inventory_items(db: Session, query: str, skip: int = 0, limit: int = 10):
+    expression = match_expression(query)
+    if not expression:
+        return []
+    return (
+        db.query(models.Inventory)
+        .join(fts_table, fts_table.c.rowid == models.Inventory.id)
+        .filter(text(f"{FTS_TABLE} MATCH :expression"))
+        .order_by(fts_table.c.rank)
+        .offset(skip)
+        .limit(limit)
+        .params(expression=expression)
+        .all()
+    )
@@ -1,8 +1,9 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app.domain.user.models import User
-from app.domain.inventory import models, schemas, repository
-from database import get_db
+from datetime import datetime
+from app.domain.inventory import ledger, schemas, repository, search
+from app.domain.inventory.catalog_cache import catalog_cache
 
 def get_inventory_item(db: Session, item_id: int):
     db_item = repository.get_inventory_item(db, item_id)
@@ -10,13 +11,22 @@ def get_inventory_item(db: Session, item_id: int):
         raise HTTPException(status_code=404, detail="Inventory item not found")
     return db_item
 
-def get_inventory_items(db: Session, skip: int = 0, limit: int = 10):
-    return repository.get_inventory_items(db, skip, limit)
+def get_inventory_items(db: Session, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    return repository.get_inventory_items(db, skip, limit, after_id)
+
+def search_inventory_items(db: Session, query: str, skip: int = 0, limit: int = 10):
+    return search.search_inventory_items(db, query, skip, limit)
 
 def create_inventory_item(db: Session, item: schemas.InventoryCreate, current_user: User):
     if current_user.role != "Bodega":
         raise HTTPException(status_code=403, detail="Not authorized to add inventory items")
-    return repository.create_inventory_item(db, item)
+    # Fila, snapshot de apertura y entrada FTS se confirman en una sola transacción
+    db_item = repository.create_inventory_item(db, item)
+    ledger.open_ledger(db, db_item.id, item.quantity)
+    search.index_item(db, db_item.id, db_item.product_name, db_item.description)
+    db.commit()
+    catalog_cache.publish()
+    return db_item
 
 def update_inventory_item(db: Session, item_id: int, item_update: schemas.InventoryCreate, current_user: User):
     if current_user.role != "Bodega":
@@ -24,25 +34,49 @@ def update_inventory_item(db: Session, item_id: int, item_update: schemas.Invent
     db_item = repository.get_inventory_item(db, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Inventory item not found")
-    return repository.update_inventory_item(db, db_item, item_update)
+    # Índice y ledger se actualizan en la misma transacción que la fila
+    search.index_item(db, db_item.id, item_update.product_name, item_update.description)
+    ledger.adjust_to(db, db_item.id, item_update.quantity)
+    db_item = repository.update_inventory_item(db, db_item, item_update)
+    catalog_cache.publish()
+    return db_item
 
 def delete_inventory_item(db: Session, item_id: int, quantity: int, current_user: User):
     if current_user.role != "Bodega":
         raise HTTPException(status_code=403, detail="Not authorized to delete inventory items")
     
-    db_item = repository.get_inventory_item(db, item_id)
-    if not db_item:
-        raise HTTPException(status_code=404, detail="Inventory item not found")
-    
-    if db_item.quantity < quantity:
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be greater than zero")
+
+    db_item = repository.withdraw_stock(db, item_id, quantity)
+    if db_item is None:
+        db.rollback()
+        if not repository.get_inventory_item(db, item_id):
+            raise HTTPException(status_code=404, detail="Inventory item not found")
         raise HTTPException(status_code=400, detail="Cannot delete more items than are available in inventory")
-    
-    db_item.quantity -= quantity
-    
-    if db_item.quantity == 0:
+
+    if db_item.on_hand == 0:
+        search.unindex_item(db, db_item.id)
         repository.delete_inventory_item(db, db_item)
+        catalog_cache.publish()
     else:
         db.commit()
-        db.refresh(db_item)
-    
+        catalog_cache.publish()
+
     return db_item
+
+def receive_stock(db: Session, item_id: int, quantity: int, current_user: User):
+    if current_user.role != "Bodega":
+        raise HTTPException(status_code=403, detail="Not authorized to receive inventory items")
+    db_item = repository.receive_stock(db, item_id, quantity)
+    if db_item is None:
+        raise HTTPException(status_code=404, detail="Inventory item not found")
+    db.commit()
+    catalog_cache.publish()
+    return db_item
+
+def get_stock_at(db: Session, item_id: int, at: datetime):
+    quantity = ledger.stock_at(db, item_id, at)
+    if quantity is None:
+        raise HTTPException(status_code=404, detail="No stock history for this item at that time")
+    return schemas.StockLevel(product_id=item_id, at=at, quantity=quantity)
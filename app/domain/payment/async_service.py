@@ -0,0 +1,16 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.idempotency.service import Claim
+from app.domain.payment import service
+from app.domain.payment.schemas import PaymentCreate
+
+async def create_payment(db: AsyncSession, payment: PaymentCreate, user, idempotency_claim: Claim | None = None):
+    return await db.run_sync(service.create_payment, payment, user, idempotency_claim)
+
+async def get_payment(db: AsyncSession, payment_id: int):
+    return await db.run_sync(service.get_payment, payment_id)
+
+async def list_payments(db: AsyncSession, user):
+    return await db.run_sync(service.list_payments, user)
+
+async def get_backlog(db: AsyncSession):
+    return await db.run_sync(service.get_backlog)
@@ -0,0 +1,31 @@
+import asyncio
+import random
+import uuid
+from typing import NamedTuple, Protocol
+
+class GatewayResult(NamedTuple):
+    approved: bool
+    reference: str | None = None
+
+class GatewayUnavailable(Exception):
+    # Falla transitoria: el worker reintenta con backoff
+    pass
+
+class PaymentGateway(Protocol):
+    async def charge(self, payment_id: int, amount: int) -> GatewayResult: ...
+
+class LocalGateway:
+    # Reemplazo local de la pasarela: latencia simulada, rechaza montos fuera de rango
+    def __init__(self, latency_seconds: float = 0.05, max_amount: int = 10_000_000, failure_rate: float = 0.0, rng: random.Random | None = None):
+        self.latency_seconds = latency_seconds
+        self.max_amount = max_amount
+        self.failure_rate = failure_rate
+        self._rng = rng or random.Random()
+
+    async def charge(self, payment_id: int, amount: int) -> GatewayResult:
+        await asyncio.sleep(self.latency_seconds)
+        if self._rng.random() < self.failure_rate:
+            raise GatewayUnavailable(f"Gateway unavailable for payment {payment_id}")
+        if not 0 < amount <= self.max_amount:
+            return GatewayResult(approved=False)
+        return GatewayResult(approved=True, reference=f"local-{uuid.uuid4().hex}")
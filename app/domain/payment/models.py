@@ -1,12 +1,32 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, Index, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
 from database import Base
 
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_APPROVED = "approved"
+STATUS_DECLINED = "declined"
+STATUS_FAILED = "failed"
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        # Cola del worker: pendientes y leases vencidos por orden de turno
+        Index("ix_payments_status_next_attempt_at", "status", "next_attempt_at"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     amount = Column(Integer, nullable=False)
-    status = Column(String, default="pending")
+    status = Column(String, default=STATUS_PENDING)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    # Pendiente: cuándo puede reintentarse. En proceso: hasta cuándo dura el lease del worker
+    next_attempt_at = Column(DateTime, nullable=False, default=_utcnow)
+    created_at = Column(DateTime, nullable=True, default=_utcnow)
+    processed_at = Column(DateTime, nullable=True)
+    gateway_reference = Column(String, nullable=True)
     user = relationship("User", back_populates="payments")
@@ -0,0 +1,66 @@
+from datetime import datetime
+from sqlalchemy import func, inspect, select, text, update
+from sqlalchemy.orm import Session
+from . import models
+
+_QUEUED = (models.STATUS_PENDING, models.STATUS_PROCESSING)
+
+def ensure_schema(engine):
+    # Bases anteriores al worker: los pagos existentes quedan en cola desde ya
+    if not inspect(engine).has_table(models.Payment.__tablename__):
+        return
+    columns = {column["name"] for column in inspect(engine).get_columns(models.Payment.__tablename__)}
+    statements = [
+        statement
+        for column, statement in (
+            ("attempts", "ALTER TABLE payments ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0"),
+            ("next_attempt_at", "ALTER TABLE payments ADD COLUMN next_attempt_at DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00.000000'"),
+            ("created_at", "ALTER TABLE payments ADD COLUMN created_at DATETIME"),
+            ("processed_at", "ALTER TABLE payments ADD COLUMN processed_at DATETIME"),
+            ("gateway_reference", "ALTER TABLE payments ADD COLUMN gateway_reference VARCHAR"),
+        )
+        if column not in columns
+    ]
+    if not statements:
+        return
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_payments_status_next_attempt_at ON payments (status, next_attempt_at)"
+        ))
+
+def claim_batch(db: Session, now: datetime, lease_until: datetime, batch_size: int):
+    # Un solo UPDATE ... RETURNING: dos workers nunca se llevan el mismo pago.
+    # Los 'processing' con lease vencido son de un worker caído y vuelven a la cola.
+    due = (
+        select(models.Payment.id)
+        .where(models.Payment.status.in_(_QUEUED), models.Payment.next_attempt_at <= now)
+        .order_by(models.Payment.next_attempt_at)
+        .limit(batch_size)
+    )
+    statement = (
+        update(models.Payment)
+        .where(models.Payment.id.in_(due))
+        .values(
+            status=models.STATUS_PROCESSING,
+            attempts=models.Payment.attempts + 1,
+            next_attempt_at=lease_until,
+        )
+        .returning(models.Payment.id, models.Payment.amount, models.Payment.attempts, models.Payment.created_at)
+    )
+    return db.execute(statement, execution_options={"synchronize_session": False}).all()
+
+def apply_results(db: Session, results: list[dict]):
+    # UPDATE por clave primaria en un solo executemany
+    if results:
+        db.execute(update(models.Payment), results)
+
+def get_backlog(db: Session, now: datetime):
+    return db.execute(
+        select(
+            func.count().label("queued"),
+            func.coalesce(func.sum(models.Payment.next_attempt_at <= now), 0).label("due"),
+            func.min(models.Payment.next_attempt_at).label("oldest_due_at"),
+        ).where(models.Payment.status.in_(_QUEUED))
+    ).first()
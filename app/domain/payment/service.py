@@ -1,15 +1,27 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import status
 from sqlalchemy.orm import Session
+from app.domain.payment import repository
 from app.domain.payment.models import Payment
-from app.domain.payment.schemas import PaymentCreate
+from app.domain.payment.schemas import PaymentCreate, PaymentResponse
+from app.domain.idempotency import service as idempotency_service
 from app.domain.user.models import User
 
-def create_payment(db: Session, payment: PaymentCreate, user: User):
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def create_payment(db: Session, payment: PaymentCreate, user: User, idempotency_claim: idempotency_service.Claim | None = None):
     db_payment = Payment(
         user_id=user.id,
         amount=payment.amount,
         status="pending"
     )
     db.add(db_payment)
+    if idempotency_claim is not None:
+        # Pago y respuesta guardada se confirman juntos: o quedan los dos o ninguno
+        db.flush()
+        response_body = PaymentResponse.model_validate(db_payment).model_dump_json()
+        idempotency_service.complete(db, idempotency_claim, status.HTTP_200_OK, response_body)
     db.commit()
     db.refresh(db_payment)
     return db_payment
@@ -20,3 +32,23 @@ def get_payment(db: Session, payment_id: int):
 
 def list_payments(db: Session, user):
     return db.query(Payment).filter(Payment.user_id == user.id).all()
+
+def claim_payments(db: Session, batch_size: int, lease_seconds: int):
+    # El lease se confirma antes de llamar a la pasarela: si el worker cae, otro lo retoma al vencer
+    now = utcnow()
+    batch = repository.claim_batch(db, now, now + timedelta(seconds=lease_seconds), batch_size)
+    db.commit()
+    return batch
+
+def record_results(db: Session, results: list[dict]):
+    repository.apply_results(db, results)
+    db.commit()
+
+def get_backlog(db: Session):
+    now = utcnow()
+    row = repository.get_backlog(db, now)
+    return {
+        "queued": row.queued,
+        "due": row.due,
+        "oldest_due_age_seconds": (now - row.oldest_due_at).total_seconds() if row.oldest_due_at and row.due else 0.0,
+    }
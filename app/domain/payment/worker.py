@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from . import models, service
+from .gateway import LocalGateway, PaymentGateway
+
+logger = logging.getLogger(__name__)
+
+class PaymentWorker:
+    def __init__(
+        self,
+        gateway: PaymentGateway,
+        batch_size: int,
+        concurrency: int,
+        lease_seconds: int,
+        max_attempts: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+    ):
+        self.gateway = gateway
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def retry_delay(self, attempts: int):
+        # Backoff exponencial con tope: 2s, 4s, 8s... hasta retry_max_seconds
+        return min(self.retry_base_seconds * 2 ** (attempts - 1), self.retry_max_seconds)
+
+    async def run_once(self, db: AsyncSession):
+        batch = await db.run_sync(service.claim_payments, self.batch_size, self.lease_seconds)
+        if not batch:
+            return 0
+        # Las llamadas a la pasarela van en paralelo; la escritura de estados es una sola
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._charge(semaphore, payment) for payment in batch))
+        await db.run_sync(service.record_results, results)
+        self._record_batch(batch, results)
+        return len(batch)
+
+    async def run(self, session_factory, poll_seconds: float):
+        while True:
+            try:
+                async with session_factory() as db:
+                    processed = await self.run_once(db)
+            except Exception:
+                logger.exception("Fallo el lote de pagos")
+                processed = 0
+            # Lote lleno: probablemente queda cola, se sigue sin dormir
+            if processed < self.batch_size:
+                await asyncio.sleep(poll_seconds)
+
+    async def _charge(self, semaphore: asyncio.Semaphore, payment):
+        async with semaphore:
+            started_at = time.perf_counter()
+            try:
+                result = await self.gateway.charge(payment.id, payment.amount)
+            except Exception as exc:
+                logger.warning("Pago %d: intento %d fallido (%s)", payment.id, payment.attempts, exc)
+                result = None
+            self._record_gateway_call(time.perf_counter() - started_at)
+
+        now = service.utcnow()
+        if result is not None:
+            return {
+                "id": payment.id,
+                "status": models.STATUS_APPROVED if result.approved else models.STATUS_DECLINED,
+                "next_attempt_at": now,
+                "processed_at": now,
+                "gateway_reference": result.reference,
+            }
+        if payment.attempts >= self.max_attempts:
+            return {
+                "id": payment.id,
+                "status": models.STATUS_FAILED,
+                "next_attempt_at": now,
+                "processed_at": now,
+                "gateway_reference": None,
+            }
+        return {
+            "id": payment.id,
+            "status": models.STATUS_PENDING,
+            "next_attempt_at": now + timedelta(seconds=self.retry_delay(payment.attempts)),
+            "processed_at": None,
+            "gateway_reference": None,
+        }
+
+    def _record_gateway_call(self, elapsed: float):
+        with self._lock:
+            self._gateway_calls += 1
+            self._gateway_time_total += elapsed
+            self._gateway_time_max = max(self._gateway_time_max, elapsed)
+
+    def _record_batch(self, batch, results):
+        created_at = {payment.id: payment.created_at for payment in batch}
+        with self._lock:
+            self._batches += 1
+            for result in results:
+                self._outcomes[result["status"]] = self._outcomes.get(result["status"], 0) + 1
+                if result["processed_at"] is None or created_at[result["id"]] is None:
+                    continue
+                # Latencia de punta a punta: desde que se creó el pago hasta su estado final
+                latency = (result["processed_at"] - created_at[result["id"]]).total_seconds()
+                self._finished += 1
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+
+    def reset_metrics(self):
+        with self._lock:
+            self._batches = 0
+            self._outcomes = {}
+            self._gateway_calls = 0
+            self._gateway_time_total = 0.0
+            self._gateway_time_max = 0.0
+            self._finished = 0
+            self._latency_total = 0.0
+            self._latency_max = 0.0
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "batch_size": self.batch_size,
+                "concurrency": self.concurrency,
+                "batches": self._batches,
+                "outcomes": dict(self._outcomes),
+                "gateway_calls": self._gateway_calls,
+                "gateway_ms_avg": self._gateway_time_total / (self._gateway_calls or 1) * 1000,
+                "gateway_ms_max": self._gateway_time_max * 1000,
+                "finished": self._finished,
+                "latency_ms_avg": self._latency_total / (self._finished or 1) * 1000,
+                "latency_ms_max": self._latency_max * 1000,
+            }
+
+payment_worker = PaymentWorker(
+    LocalGateway(),
+    batch_size=settings.PAYMENT_WORKER_BATCH_SIZE,
+    concurrency=settings.PAYMENT_WORKER_CONCURRENCY,
+    lease_seconds=settings.PAYMENT_CLAIM_LEASE_SECONDS,
+    max_attempts=settings.PAYMENT_MAX_ATTEMPTS,
+    retry_base_seconds=settings.PAYMENT_RETRY_BASE_SECONDS,
+    retry_max_seconds=settings.PAYMENT_RETRY_MAX_SECONDS,
+)
@@ -0,0 +1,23 @@
+import asyncio
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import service
+
+logger = logging.getLogger(__name__)
+
+async def get_availability(db: AsyncSession, product_id: int):
+    return await db.run_sync(service.get_availability, product_id)
+
+async def sweep_expired(db: AsyncSession):
+    return await db.run_sync(service.sweep_expired)
+
+async def run_sweeper(session_factory, interval_seconds: float):
+    while True:
+        try:
+            async with session_factory() as db:
+                released = await sweep_expired(db)
+            if released:
+                logger.info("Liberadas %d reservas vencidas", released)
+        except Exception:
+            logger.exception("Fallo el barrido de reservas")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer
+from database import Base
+
+class Reservation(Base):
+    __tablename__ = "reservations"
+    __table_args__ = (
+        # Barrido de vencidos por orden de expiración, sin recorrer la tabla
+        Index("ix_reservations_expires_at", "expires_at"),
+        # Cubre la suma de holds activos por producto
+        Index("ix_reservations_product_id_expires_at", "product_id", "expires_at", "quantity"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    cart_item_id = Column(Integer, ForeignKey("cart_items.id", ondelete="CASCADE"), nullable=False, unique=True)
+    product_id = Column(Integer, ForeignKey("inventory.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
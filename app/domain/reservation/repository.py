@@ -0,0 +1,90 @@
+from datetime import datetime
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+from . import models
+from app.domain.cart.models import CartItem
+from app.domain.inventory.models import Inventory
+from app.domain.sales.models import Sale
+
+def _held_quantity(product_id, now: datetime):
+    return (
+        select(func.coalesce(func.sum(models.Reservation.quantity), 0))
+        .where(models.Reservation.product_id == product_id, models.Reservation.expires_at > now)
+        .scalar_subquery()
+    )
+
+def create_hold(db: Session, cart_item_id: int, product_id: int, quantity: int, expires_at: datetime, now: datetime):
+    # INSERT ... SELECT condicional: solo se reserva si on-hand menos holds activos alcanza
+    available = select(Inventory.on_hand - _held_quantity(product_id, now)).where(Inventory.id == product_id).scalar_subquery()
+    statement = insert(models.Reservation).from_select(
+        ["cart_item_id", "product_id", "quantity", "expires_at"],
+        select(
+            literal(cart_item_id),
+            literal(product_id),
+            literal(quantity),
+            literal(expires_at, type_=models.Reservation.expires_at.type),
+        ).where(available >= quantity),
+    )
+    return db.execute(statement).rowcount == 1
+
+def create_holds(db: Session, cart_item_ids: list[int], expires_at: datetime, now: datetime):
+    # Todas las líneas en un INSERT ... SELECT. La condición va por producto y suma las líneas del lote:
+    # dos líneas del mismo producto no pueden tomar cada una el último stock
+    items = (
+        select(CartItem.id, Sale.product_id, CartItem.quantity)
+        .join(Sale, CartItem.sale_id == Sale.id)
+        .where(CartItem.id.in_(cart_item_ids))
+        .subquery("items")
+    )
+    required = (
+        select(items.c.product_id, func.sum(items.c.quantity).label("quantity"))
+        .group_by(items.c.product_id)
+        .subquery("required")
+    )
+    on_hand = select(Inventory.on_hand).where(Inventory.id == required.c.product_id).scalar_subquery()
+    statement = insert(models.Reservation).from_select(
+        ["cart_item_id", "product_id", "quantity", "expires_at"],
+        select(
+            items.c.id,
+            items.c.product_id,
+            items.c.quantity,
+            literal(expires_at, type_=models.Reservation.expires_at.type),
+        )
+        .join(required, required.c.product_id == items.c.product_id)
+        .where(on_hand - _held_quantity(required.c.product_id, now) >= required.c.quantity),
+    )
+    return db.execute(statement).rowcount
+
+def get_hold(db: Session, cart_item_id: int):
+    return db.query(models.Reservation).filter(models.Reservation.cart_item_id == cart_item_id).first()
+
+def delete_hold(db: Session, cart_item_id: int):
+    statement = delete(models.Reservation).where(models.Reservation.cart_item_id == cart_item_id)
+    return db.execute(statement, execution_options={"synchronize_session": False}).rowcount
+
+def delete_holds(db: Session, cart_item_ids: list[int]):
+    statement = delete(models.Reservation).where(models.Reservation.cart_item_id.in_(cart_item_ids))
+    return db.execute(statement, execution_options={"synchronize_session": False}).rowcount
+
+def delete_user_holds(db: Session, user_id: int):
+    # Los holds se borran a mano: SQLite no aplica el ON DELETE CASCADE sin PRAGMA foreign_keys
+    user_items = select(CartItem.id).where(CartItem.user_id == user_id)
+    statement = delete(models.Reservation).where(models.Reservation.cart_item_id.in_(user_items))
+    return db.execute(statement, execution_options={"synchronize_session": False}).rowcount
+
+def get_availability(db: Session, product_id: int, now: datetime):
+    held = _held_quantity(product_id, now)
+    return db.execute(
+        select(Inventory.on_hand.label("on_hand"), held.label("held")).where(Inventory.id == product_id)
+    ).first()
+
+def release_expired(db: Session, now: datetime, batch_size: int):
+    # Lote por el índice de expires_at: los más antiguos primero
+    expired = (
+        select(models.Reservation.id)
+        .where(models.Reservation.expires_at <= now)
+        .order_by(models.Reservation.expires_at)
+        .limit(batch_size)
+    )
+    statement = delete(models.Reservation).where(models.Reservation.id.in_(expired))
+    return db.execute(statement, execution_options={"synchronize_session": False}).rowcount
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+class Availability(BaseModel):
+    product_id: int
+    on_hand: int
+    held: int
+    available: int
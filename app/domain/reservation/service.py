@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from app.config import settings
+from . import repository, schemas
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def hold_stock(db: Session, cart_item_id: int, product_id: int, quantity: int):
+    # No hace commit: el hold viaja en la misma transacción que la línea del carrito
+    now = utcnow()
+    expires_at = now + timedelta(seconds=settings.RESERVATION_TTL_SECONDS)
+    repository.delete_hold(db, cart_item_id)
+    if not repository.create_hold(db, cart_item_id, product_id, quantity, expires_at, now):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Not enough stock available")
+
+def hold_stock_many(db: Session, cart_item_ids: list[int]):
+    # Igual que hold_stock para un lote de líneas: o se reservan todas o ninguna
+    now = utcnow()
+    expires_at = now + timedelta(seconds=settings.RESERVATION_TTL_SECONDS)
+    repository.delete_holds(db, cart_item_ids)
+    if repository.create_holds(db, cart_item_ids, expires_at, now) < len(cart_item_ids):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Not enough stock available")
+
+def release_hold(db: Session, cart_item_id: int):
+    repository.delete_hold(db, cart_item_id)
+
+def release_user_holds(db: Session, user_id: int):
+    repository.delete_user_holds(db, user_id)
+
+def get_availability(db: Session, product_id: int):
+    row = repository.get_availability(db, product_id, utcnow())
+    if row is None:
+        raise HTTPException(status_code=404, detail="Inventory item not found")
+    return schemas.Availability(
+        product_id=product_id,
+        on_hand=row.on_hand,
+        held=row.held,
+        available=row.on_hand - row.held,
+    )
+
+def sweep_expired(db: Session, batch_size: int = settings.RESERVATION_SWEEP_BATCH_SIZE):
+    # Lotes cortos con commit entre medio para no bloquear a los escritores
+    now = utcnow()
+    released = 0
+    while True:
+        count = repository.release_expired(db, now, batch_size)
+        db.commit()
+        released += count
+        if count < batch_size:
+            return released
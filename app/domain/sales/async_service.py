@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import schemas, service
+
+async def create_sale(db: AsyncSession, sale: schemas.SaleCreate, current_user):
+    return await db.run_sync(service.create_sale, sale, current_user)
+
+async def get_sales(db: AsyncSession, skip: int = 0, limit: int = 10, after_id: int | None = None, expand_product: bool = False):
+    return await db.run_sync(service.get_sales, skip, limit, after_id, expand_product)
+
+async def get_sale(db: AsyncSession, sale_id: int, expand_product: bool = False):
+    return await db.run_sync(service.get_sale, sale_id, expand_product)
+
+async def update_sale(db: AsyncSession, sale_id: int, sale_update: schemas.SaleCreate, current_user):
+    return await db.run_sync(service.update_sale, sale_id, sale_update, current_user)
+
+async def delete_sale(db: AsyncSession, sale_id: int, current_user):
+    return await db.run_sync(service.delete_sale, sale_id, current_user)
+
+async def update_prices(db: AsyncSession, price_update: schemas.SalePriceUpdate, current_user):
+    return await db.run_sync(service.update_prices, price_update, current_user)
+
+async def get_sale_prices(db: AsyncSession, sale_id: int, since: datetime | None = None, until: datetime | None = None, limit: int = 100):
+    return await db.run_sync(service.get_sale_prices, sale_id, since, until, limit)
+
+async def get_price_changes(
+    db: AsyncSession, since: datetime, until: datetime | None = None, after_sale_id: int | None = None, limit: int = 100
+):
+    return await db.run_sync(service.get_price_changes, since, until, after_sale_id, limit)
@@ -1,13 +1,71 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import Column, Index, Integer, Float, ForeignKey, event, text
 from sqlalchemy.orm import relationship
 from database import Base
 
 class Sale(Base):
     __tablename__ = "sales"
+    # Sin reutilizar ids: el historial de precios de una oferta borrada no debe pasar a otra
+    __table_args__ = {"sqlite_autoincrement": True}
 
-    id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("inventory.id"), nullable=False)
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("inventory.id"), nullable=False, index=True)
     price = Column(Float, nullable=False)
 
     product = relationship("Inventory", back_populates="sale")
     cart_items = relationship("CartItem", back_populates="sale")
+
+class SalePrice(Base):
+    # Historial de solo inserción: una fila por precio fijado, también el inicial.
+    # WITHOUT ROWID y clave (sale_id, changed_at): los puntos de una oferta quedan contiguos
+    # y en orden en el B-tree, el rango de fechas es una sola búsqueda sin tabla aparte
+    __tablename__ = "sale_price_history"
+    __table_args__ = (
+        # Cambios de todas las ofertas en orden de tiempo; en WITHOUT ROWID el índice ya lleva sale_id
+        Index("ix_sale_price_history_changed_at", "changed_at"),
+        {"sqlite_with_rowid": False},
+    )
+
+    # Sin FK: el historial sobrevive al borrado de la oferta
+    sale_id = Column(Integer, primary_key=True)
+    # Microsegundos desde epoch UTC y centavos: enteros de largo variable, sin redondeos de float
+    changed_at = Column(Integer, primary_key=True)
+    price_cents = Column(Integer, nullable=False)
+
+    @property
+    def price(self):
+        return self.price_cents / 100
+
+    @property
+    def changed_at_time(self):
+        return from_micros(self.changed_at)
+
+_EPOCH = datetime(1970, 1, 1)
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def to_micros(at: datetime):
+    # datetime -> entero guardado en changed_at; sin zona horaria se toma como UTC
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    return (at - _EPOCH) // timedelta(microseconds=1)
+
+def from_micros(micros: int):
+    return _EPOCH + timedelta(microseconds=micros)
+
+def to_cents(price: float):
+    return round(price * 100)
+
+@event.listens_for(Base.metadata, "after_create")
+def _seed_price_history(metadata, connection, tables=(), **kw):
+    # Base existente: el precio vigente de cada oferta es el primer punto de su historial
+    if SalePrice.__table__ not in tables:
+        return
+    connection.execute(
+        text(
+            "INSERT INTO sale_price_history (sale_id, changed_at, price_cents) "
+            "SELECT id, :changed_at, CAST(round(price * 100) AS INTEGER) FROM sales"
+        ),
+        {"changed_at": to_micros(_utcnow())},
+    )
@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+from sqlalchemy import Integer, cast, func, literal, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from . import models
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _insert(rows_or_source):
+    statement = insert(models.SalePrice)
+    if isinstance(rows_or_source, list):
+        statement = statement.values(rows_or_source)
+    else:
+        statement = statement.from_select(["sale_id", "changed_at", "price_cents"], rows_or_source)
+    # Dos precios de la misma oferta en el mismo microsegundo: queda el último
+    return statement.on_conflict_do_update(
+        index_elements=[models.SalePrice.sale_id, models.SalePrice.changed_at],
+        set_={"price_cents": statement.excluded.price_cents},
+    )
+
+def record_price(db: Session, sale_id: int, price: float, at: datetime | None = None):
+    # Sin commit: va en la transacción que fija el precio
+    db.execute(_insert([
+        {"sale_id": sale_id, "changed_at": models.to_micros(at or _utcnow()), "price_cents": models.to_cents(price)}
+    ]))
+
+def record_prices(db: Session, condition, at: datetime | None = None):
+    # Un solo INSERT ... SELECT con el precio ya actualizado de las ofertas que cumplen condition
+    source = select(
+        models.Sale.id,
+        literal(models.to_micros(at or _utcnow())),
+        cast(func.round(models.Sale.price * 100), Integer),
+    ).where(condition)
+    return db.execute(_insert(source)).rowcount
+
+def get_sale_prices(db: Session, sale_id: int, since: datetime | None = None, until: datetime | None = None, limit: int = 100):
+    # Rango [since, until) sobre la clave primaria: lee solo las filas devueltas
+    history = models.SalePrice
+    query = select(history).where(history.sale_id == sale_id)
+    if since is not None:
+        query = query.where(history.changed_at >= models.to_micros(since))
+    if until is not None:
+        query = query.where(history.changed_at < models.to_micros(until))
+    return db.scalars(query.order_by(history.changed_at).limit(limit)).all()
+
+def get_price_changes(
+    db: Session, since: datetime, until: datetime | None = None, after_sale_id: int | None = None, limit: int = 100
+):
+    # Todas las ofertas en orden (changed_at, sale_id). Para seguir, since = último changed_at
+    # y after_sale_id = último sale_id: un cambio masivo comparte changed_at entre muchas ofertas
+    history = models.SalePrice
+    since_micros = models.to_micros(since)
+    if after_sale_id is None:
+        query = select(history).where(history.changed_at >= since_micros)
+    else:
+        query = select(history).where(tuple_(history.changed_at, history.sale_id) > tuple_(since_micros, after_sale_id))
+    if until is not None:
+        query = query.where(history.changed_at < models.to_micros(until))
+    return db.scalars(query.order_by(history.changed_at, history.sale_id).limit(limit)).all()
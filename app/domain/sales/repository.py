@@ -1,21 +1,40 @@
-from sqlalchemy.orm import Session
-from . import models, schemas
+from sqlalchemy import func, select, text, update
+from sqlalchemy.orm import Session, joinedload
+from . import models, price_history, schemas
+from app.domain.inventory.models import FTS_TABLE
+from app.domain.inventory.search import fts_table, match_expression
+from app.pagination import paginate
 
-def get_sales(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Sale).offset(skip).limit(limit).all()
+def _sales_query(db: Session, expand_product: bool):
+    query = db.query(models.Sale)
+    if expand_product:
+        # Muchos a uno y product_id NOT NULL: el INNER JOIN no multiplica ni pierde filas,
+        # y la página sale en una sola sentencia
+        query = query.options(joinedload(models.Sale.product, innerjoin=True))
+    return query
+
+def get_sales(db: Session, skip: int = 0, limit: int = 10, after_id: int | None = None, expand_product: bool = False):
+    return paginate(_sales_query(db, expand_product), models.Sale.id, skip, limit, after_id)
 
 def create_sale(db: Session, sale: schemas.SaleCreate):
     db_sale = models.Sale(**sale.dict())
     db.add(db_sale)
+    db.flush()
+    price_history.record_price(db, db_sale.id, db_sale.price)
     db.commit()
     db.refresh(db_sale)
     return db_sale
 
-def get_sale(db: Session, sale_id: int):
-    return db.query(models.Sale).filter(models.Sale.id == sale_id).first()
+def get_sale(db: Session, sale_id: int, expand_product: bool = False):
+    return _sales_query(db, expand_product).filter(models.Sale.id == sale_id).first()
+
+def get_existing_sale_ids(db: Session, sale_ids: set[int]):
+    return set(db.scalars(select(models.Sale.id).where(models.Sale.id.in_(sale_ids))))
 
 def update_sale(db: Session, sale_id: int, sale_update: schemas.SaleCreate):
     db_sale = get_sale(db, sale_id)
+    if db_sale.price != sale_update.price:
+        price_history.record_price(db, sale_id, sale_update.price)
     db_sale.product_id = sale_update.product_id
     db_sale.price = sale_update.price
     db.commit()
@@ -27,3 +46,34 @@ def delete_sale(db: Session, sale_id: int):
     db.delete(db_sale)
     db.commit()
     return db_sale
+
+def _offers_of(product_ids: list[int] | None, product_name: str | None):
+    if product_ids is not None:
+        return models.Sale.product_id.in_(product_ids)
+    # El nombre se resuelve en el índice FTS, sin recorrer inventory
+    matching = select(fts_table.c.rowid).where(
+        text(f"{FTS_TABLE} MATCH :expression").bindparams(expression=f"product_name : ({match_expression(product_name)})")
+    )
+    return models.Sale.product_id.in_(matching)
+
+def update_prices(db: Session, product_ids: list[int] | None, product_name: str | None, percent: float | None, amount: float | None):
+    # Un solo UPDATE para todas las ofertas del filtro; sin commit, lo decide el servicio
+    if percent is not None:
+        price = func.round(models.Sale.price * (1 + percent / 100), 2)
+    else:
+        price = func.round(models.Sale.price + amount, 2)
+    offers = _offers_of(product_ids, product_name)
+    result = db.execute(
+        update(models.Sale)
+        .where(offers)
+        .values(price=price)
+        .execution_options(synchronize_session=False)
+    )
+    # El historial toma los precios nuevos en un INSERT ... SELECT, en la misma transacción
+    price_history.record_prices(db, offers)
+    return result.rowcount
+
+def count_non_positive_prices(db: Session, product_ids: list[int] | None, product_name: str | None):
+    return db.execute(
+        select(func.count()).where(_offers_of(product_ids, product_name), models.Sale.price <= 0)
+    ).scalar()
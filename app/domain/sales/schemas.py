@@ -1,4 +1,8 @@
-from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Annotated
+from pydantic import BaseModel, Field, model_validator
+from app.config import settings
+from app.domain.inventory.schemas import Inventory
 
 class SaleBase(BaseModel):
     product_id: int
@@ -11,4 +15,37 @@ class Sale(SaleBase):
     id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class SaleWithProduct(Sale):
+    # sales.product_id es NOT NULL: toda oferta tiene su producto
+    product: Inventory
+
+class SalePriceUpdate(BaseModel):
+    # Filtro: ids de producto o búsqueda por nombre (misma sintaxis que /inventory/search)
+    product_ids: Annotated[list[int], Field(min_length=1, max_length=settings.SALES_BULK_MAX_PRODUCT_IDS)] | None = None
+    product_name: Annotated[str, Field(min_length=1)] | None = None
+    # Cambio: porcentaje sobre el precio actual o monto fijo a sumar (negativo para rebajar)
+    percent: Annotated[float, Field(gt=-100)] | None = None
+    amount: float | None = None
+
+    @model_validator(mode="after")
+    def one_filter_and_one_change(self):
+        if (self.product_ids is None) == (self.product_name is None):
+            raise ValueError("Give exactly one of product_ids or product_name")
+        if (self.percent is None) == (self.amount is None):
+            raise ValueError("Give exactly one of percent or amount")
+        return self
+
+class SalePriceUpdateResult(BaseModel):
+    updated: int
+
+class SalePricePoint(BaseModel):
+    sale_id: int
+    # Guardado en microsegundos y centavos; la API habla en datetime UTC y precio
+    changed_at: datetime = Field(validation_alias="changed_at_time")
+    price: float
+
+    model_config = {
+        "from_attributes": True
+    }
@@ -1,6 +1,8 @@
+from datetime import datetime
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from . import models, schemas, repository
+from app.domain.inventory.search import match_expression
+from . import models, price_history, schemas, repository
 
 def create_sale(db: Session, sale: schemas.SaleCreate, current_user):
     if current_user.role != "Vendedor":
@@ -10,11 +12,11 @@ def create_sale(db: Session, sale: schemas.SaleCreate, current_user):
         )
     return repository.create_sale(db, sale)
 
-def get_sales(db: Session, skip: int = 0, limit: int = 10):
-    return repository.get_sales(db, skip, limit)
+def get_sales(db: Session, skip: int = 0, limit: int = 10, after_id: int | None = None, expand_product: bool = False):
+    return repository.get_sales(db, skip, limit, after_id, expand_product)
 
-def get_sale(db: Session, sale_id: int):
-    db_sale = repository.get_sale(db, sale_id)
+def get_sale(db: Session, sale_id: int, expand_product: bool = False):
+    db_sale = repository.get_sale(db, sale_id, expand_product)
     if not db_sale:
         raise HTTPException(status_code=404, detail="Sale not found")
     return db_sale
@@ -28,6 +30,8 @@ def update_sale(db: Session, sale_id: int, sale_update: schemas.SaleCreate, curr
             status_code=status.HTTP_403_FORBIDDEN, 
             detail="Not authorized to update sale items"
         )
+    if db_sale.price != sale_update.price:
+        price_history.record_price(db, sale_id, sale_update.price)
     db_sale.product_id = sale_update.product_id
     db_sale.price = sale_update.price
     db.commit()
@@ -46,3 +50,37 @@ def delete_sale(db: Session, sale_id: int, current_user):
     repository.delete_sale(db, sale_id)
     db.commit()
     return db_sale
+
+def update_prices(db: Session, price_update: schemas.SalePriceUpdate, current_user):
+    if current_user.role != "Vendedor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to update sale items"
+        )
+    if price_update.product_name is not None and not match_expression(price_update.product_name):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="product_name has no searchable words")
+    # Todo o nada: si alguna oferta queda sin precio válido se deshace el cambio entero
+    updated = repository.update_prices(
+        db, price_update.product_ids, price_update.product_name, price_update.percent, price_update.amount
+    )
+    invalid = repository.count_non_positive_prices(db, price_update.product_ids, price_update.product_name)
+    if invalid:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Price change would leave {invalid} sales at or below zero",
+        )
+    db.commit()
+    return schemas.SalePriceUpdateResult(updated=updated)
+
+def get_sale_prices(db: Session, sale_id: int, since: datetime | None = None, until: datetime | None = None, limit: int = 100):
+    prices = price_history.get_sale_prices(db, sale_id, since, until, limit)
+    # Una oferta borrada conserva su historial; solo es 404 si nunca tuvo precio
+    if not prices and not repository.get_sale(db, sale_id) and not price_history.get_sale_prices(db, sale_id, limit=1):
+        raise HTTPException(status_code=404, detail="Sale not found")
+    return prices
+
+def get_price_changes(
+    db: Session, since: datetime, until: datetime | None = None, after_sale_id: int | None = None, limit: int = 100
+):
+    return price_history.get_price_changes(db, since, until, after_sale_id, limit)
@@ -0,0 +1,17 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.sucursal import schemas, service
+
+async def create_sucursal(db: AsyncSession, sucursal: schemas.SucursalCreate, current_user):
+    return await db.run_sync(service.create_sucursal, sucursal, current_user)
+
+async def get_sucursal(db: AsyncSession, sucursal_id: int):
+    return await db.run_sync(service.get_sucursal, sucursal_id)
+
+async def get_sucursales(db: AsyncSession, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    return await db.run_sync(service.get_sucursales, skip, limit, after_id)
+
+async def update_sucursal(db: AsyncSession, sucursal_id: int, sucursal: schemas.SucursalCreate, current_user):
+    return await db.run_sync(service.update_sucursal, sucursal_id, sucursal, current_user)
+
+async def delete_sucursal(db: AsyncSession, sucursal_id: int, current_user):
+    return await db.run_sync(service.delete_sucursal, sucursal_id, current_user)
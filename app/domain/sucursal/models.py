@@ -4,7 +4,7 @@ from database import Base
 class Sucursal(Base):
     __tablename__ = "sucursales"
 
-    id = Column(Integer, primary_key=True, index=True)
-    nombre = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String)
     direccion = Column(String)
     telefono = Column(String)
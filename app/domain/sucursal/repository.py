@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from app.domain.sucursal import models, schemas
+from app.pagination import paginate
 
 def create_sucursal(db: Session, sucursal: schemas.SucursalCreate):
     db_sucursal = models.Sucursal(**sucursal.model_dump())
@@ -11,8 +12,8 @@ def create_sucursal(db: Session, sucursal: schemas.SucursalCreate):
 def get_sucursal(db: Session, sucursal_id: int):
     return db.query(models.Sucursal).filter(models.Sucursal.id == sucursal_id).first()
 
-def get_sucursales(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Sucursal).offset(skip).limit(limit).all()
+def get_sucursales(db: Session, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    return paginate(db.query(models.Sucursal), models.Sucursal.id, skip, limit, after_id)
 
 def update_sucursal(db: Session, db_sucursal: models.Sucursal, sucursal_update: schemas.SucursalCreate):
     for key, value in sucursal_update.model_dump().items():
@@ -19,8 +19,8 @@ def get_sucursal(db: Session, sucursal_id: int):
         raise HTTPException(status_code=404, detail="Sucursal not found")
     return db_sucursal
 
-def get_sucursales(db: Session, skip: int = 0, limit: int = 10):
-    return repository.get_sucursales(db, skip, limit)
+def get_sucursales(db: Session, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    return repository.get_sucursales(db, skip, limit, after_id)
 
 def update_sucursal(db: Session, sucursal_id: int, sucursal: schemas.SucursalCreate, current_user: User):
     if current_user.role != "Administrador":
@@ -0,0 +1,62 @@
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from . import models, repository, schemas, service
+from .token_cache import token_cache
+from .password_pool import password_pool
+
+async def verify_password(plain_password, hashed_password):
+    return await password_pool.run_async(service.pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash(password):
+    return await password_pool.run_async(service.pwd_context.hash, password)
+
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    user = await db.run_sync(repository.get_user_by_email, email)
+    if not user:
+        print(f"User not found: {email}")
+        return False
+    if not await verify_password(password, user.hashed_password):
+        print(f"Invalid password for user: {email}")
+        return False
+    return user
+
+async def verify_access_token(db: AsyncSession, token: str):
+    # Con la versión en caché no se toca la BD; si venció, una sola lectura por clave primaria única
+    verified = service.decode_access_token(token)
+    correo = verified.claims["sub"]
+    cached = token_cache.cached_version(correo)
+    if cached is None:
+        cached = await db.run_sync(service.load_token_version, correo)
+    service.check_token_version(verified.claims, *cached)
+    return verified
+
+async def get_current_user(db: AsyncSession = Depends(get_async_db), token: str = Depends(service.oauth2_scheme)):
+    verified = await verify_access_token(db, token)
+    if verified.user is not None:
+        return verified.user
+    return await db.run_sync(service.get_current_user, token)
+
+async def get_token_user(db: AsyncSession = Depends(get_async_db), token: str = Depends(service.oauth2_scheme)):
+    current_user = service.claims_user((await verify_access_token(db, token)).claims)
+    if current_user is None:
+        return await get_current_user(db, token)
+    return current_user
+
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.run_sync(repository.get_user, user_id)
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.run_sync(repository.get_user_by_email, email)
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    return await db.run_sync(repository.get_users, skip, limit, after_id)
+
+async def create_user(db: AsyncSession, user: models.User):
+    return await db.run_sync(repository.create_user, user)
+
+async def update_user(db: AsyncSession, db_user: models.User, user_update: schemas.UserUpdate):
+    return await db.run_sync(repository.update_user, db_user, user_update)
+
+async def delete_user(db: AsyncSession, db_user: models.User):
+    return await db.run_sync(repository.delete_user, db_user)
@@ -11,12 +11,16 @@ class RoleEnum(enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    # Sin reutilizar ids: un token emitido a un usuario borrado no debe valer para quien ocupe su id
+    __table_args__ = {"sqlite_autoincrement": True}
 
-    id = Column(Integer, primary_key=True, index=True)
-    nombre = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String)
     correo = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     role = Column(String)
+    # Va en el claim "ver" del token; subirla revoca todos los tokens emitidos antes
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     dispatches = relationship("Dispatch", back_populates="user")
     cart_items = relationship("CartItem", back_populates="user")
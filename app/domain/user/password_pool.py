@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from app.config import settings
+
+class PasswordPool:
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        # Cupos = hilos de bcrypt + peticiones que pueden esperar en cola
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def run(self, fn, *args):
+        task = self._admit(fn, args)
+        try:
+            return self._executor.submit(task).result()
+        finally:
+            self._slots.release()
+
+    async def run_async(self, fn, *args):
+        # Igual que run, pero la petición espera sin ocupar un hilo del servidor
+        task = self._admit(fn, args)
+        try:
+            return await asyncio.wrap_future(self._executor.submit(task))
+        finally:
+            self._slots.release()
+
+    def _admit(self, fn, args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Password service is busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+        submitted_at = time.perf_counter()
+
+        def task():
+            started_at = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._record(started_at - submitted_at, time.perf_counter() - started_at)
+
+        return task
+
+    def _record(self, queue_wait: float, hash_time: float):
+        with self._lock:
+            self._completed += 1
+            self._queue_wait_total += queue_wait
+            self._queue_wait_max = max(self._queue_wait_max, queue_wait)
+            self._hash_time_total += hash_time
+            self._hash_time_max = max(self._hash_time_max, hash_time)
+
+    def reset_metrics(self):
+        with self._lock:
+            self._completed = 0
+            self._rejected = 0
+            self._queue_wait_total = 0.0
+            self._queue_wait_max = 0.0
+            self._hash_time_total = 0.0
+            self._hash_time_max = 0.0
+
+    def metrics(self):
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "queue_wait_ms_avg": self._queue_wait_total / completed * 1000,
+                "queue_wait_ms_max": self._queue_wait_max * 1000,
+                "hash_ms_avg": self._hash_time_total / completed * 1000,
+                "hash_ms_max": self._hash_time_max * 1000,
+            }
+
+password_pool = PasswordPool(settings.PASSWORD_POOL_WORKERS, settings.PASSWORD_POOL_QUEUE_DEPTH)
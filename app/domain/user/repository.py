@@ -1,5 +1,39 @@
+from sqlalchemy import MetaData, inspect, select, text
+from sqlalchemy.schema import CreateTable
 from sqlalchemy.orm import Session
 from . import models, schemas
+from app.pagination import paginate
+
+def ensure_schema(engine):
+    # Bases anteriores a la revocación persistida: los tokens vigentes llevan ver 0
+    if not inspect(engine).has_table(models.User.__tablename__):
+        return
+    columns = {column["name"] for column in inspect(engine).get_columns(models.User.__tablename__)}
+    if "token_version" not in columns:
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
+    if engine.dialect.name == "sqlite":
+        _ensure_autoincrement(engine)
+
+def _ensure_autoincrement(engine):
+    # Bases anteriores a AUTOINCREMENT: SQLite reutiliza el id más alto tras un borrado, así que
+    # la tabla se reconstruye igual que en el modelo (SQLite no admite cambiarlo con ALTER)
+    with engine.begin() as connection:
+        create_sql = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'users'")
+        ).scalar_one()
+        if "AUTOINCREMENT" in create_sql.upper():
+            return
+        # Copia sin índices (sus nombres siguen ocupados por la tabla vieja); el RENAME va al final
+        # para no reescribir las claves foráneas de las demás tablas, que siguen apuntando a users
+        table = models.User.__table__
+        column_names = ", ".join(column.name for column in table.columns)
+        connection.execute(CreateTable(table.to_metadata(MetaData(), name="users_rebuilt")))
+        connection.execute(text(f"INSERT INTO users_rebuilt ({column_names}) SELECT {column_names} FROM users"))
+        connection.execute(text("DROP TABLE users"))
+        connection.execute(text("ALTER TABLE users_rebuilt RENAME TO users"))
+        for index in table.indexes:
+            index.create(connection)
 
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
@@ -7,8 +41,15 @@ def get_user(db: Session, user_id: int):
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.correo == email).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.User).offset(skip).limit(limit).all()
+def get_token_version(db: Session, correo: str):
+    # (id, token_version) del dueño actual del correo; None si no existe. El id distingue
+    # a un usuario borrado de otro que se registró después con el mismo correo
+    return db.execute(
+        select(models.User.id, models.User.token_version).where(models.User.correo == correo)
+    ).one_or_none()
+
+def get_users(db: Session, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    return paginate(db.query(models.User), models.User.id, skip, limit, after_id)
 
 def create_user(db: Session, user: models.User):
     db.add(user)
@@ -20,6 +61,8 @@ def update_user(db: Session, db_user: models.User, user_update: schemas.UserUpda
     db_user.nombre = user_update.nombre
     db_user.correo = user_update.correo
     db_user.role = user_update.role
+    # Cambian los claims: los tokens anteriores quedan revocados en todos los procesos
+    db_user.token_version = models.User.token_version + 1
     db.commit()
     db.refresh(db_user)
     return db_user
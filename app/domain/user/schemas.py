@@ -30,3 +30,8 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: str | None = None
+
+class TokenUser(BaseModel):
+    id: int
+    correo: str
+    role: str
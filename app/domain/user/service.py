@@ -5,7 +5,9 @@ from jose import jwt, JWTError
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from . import models, schemas
+from . import models, repository, schemas
+from .token_cache import token_cache
+from .password_pool import password_pool
 from database import get_db
 
 SECRET_KEY = "your_secret_key"
@@ -17,10 +19,10 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_pool.run(pwd_context.verify, plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return password_pool.run(pwd_context.hash, password)
     
 
 def authenticate_user(db: Session, email: str, password: str):
@@ -43,24 +45,70 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=401,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decode_access_token(token: str):
+    # Firma y exp; la revocación se comprueba aparte, en cada petición
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(username=username)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return token_cache.put(token, payload)
+
+def load_token_version(db: Session, correo: str):
+    row = repository.get_token_version(db, correo)
+    if row is None:
+        token_cache.store_version(correo, None, None)
+        return None, -1
+    token_cache.store_version(correo, row.id, row.token_version)
+    return row.id, row.token_version
+
+def check_token_version(claims: dict, user_id: int | None, version: int):
+    # Usuario borrado, correo que ahora es de otro usuario o claims de antes del último cambio:
+    # el token ya no vale
+    if user_id is None or claims.get("uid", user_id) != user_id or claims.get("ver", 0) != version:
+        raise _credentials_exception()
+
+def verify_access_token(db: Session, token: str):
+    verified = decode_access_token(token)
+    correo = verified.claims["sub"]
+    cached = token_cache.cached_version(correo)
+    if cached is None:
+        cached = load_token_version(db, correo)
+    check_token_version(verified.claims, *cached)
+    return verified
+
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    verified = verify_access_token(db, token)
+    if verified.user is not None:
+        return verified.user
+    token_data = schemas.TokenData(username=verified.claims["sub"])
     user = db.query(models.User).filter(models.User.correo == token_data.username).first()
     if user is None:
-        raise credentials_exception
-    return user
+        raise _credentials_exception()
+    return token_cache.put(token, verified.claims, user).user
+
+def claims_user(claims: dict):
+    if claims.get("uid") is None or claims.get("role") is None:
+        return None
+    return schemas.TokenUser(id=claims["uid"], correo=claims["sub"], role=claims["role"])
+
+def get_token_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    # Autoriza con los claims firmados más la versión cacheada; los tokens sin uid/role consultan la BD
+    current_user = claims_user(verify_access_token(db, token).claims)
+    if current_user is None:
+        return get_current_user(db, token)
+    return current_user
 
 
 def decode_token(token: str):
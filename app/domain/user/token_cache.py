@@ -0,0 +1,107 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from app.config import settings
+from . import models
+
+class CachedToken(NamedTuple):
+    expires_at: float
+    claims: dict
+    user: models.User | None
+
+def snapshot_user(user: models.User):
+    # Copia desacoplada de la sesión: se comparte entre peticiones sin tocar la BD
+    return models.User(id=user.id, nombre=user.nombre, correo=user.correo, role=user.role)
+
+class TokenCache:
+    def __init__(self, max_size: int, ttl_seconds: int, version_ttl_seconds: float = 5):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.version_ttl_seconds = version_ttl_seconds
+        self._entries: OrderedDict[str, CachedToken] = OrderedDict()
+        self._keys_by_user: dict[str, set[str]] = {}
+        # Copia de (users.id, users.token_version) por correo: (vence, id, versión); id None = usuario borrado
+        self._versions: dict[str, tuple[float, int | None, int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token: str):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str):
+        key = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, token: str, claims: dict, user: models.User | None = None):
+        expires_at = time.time() + self.ttl_seconds
+        if claims.get("exp") is not None:
+            expires_at = min(expires_at, claims["exp"])
+        entry = CachedToken(expires_at, claims, snapshot_user(user) if user is not None else None)
+        key = self._digest(token)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._keys_by_user.setdefault(claims["sub"], set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def invalidate_user(self, correo: str):
+        with self._lock:
+            for key in list(self._keys_by_user.get(correo, ())):
+                self._remove(key)
+
+    def cached_version(self, correo: str):
+        # None si hay que leerla de la BD. Otro proceso que revoca se ve como mucho
+        # version_ttl_seconds después; el proceso que revoca la ve al instante
+        with self._lock:
+            cached = self._versions.get(correo)
+            if cached is None or cached[0] <= time.time():
+                return None
+            return cached[1:]
+
+    def store_version(self, correo: str, user_id: int | None, version: int | None):
+        with self._lock:
+            self._versions[correo] = (time.time() + self.version_ttl_seconds, user_id, -1 if version is None else version)
+            while len(self._versions) > self.max_size:
+                self._versions.pop(next(iter(self._versions)))
+
+    def revoke_user(self, correo: str):
+        # Después de subir token_version en la BD: la próxima petición relee la versión
+        with self._lock:
+            self._versions.pop(correo, None)
+        self.invalidate_user(correo)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._versions.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        correo = entry.claims["sub"]
+        keys = self._keys_by_user.get(correo)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[correo]
+
+token_cache = TokenCache(
+    settings.TOKEN_CACHE_MAX_SIZE, settings.TOKEN_CACHE_TTL_SECONDS, settings.TOKEN_VERSION_TTL_SECONDS
+)
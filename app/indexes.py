@@ -0,0 +1,36 @@
+from sqlalchemy import inspect, text
+
+# create_all no toca tablas existentes: las bases anteriores a la revisión de índices
+# reciben aquí los que usan las consultas y pierden los que solo encarecían las escrituras
+CREATED_INDEXES = {
+    "ix_payments_user_id": "payments (user_id)",
+    "ix_sales_product_id": "sales (product_id)",
+    "ix_dispatches_user_id": "dispatches (user_id)",
+    "ix_cart_items_sale_id": "cart_items (sale_id)",
+}
+
+DROPPED_INDEXES = [
+    "ix_dispatches_id",
+    "ix_dispatches_address",
+    "ix_dispatches_username",
+    "ix_dispatches_email",
+    "ix_dispatches_phone",
+    "ix_users_id",
+    "ix_users_nombre",
+    "ix_sucursales_id",
+    "ix_sucursales_nombre",
+    "ix_inventory_id",
+    "ix_inventory_product_name",
+    "ix_cart_items_id",
+    "ix_payments_id",
+    "ix_sales_id",
+]
+
+def ensure_indexes(engine):
+    tables = set(inspect(engine).get_table_names())
+    with engine.begin() as connection:
+        for name, target in CREATED_INDEXES.items():
+            if target.split(" ", 1)[0] in tables:
+                connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {target}"))
+        for name in DROPPED_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
@@ -0,0 +1,36 @@
+import base64
+import binascii
+import json
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(last_id: int):
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(payload)["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        last_id = None
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return last_id
+
+def after_cursor(after: str | None = None):
+    # Dependencia: ?after=<cursor> -> último id visto
+    return decode_cursor(after) if after else None
+
+def paginate(query, key, skip: int = 0, limit: int | None = 10, after_id: int | None = None):
+    # Keyset sobre una clave indexada; skip se mantiene por compatibilidad
+    if after_id is not None:
+        query = query.filter(key > after_id)
+    return query.order_by(key).offset(skip).limit(limit).all()
+
+def set_next_cursor(response: Response, items, limit: int | None, key: str = "id"):
+    # Página completa: puede haber más filas detrás de la última clave
+    if items and limit is not None and len(items) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(items[-1], key))
+    return items
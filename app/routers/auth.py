@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from app.domain.user import repository, service, schemas
-from database import get_db
+from app.domain.user import async_service, service, schemas
+from app.domain.user.token_cache import token_cache
+from database import get_async_db
 
 router = APIRouter()
 
@@ -12,9 +13,9 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
 @router.post("/token", response_model=schemas.Token)
-def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
+async def login_for_access_token(db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()):
     print(f"Attempting to authenticate user: {form_data.username}")
-    user = service.authenticate_user(db, form_data.username, form_data.password)
+    user = await async_service.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         print(f"Authentication failed for user: {form_data.username}")
         raise HTTPException(
@@ -22,14 +23,16 @@ def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2Passw
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # La versión recién leída sirve para las primeras peticiones con este token
+    token_cache.store_version(user.correo, user.id, user.token_version)
     access_token_expires = timedelta(minutes=service.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = service.create_access_token(
-        data={"sub": user.correo, "role": user.role},
+        data={"sub": user.correo, "role": user.role, "uid": user.id, "ver": user.token_version},
         expires_delta=access_token_expires
     )
     print(f"User authenticated: {form_data.username}")
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/users/me", response_model=schemas.User)
-def read_users_me(current_user: schemas.User = Depends(service.get_current_user)):
+async def read_users_me(current_user: schemas.User = Depends(async_service.get_current_user)):
     return current_user
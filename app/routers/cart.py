@@ -1,45 +1,68 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.domain.cart import schemas, service
-from app.domain.user.service import get_current_user
-from database import get_db
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.cart import schemas, async_service
+from app.dependencies import require_role
+from app.pagination import after_cursor, set_next_cursor
+from database import get_async_db
 
 router = APIRouter()
 
 @router.post("/", response_model=schemas.CartItem)
-def add_to_cart(
+async def add_to_cart(
     cart_item: schemas.CartItemCreate, 
-    db: Session = Depends(get_db), 
-    current_user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(require_role("Cliente", detail="Not authorized to add items to the cart"))
 ):
-    if current_user.role != "Cliente":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
-            detail="Not authorized to add items to the cart"
-        )
-    return service.create_cart_item(db, cart_item, current_user.id)
+    return await async_service.create_cart_item(db, cart_item, current_user.id)
+
+@router.post("/batch", response_model=list[schemas.CartItem])
+async def add_many_to_cart(
+    batch: schemas.CartBatchCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(require_role("Cliente", detail="Not authorized to add items to the cart"))
+):
+    return await async_service.create_cart_items(db, batch, current_user.id)
+
+@router.patch("/batch", response_model=list[schemas.CartItem])
+async def update_many_in_cart(
+    batch: schemas.CartBatchUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(require_role("Cliente", detail="Not authorized to update cart items"))
+):
+    return await async_service.update_cart_items(db, batch, current_user.id)
+
+@router.delete("/", response_model=schemas.CartCleared)
+async def clear_cart(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(require_role("Cliente", detail="Not authorized to remove items from the cart"))
+):
+    return await async_service.clear_cart(db, current_user.id)
 
 @router.get("/", response_model=list[schemas.CartItem])
-def get_cart_items(
-    db: Session = Depends(get_db), 
-    current_user = Depends(get_current_user)
+async def get_cart_items(
+    response: Response,
+    skip: int = 0,
+    limit: int | None = None,
+    after_id: int | None = Depends(after_cursor),
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(require_role("Cliente", detail="Not authorized to view cart items"))
+):
+    cart_items = await async_service.get_cart_items(db, current_user.id, skip, limit, after_id)
+    return set_next_cursor(response, cart_items, limit)
+
+@router.put("/{item_id}", response_model=schemas.CartItem)
+async def update_cart_item(
+    item_id: int,
+    cart_item: schemas.CartItemCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(require_role("Cliente", detail="Not authorized to update cart items"))
 ):
-    if current_user.role != "Cliente":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
-            detail="Not authorized to view cart items"
-        )
-    return service.get_cart_items(db, current_user.id)
+    return await async_service.update_cart_item(db, item_id, cart_item, current_user.id)
 
 @router.delete("/{item_id}", response_model=schemas.CartItem)
-def remove_from_cart(
+async def remove_from_cart(
     item_id: int, 
-    db: Session = Depends(get_db), 
-    current_user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(require_role("Cliente", detail="Not authorized to remove items from the cart"))
 ):
-    if current_user.role != "Cliente":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
-            detail="Not authorized to remove items from the cart"
-        )
-    return service.delete_cart_item(db, item_id, current_user.id)
+    return await async_service.delete_cart_item(db, item_id, current_user.id)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.catalog import async_service, schemas
+from app.pagination import after_cursor, set_next_cursor
+from database import get_async_db
+
+router = APIRouter()
+
+@router.get("/", response_model=list[schemas.CatalogEntry])
+async def read_catalog(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    after_id: int | None = Depends(after_cursor),
+    in_stock: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    entries = await async_service.get_entries(db, skip, limit, after_id, in_stock)
+    return set_next_cursor(response, entries, limit, key="product_id")
+
+@router.get("/{product_id}", response_model=schemas.CatalogEntry)
+async def read_catalog_entry(product_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await async_service.get_entry(db, product_id)
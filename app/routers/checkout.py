@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Header
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.checkout import async_service, schemas
+from app.domain.idempotency import async_service as idempotency_service
+from app.domain.idempotency.service import fingerprint as request_fingerprint
+from app.dependencies import require_role
+from database import get_async_db
+
+router = APIRouter()
+
+@router.post("/", response_model=schemas.Checkout)
+async def checkout(
+    checkout: schemas.CheckoutCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(require_role("Cliente", detail="Not authorized to checkout")),
+    idempotency_key: str | None = Header(None, min_length=1, max_length=255),
+):
+    if idempotency_key is None:
+        return await async_service.checkout(db, checkout, current_user)
+    fingerprint = request_fingerprint("POST /checkout", checkout.model_dump(mode="json"))
+    claim, stored = await idempotency_service.begin(db, current_user.id, idempotency_key, fingerprint)
+    if stored is not None:
+        return idempotency_service.replay_response(stored)
+    async with idempotency_service.in_flight(db, claim):
+        return await async_service.checkout(db, checkout, current_user, claim)
@@ -1,45 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.domain.dispatch import schemas, service
-from app.domain.user.service import get_current_user
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.dispatch import schemas, async_service
+from app.domain.user.async_service import get_token_user
+from app.dependencies import require_role
+from app.pagination import after_cursor, set_next_cursor
+from database import get_async_db
 
 router = APIRouter()
 
 @router.post("/", response_model=schemas.Dispatch)
-def create_dispatch(
+async def create_dispatch(
     dispatch: schemas.DispatchCreate, 
-    db: Session = Depends(get_db), 
-    current_user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(require_role("Cliente", detail="Not authorized to create dispatch"))
 ):
-    if current_user.role != "Cliente":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
-            detail="Not authorized to create dispatch"
-        )
-    return service.create_dispatch(db, dispatch, current_user.id)
+    return await async_service.create_dispatch(db, dispatch, current_user.id)
 
 @router.get("/{dispatch_id}", response_model=schemas.Dispatch)
-def get_dispatch(dispatch_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    dispatch = service.get_dispatch(db, dispatch_id)
+async def get_dispatch(dispatch_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_token_user)):
+    dispatch = await async_service.get_dispatch(db, dispatch_id)
     if not dispatch or dispatch.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dispatch not found")
     return dispatch
 
 @router.put("/{dispatch_id}", response_model=schemas.Dispatch)
-def update_dispatch(dispatch_id: int, dispatch: schemas.DispatchCreate, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    existing_dispatch = service.get_dispatch(db, dispatch_id)
+async def update_dispatch(dispatch_id: int, dispatch: schemas.DispatchCreate, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_token_user)):
+    existing_dispatch = await async_service.get_dispatch(db, dispatch_id)
     if not existing_dispatch or existing_dispatch.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dispatch not found")
-    return service.update_dispatch(db, dispatch_id, dispatch)
+    return await async_service.update_dispatch(db, dispatch_id, dispatch)
 
 @router.delete("/{dispatch_id}", response_model=schemas.Dispatch)
-def delete_dispatch(dispatch_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    existing_dispatch = service.get_dispatch(db, dispatch_id)
+async def delete_dispatch(dispatch_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_token_user)):
+    existing_dispatch = await async_service.get_dispatch(db, dispatch_id)
     if not existing_dispatch or existing_dispatch.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dispatch not found")
-    return service.delete_dispatch(db, dispatch_id)
+    return await async_service.delete_dispatch(db, dispatch_id)
 
 @router.get("/", response_model=list[schemas.Dispatch])
-def list_dispatches(skip: int = 0, limit: int = 10, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    return service.list_dispatches(db, current_user.id, skip=skip, limit=limit)
+async def list_dispatches(
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    after_id: int | None = Depends(after_cursor),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_token_user)
+):
+    dispatches = await async_service.list_dispatches(db, current_user.id, skip=skip, limit=limit, after_id=after_id)
+    return set_next_cursor(response, dispatches, limit)
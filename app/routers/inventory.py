@@ -1,57 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.domain.inventory import models, schemas, service
-from app.domain.user.service import get_current_user
-from database import get_db
-from app.domain.user.models import User  # Asegúrate de importar la clase User
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.inventory import schemas, async_service
+from app.domain.inventory.catalog_cache import catalog_cache, render_item, render_items, respond
+from app.domain.reservation import schemas as reservation_schemas, async_service as reservation_async_service
+from app.dependencies import require_role
+from app.pagination import NEXT_CURSOR_HEADER, after_cursor, set_next_cursor
+from database import get_async_db
 
 router = APIRouter()
 
 @router.post("/", response_model=schemas.Inventory)
-def create_inventory_item(
+async def create_inventory_item(
     item: schemas.InventoryCreate, 
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(require_role("Bodega", detail="Not authorized to add inventory items"))
 ):
-    if current_user.role != "Bodega":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
-            detail="Not authorized to add inventory items"
-        )
-    return service.create_inventory_item(db, item, current_user)
+    return await async_service.create_inventory_item(db, item, current_user)
+
+@router.get("/search", response_model=list[schemas.Inventory])
+async def search_inventory_items(
+    q: str = Query(..., min_length=1),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await async_service.search_inventory_items(db, q, skip, limit)
 
 @router.get("/{item_id}", response_model=schemas.Inventory)
-def read_inventory_item(item_id: int, db: Session = Depends(get_db)):
-    return service.get_inventory_item(db, item_id)
+async def read_inventory_item(item_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    key = ("item", item_id)
+    page = catalog_cache.get(key)
+    if page is None:
+        # La versión se toma antes de leer: si una escritura llega en medio, la página no se guarda
+        version = catalog_cache.version
+        page = render_item(await async_service.get_inventory_item(db, item_id))
+        catalog_cache.put(key, page, version)
+    return respond(request, page)
+
+@router.post("/{item_id}/receipts", response_model=schemas.Inventory)
+async def receive_stock(
+    item_id: int,
+    receipt: schemas.StockReceipt,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(require_role("Bodega", detail="Not authorized to receive inventory items"))
+):
+    return await async_service.receive_stock(db, item_id, receipt.quantity, current_user)
+
+@router.get("/{item_id}/stock", response_model=schemas.StockLevel)
+async def read_stock_at(item_id: int, at: datetime, db: AsyncSession = Depends(get_async_db)):
+    return await async_service.get_stock_at(db, item_id, at)
+
+@router.get("/{item_id}/availability", response_model=reservation_schemas.Availability)
+async def read_inventory_availability(item_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await reservation_async_service.get_availability(db, item_id)
 
 @router.get("/", response_model=list[schemas.Inventory])
-def read_inventory_items(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return service.get_inventory_items(db, skip, limit)
+async def read_inventory_items(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    after_id: int | None = Depends(after_cursor),
+    db: AsyncSession = Depends(get_async_db),
+):
+    key = ("list", skip, limit, after_id)
+    page = catalog_cache.get(key)
+    if page is None:
+        version = catalog_cache.version
+        items = set_next_cursor(response, await async_service.get_inventory_items(db, skip, limit, after_id), limit)
+        headers = {NEXT_CURSOR_HEADER: response.headers[NEXT_CURSOR_HEADER]} if NEXT_CURSOR_HEADER in response.headers else None
+        page = render_items(items, headers)
+        catalog_cache.put(key, page, version)
+    return respond(request, page)
 
 @router.put("/{item_id}", response_model=schemas.Inventory)
-def update_inventory_item(
+async def update_inventory_item(
     item_id: int, 
     item_update: schemas.InventoryCreate, 
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(require_role("Bodega", detail="Not authorized to update inventory items"))
 ):
-    if current_user.role != "Bodega":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
-            detail="Not authorized to update inventory items"
-        )
-    return service.update_inventory_item(db, item_id, item_update, current_user)
+    return await async_service.update_inventory_item(db, item_id, item_update, current_user)
 
 @router.delete("/{item_id}/{quantity}", response_model=schemas.Inventory)
-def delete_inventory_item(
+async def delete_inventory_item(
     item_id: int, 
     quantity: int, 
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(require_role("Bodega", detail="Not authorized to delete inventory items"))
 ):
-    if current_user.role != "Bodega":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
-            detail="Not authorized to delete inventory items"
-        )
-    return service.delete_inventory_item(db, item_id, quantity, current_user)
+    return await async_service.delete_inventory_item(db, item_id, quantity, current_user)
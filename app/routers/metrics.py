@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies import get_admin_user
+from app.domain.cart.async_service import janitor_stats
+from app.domain.inventory.catalog_cache import catalog_cache
+from app.domain.payment import async_service as payment_service
+from app.domain.payment.worker import payment_worker
+from app.domain.user.password_pool import password_pool
+from app.sql_metrics import endpoint_stats
+from database import get_async_db
+
+router = APIRouter()
+
+@router.get("/password-hashing", response_model=dict)
+async def password_hashing_metrics(current_user = Depends(get_admin_user)):
+    return password_pool.metrics()
+
+@router.get("/sql", response_model=dict)
+async def sql_metrics(current_user = Depends(get_admin_user)):
+    return endpoint_stats.metrics()
+
+@router.get("/payments", response_model=dict)
+async def payment_metrics(db: AsyncSession = Depends(get_async_db), current_user = Depends(get_admin_user)):
+    return {**payment_worker.metrics(), "backlog": await payment_service.get_backlog(db)}
+
+@router.get("/cart-janitor", response_model=dict)
+async def cart_janitor_metrics(current_user = Depends(get_admin_user)):
+    return dict(janitor_stats)
+
+@router.get("/catalog-cache", response_model=dict)
+async def catalog_cache_metrics(current_user = Depends(get_admin_user)):
+    return catalog_cache.metrics()
@@ -1,27 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.domain.payment import service as payment_service, schemas as payment_schemas
-from app.domain.user.service import get_current_user
-from database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.idempotency import async_service as idempotency_service
+from app.domain.idempotency.service import fingerprint as request_fingerprint
+from app.domain.payment import async_service as payment_service, schemas as payment_schemas
+from app.domain.user.async_service import get_token_user
+from app.dependencies import require_role
+from database import get_async_db
 
 router = APIRouter()
 
 @router.post("/", response_model=payment_schemas.PaymentResponse)
-def create_payment(
+async def create_payment(
     payment: payment_schemas.PaymentCreate, 
-    db: Session = Depends(get_db), 
-    current_user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(require_role("Cliente", detail="Not authorized to make a payment")),
+    idempotency_key: str | None = Header(None, min_length=1, max_length=255),
 ):
-    if current_user.role != "Cliente":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
-            detail="Not authorized to make a payment"
-        )
-    return payment_service.create_payment(db, payment, current_user)
+    if idempotency_key is None:
+        return await payment_service.create_payment(db, payment, current_user)
+    # Un reintento con la misma clave se responde desde el almacén, sin tocar payments
+    fingerprint = request_fingerprint("POST /payments", payment.model_dump(mode="json"))
+    claim, stored = await idempotency_service.begin(db, current_user.id, idempotency_key, fingerprint)
+    if stored is not None:
+        return idempotency_service.replay_response(stored)
+    async with idempotency_service.in_flight(db, claim):
+        return await payment_service.create_payment(db, payment, current_user, claim)
 
 @router.get("/{payment_id}", response_model=payment_schemas.PaymentResponse)
-def get_payment(payment_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    payment = payment_service.get_payment(db, payment_id)
+async def get_payment(payment_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_token_user)):
+    payment = await payment_service.get_payment(db, payment_id)
     if not payment or payment.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
@@ -1,36 +1,89 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.domain.sales import schemas, service, models
-from app.domain.user.service import get_current_user
-from database import get_db
+from datetime import datetime
+from typing import Literal
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.sales import schemas, async_service
+from app.domain.user.async_service import get_token_user
+from app.pagination import after_cursor, set_next_cursor
+from database import get_async_db
 
 router = APIRouter()
 
 @router.post("/", response_model=schemas.Sale)
-def create_sale(
+async def create_sale(
     sale: schemas.SaleCreate, 
-    db: Session = Depends(get_db), 
-    current_user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(get_token_user)
 ):
-    return service.create_sale(db, sale, current_user)
+    return await async_service.create_sale(db, sale, current_user)
 
-@router.get("/", response_model=list[schemas.Sale])
-def read_sales(skip: int = 0, limit: int = 10, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    return service.get_sales(db, skip, limit)
+@router.patch("/prices", response_model=schemas.SalePriceUpdateResult)
+async def update_prices(
+    price_update: schemas.SalePriceUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_token_user)
+):
+    return await async_service.update_prices(db, price_update, current_user)
+
+def _render(sale, expand):
+    # Sin expand no se toca sale.product: cargarlo fuera de run_sync dispararía un lazy load
+    if expand == "product":
+        return schemas.SaleWithProduct.model_validate(sale)
+    return schemas.Sale.model_validate(sale)
 
-@router.get("/{sale_id}", response_model=schemas.Sale)
-def read_sale(sale_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    return service.get_sale(db, sale_id)
+@router.get("/", response_model=list[schemas.SaleWithProduct | schemas.Sale])
+async def read_sales(
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    after_id: int | None = Depends(after_cursor),
+    expand: Literal["product"] | None = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_token_user)
+):
+    sales = await async_service.get_sales(db, skip, limit, after_id, expand == "product")
+    return [_render(sale, expand) for sale in set_next_cursor(response, sales, limit)]
+
+@router.get("/price-changes", response_model=list[schemas.SalePricePoint])
+async def read_price_changes(
+    since: datetime,
+    until: datetime | None = None,
+    after_sale_id: int | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_token_user)
+):
+    return await async_service.get_price_changes(db, since, until, after_sale_id, limit)
+
+@router.get("/{sale_id}/prices", response_model=list[schemas.SalePricePoint])
+async def read_sale_prices(
+    sale_id: int,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_token_user)
+):
+    return await async_service.get_sale_prices(db, sale_id, since, until, limit)
+
+@router.get("/{sale_id}", response_model=schemas.SaleWithProduct | schemas.Sale)
+async def read_sale(
+    sale_id: int,
+    expand: Literal["product"] | None = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_token_user)
+):
+    return _render(await async_service.get_sale(db, sale_id, expand == "product"), expand)
 
 @router.put("/{sale_id}", response_model=schemas.Sale)
-def update_sale(
+async def update_sale(
     sale_id: int, 
     sale: schemas.SaleCreate, 
-    db: Session = Depends(get_db), 
-    current_user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(get_token_user)
 ):
-    return service.update_sale(db, sale_id, sale, current_user)
+    return await async_service.update_sale(db, sale_id, sale, current_user)
 
 @router.delete("/{sale_id}", response_model=schemas.Sale)
-def delete_sale(sale_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    return service.delete_sale(db, sale_id, current_user)
+async def delete_sale(sale_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_token_user)):
+    return await async_service.delete_sale(db, sale_id, current_user)
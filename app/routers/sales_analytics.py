@@ -0,0 +1,41 @@
+from datetime import date
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies import require_role
+from app.domain.analytics import async_service, schemas
+from database import get_async_db
+
+router = APIRouter()
+
+get_analytics_user = require_role("Vendedor", "Administrador", detail="Not authorized to view sales analytics")
+
+@router.get("/top-products", response_model=list[schemas.ProductSales])
+async def read_top_products(
+    limit: int = Query(10, ge=1, le=100),
+    by: schemas.Metric = "revenue",
+    since: date | None = None,
+    until: date | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_analytics_user)
+):
+    return await async_service.get_top_products(db, limit, by, since, until)
+
+@router.get("/revenue", response_model=list[schemas.PeriodSales])
+async def read_revenue(
+    period: schemas.Period = "day",
+    since: date | None = None,
+    until: date | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_analytics_user)
+):
+    return await async_service.get_revenue(db, period, since, until)
+
+@router.get("/products/{product_id}", response_model=schemas.ProductSales)
+async def read_product_sales(
+    product_id: int,
+    since: date | None = None,
+    until: date | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_analytics_user)
+):
+    return await async_service.get_product_sales(db, product_id, since, until)
@@ -1,52 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.domain.sucursal import schemas, models, service
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.sucursal import schemas, async_service
+from database import get_async_db
 from app.dependencies import get_admin_user
-from app.domain.user.models import User  # Corregir esta línea
+from app.pagination import after_cursor, set_next_cursor
 
 router = APIRouter()
 
 @router.post("/", response_model=schemas.Sucursal)
-def create_sucursal(
+async def create_sucursal(
     sucursal: schemas.SucursalCreate, 
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(get_admin_user)
 ):
-    return service.create_sucursal(db, sucursal, current_user)
+    return await async_service.create_sucursal(db, sucursal, current_user)
 
 @router.get("/{sucursal_id}", response_model=schemas.Sucursal)
-def read_sucursal(
+async def read_sucursal(
     sucursal_id: int, 
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(get_admin_user)
 ):
-    db_sucursal = service.get_sucursal(db, sucursal_id)
+    db_sucursal = await async_service.get_sucursal(db, sucursal_id)
     if db_sucursal is None:
         raise HTTPException(status_code=404, detail="Sucursal not found")
     return db_sucursal
 
 @router.get("/", response_model=list[schemas.Sucursal])
-def read_sucursales(
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_admin_user)
+async def read_sucursales(
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    after_id: int | None = Depends(after_cursor),
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(get_admin_user)
 ):
-    return service.get_sucursales(db)
+    sucursales = await async_service.get_sucursales(db, skip, limit, after_id)
+    return set_next_cursor(response, sucursales, limit)
 
 @router.put("/{sucursal_id}", response_model=schemas.Sucursal)
-def update_sucursal(
+async def update_sucursal(
     sucursal_id: int, 
     sucursal: schemas.SucursalCreate, 
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(get_admin_user)
 ):
-    return service.update_sucursal(db, sucursal_id, sucursal, current_user)
+    return await async_service.update_sucursal(db, sucursal_id, sucursal, current_user)
 
 @router.delete("/{sucursal_id}", response_model=schemas.Message)
-def delete_sucursal(sucursal_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_admin_user)):
-    sucursal = db.query(models.Sucursal).filter(models.Sucursal.id == sucursal_id).first()
-    if not sucursal:
-        raise HTTPException(status_code=404, detail="Sucursal not found")
-    db.delete(sucursal)
-    db.commit()
+async def delete_sucursal(sucursal_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_admin_user)):
+    await async_service.delete_sucursal(db, sucursal_id, current_user)
     return {"detail": "Sucursal deleted"}
@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.statements = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed: float):
+        with self._lock:
+            self.count += 1
+            self.total_time += elapsed
+            self.statements[statement] += 1
+            if elapsed >= self.slowest_time:
+                self.slowest_time = elapsed
+                self.slowest_statement = statement
+
+    def repeated(self, threshold: int):
+        # Misma sentencia N veces en una petición: candidato a N+1
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+current_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+_observers: list[QueryStats] = []
+_observers_lock = threading.Lock()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    stats = current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    for observer in list(_observers):
+        observer.record(statement, elapsed)
+
+def instrument_engine(sync_engine):
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+@contextmanager
+def capture_queries():
+    # Cuenta todo lo que pasa por los engines instrumentados, en cualquier hilo
+    stats = QueryStats()
+    with _observers_lock:
+        _observers.append(stats)
+    try:
+        yield stats
+    finally:
+        with _observers_lock:
+            _observers.remove(stats)
+
+class EndpointStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, endpoint: str, stats: QueryStats, n_plus_one: bool):
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint, {
+                "requests": 0,
+                "queries": 0,
+                "max_queries": 0,
+                "db_time": 0.0,
+                "slowest_time": 0.0,
+                "slowest_statement": None,
+                "n_plus_one": 0,
+            })
+            entry["requests"] += 1
+            entry["queries"] += stats.count
+            entry["max_queries"] = max(entry["max_queries"], stats.count)
+            entry["db_time"] += stats.total_time
+            if stats.slowest_time > entry["slowest_time"]:
+                entry["slowest_time"] = stats.slowest_time
+                entry["slowest_statement"] = stats.slowest_statement
+            entry["n_plus_one"] += int(n_plus_one)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def metrics(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": entry["requests"],
+                    "queries_avg": entry["queries"] / entry["requests"],
+                    "queries_max": entry["max_queries"],
+                    "db_ms_avg": entry["db_time"] / entry["requests"] * 1000,
+                    "slowest_ms": entry["slowest_time"] * 1000,
+                    "slowest_statement": entry["slowest_statement"],
+                    "n_plus_one_requests": entry["n_plus_one"],
+                }
+                for endpoint, entry in self._endpoints.items()
+            }
+
+endpoint_stats = EndpointStats()
+
+class SQLStatsMiddleware:
+    def __init__(self, app, debug: bool = settings.DEBUG, n_plus_one_threshold: int = settings.SQL_N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.debug = debug
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_stats.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.debug:
+                headers = list(message.get("headers", []))
+                headers += [
+                    (b"x-db-query-count", str(stats.count).encode()),
+                    (b"x-db-time-ms", f"{stats.total_time * 1000:.2f}".encode()),
+                    (b"x-db-slowest-ms", f"{stats.slowest_time * 1000:.2f}".encode()),
+                ]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_stats.reset(token)
+            endpoint = _endpoint_name(scope)
+            repeated = stats.repeated(self.n_plus_one_threshold)
+            for statement, count in repeated.items():
+                logger.warning("Posible N+1 en %s: %d ejecuciones de %s", endpoint, count, statement)
+            endpoint_stats.record(endpoint, stats, bool(repeated))
+
+def _endpoint_name(scope):
+    # Plantilla de la ruta (/inventory/{item_id}) para no crear una entrada por id
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope["path"]
+    return f"{scope['method']} {path}"
@@ -0,0 +1,9 @@
+from contextlib import contextmanager
+from app.sql_metrics import capture_queries
+
+@contextmanager
+def assert_max_queries(limit: int):
+    with capture_queries() as stats:
+        yield stats
+    statements = "\n".join(f"{count}x {statement}" for statement, count in stats.statements.items())
+    assert stats.count <= limit, f"expected at most {limit} queries, got {stats.count}:\n{statements}"
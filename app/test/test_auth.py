@@ -6,6 +6,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from main import app
 from app.domain.user import models, schemas
+from app.domain.user.token_cache import token_cache
 from database import Base, get_db
 from faker import Faker
 from jose import jwt
@@ -143,3 +144,62 @@ def test_token_generation(test_db, test_user):
     token = response.json()
     decoded_token = jwt.decode(token["access_token"], SECRET_KEY, algorithms=[ALGORITHM])
     assert decoded_token["sub"] == test_user["correo"]
+
+def test_updated_user_token_is_not_served_from_cache(test_db):
+    fake_user = {
+        "nombre": faker.name(),
+        "correo": faker.email(),
+        "password": faker.password(),
+        "role": "Cliente"
+    }
+    user_id = client.post("/users/", json=fake_user).json()["id"]
+    token = client.post(
+        "/token",
+        data={"username": fake_user["correo"], "password": fake_user["password"]}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    client.put(f"/users/{user_id}", json={"nombre": fake_user["nombre"], "correo": faker.email(), "role": "Cliente"})
+
+    response = client.get("/users/me", headers=headers)
+    assert response.status_code == 401
+
+def _admin():
+    fake_user = {"nombre": faker.name(), "correo": faker.email(), "password": faker.password(), "role": "Administrador"}
+    user_id = client.post("/users/", json=fake_user).json()["id"]
+    token = client.post("/token", data={"username": fake_user["correo"], "password": fake_user["password"]}).json()["access_token"]
+    return user_id, fake_user, {"Authorization": f"Bearer {token}"}
+
+def test_lowered_role_revokes_tokens_across_restarts(test_db):
+    user_id, fake_user, headers = _admin()
+    assert client.get("/metrics/sql", headers=headers).status_code == 200
+
+    client.put(f"/users/{user_id}", json={"nombre": fake_user["nombre"], "correo": fake_user["correo"], "role": "Cliente"})
+    # Reinicio u otro worker: sin nada en memoria, la versión sale de la BD
+    token_cache.clear()
+
+    assert client.get("/metrics/sql", headers=headers).status_code == 401
+    token = client.post("/token", data={"username": fake_user["correo"], "password": fake_user["password"]}).json()["access_token"]
+    assert client.get("/metrics/sql", headers={"Authorization": f"Bearer {token}"}).status_code == 403
+
+def test_deleted_user_tokens_are_rejected_across_restarts(test_db):
+    user_id, _, headers = _admin()
+    assert client.get("/metrics/sql", headers=headers).status_code == 200
+
+    client.delete(f"/users/{user_id}")
+    token_cache.clear()
+
+    assert client.get("/metrics/sql", headers=headers).status_code == 401
+
+def test_deleted_user_token_stays_revoked_after_email_is_reused(test_db):
+    user_id, fake_user, headers = _admin()
+    assert client.get("/metrics/sql", headers=headers).status_code == 200
+
+    client.delete(f"/users/{user_id}")
+    assert client.get("/metrics/sql", headers=headers).status_code == 401
+
+    # El mismo correo vuelve a registrarse: fila nueva, también con token_version 0
+    response = client.post("/users/", json={**fake_user, "role": "Cliente"})
+    assert response.json()["id"] != user_id
+    assert client.get("/metrics/sql", headers=headers).status_code == 401
@@ -1,8 +1,15 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 from sqlalchemy.orm import Session
 from app.domain.user import service, repository, schemas, models
+from app.domain.user.token_cache import TokenCache, token_cache
 from app.routers.auth import login_for_access_token, read_users_me
+from app.dependencies import require_role
+from app.domain.user.password_pool import PasswordPool
+import threading
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, Depends
 from jose import jwt
 from datetime import datetime, timedelta, timezone
@@ -115,9 +122,9 @@ def test_login_for_access_token_success():
     user.correo = form_data.username
     user.role = "Cliente"
 
-    with patch('app.domain.user.service.authenticate_user', return_value=user):
+    with patch('app.domain.user.async_service.authenticate_user', AsyncMock(return_value=user)):
         with patch('app.domain.user.service.create_access_token', return_value="fake_token"):
-            result = login_for_access_token(db, form_data)
+            result = asyncio.run(login_for_access_token(db, form_data))
             assert result == {"access_token": "fake_token", "token_type": "bearer"}
 
 def test_login_for_access_token_failure():
@@ -126,16 +133,16 @@ def test_login_for_access_token_failure():
     form_data.username = "juan@example.com"
     form_data.password = "wrongpassword"
 
-    with patch('app.domain.user.service.authenticate_user', return_value=None):
+    with patch('app.domain.user.async_service.authenticate_user', AsyncMock(return_value=None)):
         with pytest.raises(HTTPException) as exc_info:
-            login_for_access_token(db, form_data)
+            asyncio.run(login_for_access_token(db, form_data))
         assert exc_info.value.status_code == 401
         assert exc_info.value.detail == "Incorrect username or password"
 
 def test_read_users_me():
     current_user = MagicMock()
     current_user.correo = "juan@example.com"
-    result = read_users_me(current_user)
+    result = asyncio.run(read_users_me(current_user))
     assert result.correo == "juan@example.com"
 
 def test_invalid_token():
@@ -146,3 +153,160 @@ def test_invalid_token():
         service.get_current_user(db, token)
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Could not validate credentials"
+
+def test_get_current_user_uses_token_cache():
+    db = MagicMock(spec=Session)
+    user = models.User(id=1, nombre="Juan Perez", correo="cache@example.com", role="Cliente")
+    db.query().filter().first.return_value = user
+    token = service.create_access_token({"sub": user.correo}, timedelta(minutes=5))
+    token_cache.store_version(user.correo, user.id, 0)
+
+    first = service.get_current_user(db, token)
+    db.query.reset_mock()
+    second = service.get_current_user(db, token)
+
+    assert first.correo == second.correo == user.correo
+    db.query.assert_not_called()
+    token_cache.invalidate_user(user.correo)
+
+def test_token_cache_ttl_capped_at_exp():
+    cache = TokenCache(max_size=10, ttl_seconds=3600)
+    user = models.User(id=1, nombre="Juan Perez", correo="juan@example.com", role="Cliente")
+    exp = datetime.now(timezone.utc).timestamp() - 1
+    cache.put("expired-token", {"sub": user.correo, "exp": exp}, user)
+    assert cache.get("expired-token") is None
+    assert len(cache) == 0
+
+def test_token_cache_lru_eviction():
+    cache = TokenCache(max_size=2, ttl_seconds=60)
+    for i in range(3):
+        user = models.User(id=i, nombre="Juan Perez", correo=f"juan{i}@example.com", role="Cliente")
+        cache.put(f"token-{i}", {"sub": user.correo}, user)
+        if i == 1:
+            cache.get("token-0")
+    assert cache.get("token-0") is not None
+    assert cache.get("token-1") is None
+    assert cache.get("token-2") is not None
+
+def test_token_cache_invalidate_user():
+    cache = TokenCache(max_size=10, ttl_seconds=60)
+    user = models.User(id=1, nombre="Juan Perez", correo="juan@example.com", role="Cliente")
+    cache.put("token-a", {"sub": user.correo}, user)
+    cache.put("token-b", {"sub": user.correo}, user)
+    cache.invalidate_user(user.correo)
+    assert cache.get("token-a") is None
+    assert cache.get("token-b") is None
+
+def _async_db(sync_db):
+    db = MagicMock(spec=AsyncSession)
+    db.run_sync = AsyncMock(side_effect=lambda fn, *args: fn(sync_db, *args))
+    return db
+
+def test_require_role_uses_claims_only():
+    sync_db = MagicMock(spec=Session)
+    token = service.create_access_token({"sub": "bodega@example.com", "role": "Bodega", "uid": 7}, timedelta(minutes=5))
+    # Con la versión en caché basta con los claims
+    token_cache.store_version("bodega@example.com", 7, 0)
+    current_user = asyncio.run(require_role("Bodega")(_async_db(sync_db), token))
+    assert current_user.id == 7
+    assert current_user.role == "Bodega"
+    sync_db.query.assert_not_called()
+    sync_db.execute.assert_not_called()
+
+def test_require_role_forbidden():
+    token = service.create_access_token({"sub": "cliente@example.com", "role": "Cliente", "uid": 8}, timedelta(minutes=5))
+    token_cache.store_version("cliente@example.com", 8, 0)
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(require_role("Bodega", detail="Not authorized to add inventory items")(_async_db(MagicMock(spec=Session)), token))
+    assert exc_info.value.status_code == 403
+    assert exc_info.value.detail == "Not authorized to add inventory items"
+
+def test_require_role_falls_back_to_db_without_role_claim():
+    sync_db = MagicMock(spec=Session)
+    user = models.User(id=9, nombre="Admin", correo="legacy-admin@example.com", role="Administrador")
+    sync_db.query().filter().first.return_value = user
+    token = service.create_access_token({"sub": user.correo}, timedelta(minutes=5))
+    token_cache.store_version(user.correo, user.id, 0)
+    current_user = asyncio.run(require_role("Administrador")(_async_db(sync_db), token))
+    assert current_user.id == 9
+    token_cache.invalidate_user(user.correo)
+
+def _version_row(user_id, version):
+    return SimpleNamespace(id=user_id, token_version=version)
+
+def test_revoked_token_version_is_rejected():
+    db = _async_db(MagicMock(spec=Session))
+    correo = "revoked@example.com"
+    token = service.create_access_token({"sub": correo, "role": "Cliente", "uid": 10, "ver": 0}, timedelta(minutes=5))
+    with patch.object(repository, "get_token_version", return_value=_version_row(10, 0)) as lookup:
+        assert asyncio.run(require_role("Cliente")(db, token)).id == 10
+        # La versión queda en caché: la segunda petición no vuelve a la BD
+        assert asyncio.run(require_role("Cliente")(db, token)).id == 10
+    lookup.assert_called_once()
+
+    # Otro proceso subió token_version: la revocación local solo descarta la copia en caché
+    token_cache.revoke_user(correo)
+    with patch.object(repository, "get_token_version", return_value=_version_row(10, 1)):
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(require_role("Cliente")(db, token))
+    assert exc_info.value.status_code == 401
+    token_cache.revoke_user(correo)
+
+def test_deleted_user_token_is_rejected():
+    db = _async_db(MagicMock(spec=Session))
+    correo = "deleted@example.com"
+    token = service.create_access_token({"sub": correo, "role": "Cliente", "uid": 11, "ver": 0}, timedelta(minutes=5))
+    with patch.object(repository, "get_token_version", return_value=None):
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(require_role("Cliente")(db, token))
+    assert exc_info.value.status_code == 401
+    token_cache.revoke_user(correo)
+
+def test_token_of_a_reused_email_is_rejected():
+    db = _async_db(MagicMock(spec=Session))
+    correo = "reused@example.com"
+    token = service.create_access_token({"sub": correo, "role": "Administrador", "uid": 12, "ver": 0}, timedelta(minutes=5))
+    # El correo ahora es de otro usuario, también en la versión 0
+    with patch.object(repository, "get_token_version", return_value=_version_row(13, 0)):
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(require_role("Administrador")(db, token))
+    assert exc_info.value.status_code == 401
+    token_cache.revoke_user(correo)
+
+def test_cached_token_version_expires():
+    cache = TokenCache(max_size=10, ttl_seconds=60, version_ttl_seconds=0)
+    cache.store_version("juan@example.com", 1, 3)
+    assert cache.cached_version("juan@example.com") is None
+
+def test_password_pool_rejects_when_saturated():
+    pool = PasswordPool(workers=1, queue_depth=0)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait(5)
+        return "hashed"
+
+    worker = threading.Thread(target=pool.run, args=(slow_hash,))
+    worker.start()
+    started.wait(5)
+    with pytest.raises(HTTPException) as exc_info:
+        pool.run(lambda: "hashed")
+    release.set()
+    worker.join(5)
+
+    assert exc_info.value.status_code == 503
+    metrics = pool.metrics()
+    assert metrics["rejected"] == 1
+    assert metrics["completed"] == 1
+    assert pool.run(lambda: "hashed") == "hashed"
+
+def test_password_pool_records_queue_wait_and_hash_time():
+    pool = PasswordPool(workers=1, queue_depth=1)
+    service_hash = pool.run(service.pwd_context.hash, "password123")
+    assert service.pwd_context.verify("password123", service_hash)
+    metrics = pool.metrics()
+    assert metrics["completed"] == 1
+    assert metrics["hash_ms_avg"] > 0
+    assert metrics["queue_wait_ms_avg"] >= 0
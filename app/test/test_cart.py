@@ -1,13 +1,17 @@
 import pytest
+from datetime import datetime, timedelta, timezone
 from fastapi import Depends
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from main import app
-from app.domain.cart import models, schemas
+from app.domain.cart import models, repository, schemas, service
+from app.domain.reservation.models import Reservation
 from app.domain.user.models import User
 from app.domain.sales.models import Sale
+from app.domain.inventory.models import Inventory
 from database import Base, get_db
+from app.test.query_count import assert_max_queries
 from faker import Faker
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -63,8 +67,12 @@ def token(test_user):
 @pytest.fixture(scope="module")
 def test_sale(test_db):
     db = TestingSessionLocal()
+    # Agregar al carrito reserva stock: el producto tiene que existir
+    product = Inventory(product_name=faker.word(), description=faker.text(), price=10.0, quantity=1000)
+    db.add(product)
+    db.commit()
     fake_sale = Sale(
-        product_id=1,
+        product_id=product.id,
         price=faker.pyfloat(min_value=1, max_value=100, right_digits=2)
     )
     db.add(fake_sale)
@@ -73,6 +81,25 @@ def test_sale(test_db):
     db.close()
     return fake_sale
 
+def _new_sale(quantity):
+    db = TestingSessionLocal()
+    product = Inventory(product_name=faker.word(), description=faker.text(), price=10.0, quantity=quantity)
+    db.add(product)
+    db.flush()
+    sale = Sale(product_id=product.id, price=10.0)
+    db.add(sale)
+    db.commit()
+    ids = product.id, sale.id
+    db.close()
+    return ids
+
+def _held(product_id):
+    return client.get(f"/inventory/{product_id}/availability").json()["held"]
+
+def _line(cart_item_id):
+    with TestingSessionLocal() as db:
+        return db.get(models.CartItem, cart_item_id)
+
 def test_add_to_cart(test_db, token, test_sale):
     fake_cart_item = {
         "sale_id": test_sale.id,
@@ -129,7 +156,7 @@ def test_remove_from_cart(test_db, token, test_sale):
     assert response.status_code == 200, response.text
     data = response.json()
     assert data["sale_id"] == fake_cart_item["sale_id"]
-    assert data["quantity"] == fake_cart_item["quantity"]
+    assert data["quantity"] == create_response.json()["quantity"]
 
 def test_add_to_cart_unauthorized(test_db, test_sale):
     fake_cart_item = {
@@ -166,3 +193,254 @@ def test_remove_from_cart_unauthorized(test_db, test_sale, token):
     )
     assert response.status_code == 401, response.text
     assert response.json()["detail"] == "Not authenticated"
+
+def test_add_to_cart_reserves_stock(test_db, token):
+    product_id, sale_id = _new_sale(1000)
+    before = client.get(f"/inventory/{product_id}/availability").json()
+    response = client.post(
+        "/cart/",
+        json={"sale_id": sale_id, "quantity": 3},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    after = client.get(f"/inventory/{product_id}/availability").json()
+    assert after["held"] == before["held"] + 3
+    assert after["available"] == before["available"] - 3
+
+    client.delete(f"/cart/{response.json()['id']}", headers={"Authorization": f"Bearer {token}"})
+    assert client.get(f"/inventory/{product_id}/availability").json() == before
+
+def test_add_to_cart_beyond_stock(test_db, token, test_sale):
+    response = client.post(
+        "/cart/",
+        json={"sale_id": test_sale.id, "quantity": 100000},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 409, response.text
+    assert response.json()["detail"] == "Not enough stock available"
+
+def test_batch_add_to_cart(test_db, token):
+    product_id, sale_id = _new_sale(100)
+    other_product_id, other_sale_id = _new_sale(100)
+    items = [{"sale_id": sale_id, "quantity": 2}, {"sale_id": other_sale_id, "quantity": 3}, {"sale_id": sale_id, "quantity": 4}]
+
+    response = client.post("/cart/batch", json={"items": items}, headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [(item["sale_id"], item["quantity"]) for item in data] == [(sale_id, 6), (other_sale_id, 3)]
+    assert (_held(product_id), _held(other_product_id)) == (6, 3)
+
+def test_adding_a_sale_twice_merges_the_lines(test_db, token):
+    product_id, sale_id = _new_sale(100)
+    headers = {"Authorization": f"Bearer {token}"}
+    first = client.post("/cart/", json={"sale_id": sale_id, "quantity": 2}, headers=headers).json()
+
+    second = client.post("/cart/", json={"sale_id": sale_id, "quantity": 3}, headers=headers).json()
+    (batched,) = client.post("/cart/batch", json={"items": [{"sale_id": sale_id, "quantity": 4}]}, headers=headers).json()
+
+    assert (second["id"], second["quantity"]) == (first["id"], 5)
+    assert (batched["id"], batched["quantity"]) == (first["id"], 9)
+    assert [item["sale_id"] for item in client.get("/cart/", headers=headers).json()].count(sale_id) == 1
+    assert _held(product_id) == 9
+
+def test_merging_beyond_stock_keeps_the_line(test_db, token):
+    product_id, sale_id = _new_sale(5)
+    headers = {"Authorization": f"Bearer {token}"}
+    created = client.post("/cart/", json={"sale_id": sale_id, "quantity": 4}, headers=headers).json()
+
+    response = client.post("/cart/", json={"sale_id": sale_id, "quantity": 2}, headers=headers)
+
+    assert response.status_code == 409
+    assert _line(created["id"]).quantity == 4
+    assert _held(product_id) == 4
+
+def test_batch_add_is_a_fixed_number_of_statements(test_db, token):
+    items = [{"sale_id": _new_sale(10)[1], "quantity": 1} for _ in range(200)]
+    client.get("/cart/", params={"limit": 1}, headers={"Authorization": f"Bearer {token}"})
+
+    # Ofertas, líneas, holds previos y holds nuevos: cuatro sentencias para 200 líneas
+    with assert_max_queries(4):
+        response = client.post("/cart/batch", json={"items": items}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 200
+
+def test_batch_add_checks_stock_across_lines(test_db, token):
+    product_id, sale_id = _new_sale(5)
+    _, other_sale_id = _new_sale(5)
+    before = client.get("/cart/", headers={"Authorization": f"Bearer {token}"}).json()
+    items = [{"sale_id": other_sale_id, "quantity": 1}, {"sale_id": sale_id, "quantity": 3}, {"sale_id": sale_id, "quantity": 3}]
+
+    response = client.post("/cart/batch", json={"items": items}, headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 409, response.text
+    assert response.json()["detail"] == "Not enough stock available"
+    assert client.get("/cart/", headers={"Authorization": f"Bearer {token}"}).json() == before
+    assert _held(product_id) == 0
+
+def test_batch_add_with_unknown_sale(test_db, token):
+    _, sale_id = _new_sale(5)
+    items = [{"sale_id": sale_id, "quantity": 1}, {"sale_id": 999999, "quantity": 1}]
+    response = client.post("/cart/batch", json={"items": items}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Sale not found"
+
+def test_batch_add_limits(test_db, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.post("/cart/batch", json={"items": []}, headers=headers).status_code == 422
+    assert client.post("/cart/batch", json={"items": [{"sale_id": 1, "quantity": 0}]}, headers=headers).status_code == 422
+
+def test_batch_update_cart(test_db, token):
+    product_id, sale_id = _new_sale(20)
+    other_product_id, other_sale_id = _new_sale(20)
+    headers = {"Authorization": f"Bearer {token}"}
+    third_product_id, third_sale_id = _new_sale(20)
+    created = client.post(
+        "/cart/batch",
+        json={"items": [{"sale_id": sale_id, "quantity": 2}, {"sale_id": third_sale_id, "quantity": 2}]},
+        headers=headers,
+    ).json()
+
+    changes = [
+        {"id": created[0]["id"], "sale_id": sale_id, "quantity": 10},
+        {"id": created[1]["id"], "sale_id": other_sale_id, "quantity": 5},
+    ]
+    response = client.patch("/cart/batch", json={"items": changes}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert [(item["id"], item["sale_id"], item["quantity"]) for item in response.json()] == [
+        (change["id"], change["sale_id"], change["quantity"]) for change in changes
+    ]
+    assert (_held(product_id), _held(other_product_id), _held(third_product_id)) == (10, 5, 0)
+
+    too_many = [{"id": created[0]["id"], "sale_id": sale_id, "quantity": 21}]
+    assert client.patch("/cart/batch", json={"items": too_many}, headers=headers).status_code == 409
+    assert _held(product_id) == 10
+
+def test_batch_update_rejects_foreign_and_duplicate_ids(test_db, token):
+    _, sale_id = _new_sale(20)
+    headers = {"Authorization": f"Bearer {token}"}
+    (created,) = client.post("/cart/batch", json={"items": [{"sale_id": sale_id, "quantity": 1}]}, headers=headers).json()
+
+    unknown = [{"id": 999999, "sale_id": sale_id, "quantity": 1}]
+    response = client.patch("/cart/batch", json={"items": unknown}, headers=headers)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Cart item not found"
+
+    duplicated = [{"id": created["id"], "sale_id": sale_id, "quantity": 1}] * 2
+    assert client.patch("/cart/batch", json={"items": duplicated}, headers=headers).status_code == 400
+
+def test_update_onto_an_existing_sale_is_a_conflict(test_db, token):
+    product_id, sale_id = _new_sale(20)
+    _, other_sale_id = _new_sale(20)
+    headers = {"Authorization": f"Bearer {token}"}
+    created = client.post(
+        "/cart/batch",
+        json={"items": [{"sale_id": sale_id, "quantity": 2}, {"sale_id": other_sale_id, "quantity": 3}]},
+        headers=headers,
+    ).json()
+
+    changes = [{"id": created[1]["id"], "sale_id": sale_id, "quantity": 3}]
+    response = client.patch("/cart/batch", json={"items": changes}, headers=headers)
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Cart already has a line for that sale"
+
+    response = client.put(f"/cart/{created[1]['id']}", json={"sale_id": sale_id, "quantity": 3}, headers=headers)
+    assert response.status_code == 409
+    assert _line(created[1]["id"]).sale_id == other_sale_id
+    assert _held(product_id) == 2
+
+def test_update_cart_item(test_db, token):
+    product_id, sale_id = _new_sale(20)
+    headers = {"Authorization": f"Bearer {token}"}
+    created = client.post("/cart/", json={"sale_id": sale_id, "quantity": 1}, headers=headers).json()
+
+    response = client.put(f"/cart/{created['id']}", json={"sale_id": sale_id, "quantity": 7}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["quantity"] == 7
+    assert _held(product_id) == 7
+
+def test_clear_cart(test_db, token):
+    product_id, sale_id = _new_sale(20)
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/cart/batch", json={"items": [{"sale_id": sale_id, "quantity": 3}] * 2}, headers=headers)
+    count = len(client.get("/cart/", headers=headers).json())
+
+    response = client.delete("/cart/", headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"deleted": count}
+    assert client.get("/cart/", headers=headers).json() == []
+    assert _held(product_id) == 0
+
+def test_clear_cart_unauthorized(test_db):
+    assert client.delete("/cart/").status_code == 401
+
+def test_ensure_schema_merges_duplicate_lines(tmp_path):
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=legacy, tables=[Reservation.__table__])
+    with legacy.begin() as connection:
+        # Tabla previa a la clave única y a los timestamps: la misma oferta podía quedar en varias líneas
+        connection.execute(text("CREATE TABLE cart_items (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, sale_id INTEGER NOT NULL, quantity INTEGER NOT NULL)"))
+        connection.execute(text("CREATE INDEX ix_cart_items_user_id_sale_id ON cart_items (user_id, sale_id)"))
+        connection.execute(text(
+            "INSERT INTO cart_items (id, user_id, sale_id, quantity) VALUES (1, 1, 1, 2), (2, 1, 1, 3), (3, 1, 1, 1), (4, 1, 2, 5), (5, 2, 1, 1)"
+        ))
+        connection.execute(text(
+            "INSERT INTO reservations (cart_item_id, product_id, quantity, expires_at) "
+            "VALUES (1, 7, 2, '2100-01-01 00:00:00'), (2, 7, 3, '2100-01-01 00:00:00')"
+        ))
+
+    repository.ensure_schema(legacy)
+    repository.ensure_schema(legacy)
+
+    indexes = {index["name"]: index for index in inspect(legacy).get_indexes("cart_items")}
+    assert indexes["ix_cart_items_user_id_sale_id"]["unique"]
+    with sessionmaker(bind=legacy)() as db:
+        lines = db.query(models.CartItem).order_by(models.CartItem.id).all()
+        holds = db.query(Reservation).all()
+        assert [(line.id, line.user_id, line.sale_id, line.quantity) for line in lines] == [(1, 1, 1, 6), (4, 1, 2, 5), (5, 2, 1, 1)]
+        assert [(hold.cart_item_id, hold.quantity) for hold in holds] == [(1, 5)]
+        assert all(line.created_at and line.updated_at for line in lines)
+        # Recién migradas cuentan como activas
+        assert service.sweep_abandoned(db, max_age_seconds=3600) == 0
+    legacy.dispose()
+
+def test_sweep_abandoned_deletes_idle_carts_in_batches(tmp_path):
+    janitor_engine = create_engine(f"sqlite:///{tmp_path / 'janitor.db'}")
+    Base.metadata.create_all(bind=janitor_engine)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    old = now - timedelta(days=40)
+    with sessionmaker(bind=janitor_engine)() as db:
+        db.add_all([
+            # Usuario 1: carrito abandonado. Usuario 2: una línea vieja pero el carrito sigue activo
+            models.CartItem(id=1, user_id=1, sale_id=1, quantity=1, created_at=old, updated_at=old),
+            models.CartItem(id=2, user_id=1, sale_id=2, quantity=1, created_at=old, updated_at=old),
+            models.CartItem(id=3, user_id=1, sale_id=3, quantity=1, created_at=old, updated_at=old),
+            models.CartItem(id=4, user_id=2, sale_id=1, quantity=1, created_at=old, updated_at=old),
+            models.CartItem(id=5, user_id=2, sale_id=2, quantity=1, created_at=now, updated_at=now),
+            Reservation(cart_item_id=1, product_id=1, quantity=1, expires_at=now),
+        ])
+        db.commit()
+
+        assert service.sweep_abandoned(db, max_age_seconds=30 * 86400, batch_size=2) == 3
+
+        assert [line.id for line in db.query(models.CartItem).order_by(models.CartItem.id)] == [4, 5]
+        assert db.query(Reservation).count() == 0
+    janitor_engine.dispose()
+
+def test_merging_a_line_touches_it(test_db, token):
+    _, sale_id = _new_sale(100)
+    headers = {"Authorization": f"Bearer {token}"}
+    created = client.post("/cart/", json={"sale_id": sale_id, "quantity": 1}, headers=headers).json()
+    old = datetime(2020, 1, 1)
+    with TestingSessionLocal() as db:
+        db.query(models.CartItem).filter(models.CartItem.id == created["id"]).update({"updated_at": old})
+        db.commit()
+
+    client.post("/cart/", json={"sale_id": sale_id, "quantity": 1}, headers=headers)
+
+    line = _line(created["id"])
+    assert line.updated_at > old
+    assert line.created_at > old
@@ -9,6 +9,7 @@ from app.domain.sales import models as sales_models
 from app.domain.inventory import models as inventory_models
 from app.domain.user.models import User
 from database import Base, get_db
+from app.test.query_count import assert_max_queries
 from faker import Faker
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -110,6 +111,28 @@ def test_get_cart_summary(test_db, token, test_cart_item):
     assert len(data["items"]) > 0
     assert data["total_amount"] > 0
 
+def test_get_cart_summary_totals(test_db, token, test_cart_item):
+    response = client.get(
+        "/cart_summary/",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    item = data["items"][0]
+    assert item["quantity"] == test_cart_item.quantity
+    assert item["total"] == pytest.approx(item["quantity"] * item["price"])
+    assert data["total_amount"] == pytest.approx(sum(line["total"] for line in data["items"]))
+
+def test_get_cart_summary_single_query(test_db, token, test_cart_item):
+    # Auth sale de los claims: la única consulta es el resumen
+    client.get("/cart_summary/", headers={"Authorization": f"Bearer {token}"})
+    with assert_max_queries(1):
+        response = client.get(
+            "/cart_summary/",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+    assert response.status_code == 200, response.text
+
 def test_get_cart_summary_unauthorized(test_db):
     response = client.get("/cart_summary/")
     assert response.status_code == 401, response.text
@@ -1,8 +1,10 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from sqlalchemy.orm import Session
-from app.domain.cart import service, models, schemas
+from app.domain.cart import service, models, schemas, repository
+from app.domain.sales.models import Sale
 from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
 from pydantic import ValidationError
 
 def test_create_cart_item_service():
@@ -11,19 +13,20 @@ def test_create_cart_item_service():
     user_id = 1
     db_cart_item = models.CartItem(id=1, user_id=user_id, sale_id=cart_item.sale_id, quantity=cart_item.quantity)
 
-    with patch.object(db, 'add') as mock_add, \
-         patch.object(db, 'commit') as mock_commit, \
-         patch.object(db, 'refresh') as mock_refresh:
+    with patch.object(db, 'commit') as mock_commit, \
+         patch.object(repository, 'upsert_cart_items', return_value=[db_cart_item]) as mock_upsert, \
+         patch.object(service.sales_repository, 'get_sale', return_value=Sale(id=1, product_id=7, price=10.0)), \
+         patch.object(service.reservation_service, 'hold_stock') as mock_hold:
         
         result = service.create_cart_item(db, cart_item, user_id)
+        mock_hold.assert_called_once_with(db, result.id, 7, cart_item.quantity)
         
         
         created_item = models.CartItem(sale_id=cart_item.sale_id, quantity=cart_item.quantity, user_id=user_id)
         
         
-        mock_add.assert_called_once()
+        mock_upsert.assert_called_once_with(db, [{"sale_id": 1, "quantity": 5, "user_id": user_id}])
         mock_commit.assert_called_once()
-        mock_refresh.assert_called_once()
         
         
         assert result.sale_id == created_item.sale_id
@@ -39,7 +42,7 @@ def test_get_cart_items_service():
     ]
     
     with patch.object(db.query(models.CartItem), 'filter') as mock_filter:
-        mock_filter.return_value.all.return_value = expected_cart_items
+        mock_filter.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = expected_cart_items
         result = service.get_cart_items(db, user_id)
         assert len(result) == len(expected_cart_items)
         for res_item, exp_item in zip(result, expected_cart_items):
@@ -71,8 +74,11 @@ def test_update_cart_item_service():
 
     with patch.object(db.query(models.CartItem), 'filter') as mock_filter:
         mock_filter.return_value.first.return_value = db_cart_item
-        with patch.object(db, 'commit') as mock_commit:
+        with patch.object(db, 'commit') as mock_commit, \
+             patch.object(service.sales_repository, 'get_sale', return_value=Sale(id=2, product_id=7, price=10.0)), \
+             patch.object(service.reservation_service, 'hold_stock') as mock_hold:
             result = service.update_cart_item(db, item_id, cart_item_update, user_id)
+            mock_hold.assert_called_once_with(db, item_id, 7, cart_item_update.quantity)
             mock_commit.assert_called_once()
             assert result.sale_id == cart_item_update.sale_id
             assert result.quantity == cart_item_update.quantity
@@ -122,4 +128,129 @@ def test_get_cart_item_not_found():
         with pytest.raises(HTTPException) as exc_info:
             service.get_cart_item(db, item_id, user_id)
         assert exc_info.value.status_code == 404
-        assert exc_info.value.detail == "Cart item not found"
\ No newline at end of file
+        assert exc_info.value.detail == "Cart item not found"
+
+
+def test_get_cart_summary_service():
+    db = MagicMock(spec=Session)
+    user_id = 1
+    line = MagicMock(product_name="Martillo", quantity=2, price=10.5, total=21.0, total_amount=21.0)
+
+    with patch.object(repository, 'get_cart_summary_lines', return_value=[line]) as mock_lines:
+        result = service.get_cart_summary(db, user_id)
+        mock_lines.assert_called_once_with(db, user_id)
+        assert len(result.items) == 1
+        assert result.items[0].product_name == "Martillo"
+        assert result.total_amount == 21.0
+
+
+def test_get_cart_summary_service_empty():
+    db = MagicMock(spec=Session)
+
+    with patch.object(repository, 'get_cart_summary_lines', return_value=[]):
+        result = service.get_cart_summary(db, 1)
+        assert result.items == []
+        assert result.total_amount == 0
+
+def test_create_cart_item_without_stock_rolls_back():
+    db = MagicMock(spec=Session)
+    cart_item = schemas.CartItemCreate(sale_id=1, quantity=5)
+    conflict = HTTPException(status_code=409, detail="Not enough stock available")
+
+    with patch.object(repository, 'upsert_cart_items', return_value=[models.CartItem(id=1, user_id=1, sale_id=1, quantity=5)]), \
+         patch.object(service.sales_repository, 'get_sale', return_value=Sale(id=1, product_id=7, price=10.0)), \
+         patch.object(service.reservation_service, 'hold_stock', side_effect=conflict):
+        with pytest.raises(HTTPException) as exc_info:
+            service.create_cart_item(db, cart_item, 1)
+    assert exc_info.value.status_code == 409
+    db.rollback.assert_called_once()
+    db.commit.assert_not_called()
+
+def test_create_cart_item_unknown_sale():
+    db = MagicMock(spec=Session)
+    cart_item = schemas.CartItemCreate(sale_id=99, quantity=1)
+
+    with patch.object(repository, 'upsert_cart_items', return_value=[models.CartItem(id=1, user_id=1, sale_id=99, quantity=1)]), \
+         patch.object(service.sales_repository, 'get_sale', return_value=None):
+        with pytest.raises(HTTPException) as exc_info:
+            service.create_cart_item(db, cart_item, 1)
+    assert exc_info.value.status_code == 404
+    db.commit.assert_not_called()
+
+def test_create_cart_items_holds_the_whole_batch():
+    db = MagicMock(spec=Session)
+    batch = schemas.CartBatchCreate(items=[schemas.CartItemCreate(sale_id=1, quantity=2), schemas.CartItemCreate(sale_id=2, quantity=1)])
+    created = [models.CartItem(id=10, user_id=1, sale_id=1, quantity=2), models.CartItem(id=11, user_id=1, sale_id=2, quantity=1)]
+
+    with patch.object(service.sales_repository, 'get_existing_sale_ids', return_value={1, 2}), \
+         patch.object(repository, 'upsert_cart_items', return_value=created) as mock_create, \
+         patch.object(service.reservation_service, 'hold_stock_many') as mock_hold:
+        result = service.create_cart_items(db, batch, 1)
+
+    mock_create.assert_called_once_with(db, [{"sale_id": 1, "quantity": 2, "user_id": 1}, {"sale_id": 2, "quantity": 1, "user_id": 1}])
+    mock_hold.assert_called_once_with(db, [10, 11])
+    db.commit.assert_called_once()
+    assert result == created
+
+def test_create_cart_items_merges_repeated_sales():
+    db = MagicMock(spec=Session)
+    batch = schemas.CartBatchCreate(items=[
+        schemas.CartItemCreate(sale_id=2, quantity=1),
+        schemas.CartItemCreate(sale_id=1, quantity=2),
+        schemas.CartItemCreate(sale_id=2, quantity=4),
+    ])
+
+    with patch.object(service.sales_repository, 'get_existing_sale_ids', return_value={1, 2}), \
+         patch.object(repository, 'upsert_cart_items', return_value=[]) as mock_upsert, \
+         patch.object(service.reservation_service, 'hold_stock_many'):
+        service.create_cart_items(db, batch, 1)
+
+    mock_upsert.assert_called_once_with(db, [{"sale_id": 2, "quantity": 5, "user_id": 1}, {"sale_id": 1, "quantity": 2, "user_id": 1}])
+
+def test_create_cart_items_without_stock_rolls_back():
+    db = MagicMock(spec=Session)
+    batch = schemas.CartBatchCreate(items=[schemas.CartItemCreate(sale_id=1, quantity=2)])
+    conflict = HTTPException(status_code=409, detail="Not enough stock available")
+
+    with patch.object(service.sales_repository, 'get_existing_sale_ids', return_value={1}), \
+         patch.object(repository, 'upsert_cart_items', return_value=[models.CartItem(id=10, user_id=1, sale_id=1, quantity=2)]), \
+         patch.object(service.reservation_service, 'hold_stock_many', side_effect=conflict):
+        with pytest.raises(HTTPException) as exc_info:
+            service.create_cart_items(db, batch, 1)
+    assert exc_info.value.status_code == 409
+    db.rollback.assert_called_once()
+    db.commit.assert_not_called()
+
+def test_update_cart_items_rejects_duplicate_ids():
+    db = MagicMock(spec=Session)
+    line = schemas.CartItemUpdate(id=5, sale_id=1, quantity=1)
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.update_cart_items(db, schemas.CartBatchUpdate(items=[line, line]), 1)
+    assert exc_info.value.status_code == 400
+    db.commit.assert_not_called()
+
+def test_update_cart_items_onto_an_existing_sale_rolls_back():
+    db = MagicMock(spec=Session)
+    db.flush.side_effect = IntegrityError("UPDATE cart_items", {}, Exception("UNIQUE constraint failed"))
+    batch = schemas.CartBatchUpdate(items=[schemas.CartItemUpdate(id=5, sale_id=1, quantity=1)])
+
+    with patch.object(repository, 'get_user_cart_items', return_value=[models.CartItem(id=5, user_id=1, sale_id=2, quantity=1)]), \
+         patch.object(service.sales_repository, 'get_existing_sale_ids', return_value={1}), \
+         patch.object(service.reservation_service, 'hold_stock_many') as mock_hold:
+        with pytest.raises(HTTPException) as exc_info:
+            service.update_cart_items(db, batch, 1)
+    assert exc_info.value.status_code == 409
+    db.rollback.assert_called_once()
+    mock_hold.assert_not_called()
+    db.commit.assert_not_called()
+
+def test_clear_cart_service():
+    db = MagicMock(spec=Session)
+
+    with patch.object(service.reservation_service, 'release_user_holds') as mock_release, \
+         patch.object(repository, 'clear_cart', return_value=3):
+        result = service.clear_cart(db, 1)
+    mock_release.assert_called_once_with(db, 1)
+    db.commit.assert_called_once()
+    assert result.deleted == 3
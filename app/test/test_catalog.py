@@ -0,0 +1,197 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from faker import Faker
+from main import app
+from database import Base
+from app.config import settings
+from app.domain.catalog import repository
+from app.domain.catalog.models import CatalogEntry
+from app.domain.checkout import repository as checkout_repository
+from app.domain.cart.models import CartItem
+from app.domain.inventory import ledger
+from app.domain.inventory.models import Inventory
+from app.domain.reservation.service import utcnow
+from app.domain.sales.models import Sale
+from app.domain.user.models import User
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor
+from app.test.query_count import assert_max_queries
+
+engine = create_engine("sqlite:///./test.db", connect_args={"check_same_thread": False})
+
+client = TestClient(app)
+faker = Faker()
+
+@pytest.fixture(scope="module")
+def test_db():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def db():
+    memory = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=memory)
+    session = sessionmaker(bind=memory, autoflush=False)()
+    yield session
+    session.close()
+    memory.dispose()
+
+def _product(db, quantity=10, price=10.0):
+    product = Inventory(product_name="Martillo", description="Acero", price=price, quantity=quantity)
+    db.add(product)
+    db.flush()
+    ledger.open_ledger(db, product.id, quantity)
+    db.commit()
+    return product.id
+
+def _entry(db, product_id):
+    db.expire_all()
+    entry = repository.get_entry(db, product_id)
+    return entry and (entry.product_name, entry.sale_id, entry.price, entry.stock)
+
+def _matches_sources(db):
+    # Lo mantenido por los triggers tiene que coincidir con recalcular desde cero
+    db.expire_all()
+    maintained = {entry.product_id: (entry.product_name, entry.sale_id, entry.price, entry.stock) for entry in db.query(CatalogEntry)}
+    repository.rebuild(db)
+    rebuilt = {entry.product_id: (entry.product_name, entry.sale_id, entry.price, entry.stock) for entry in db.query(CatalogEntry)}
+    return maintained == rebuilt
+
+def test_new_product_appears_with_inventory_price(db):
+    product_id = _product(db, quantity=7, price=12.5)
+    assert _entry(db, product_id) == ("Martillo", None, 12.5, 7)
+
+def test_newest_sale_sets_the_price(db):
+    product_id = _product(db)
+    first = Sale(product_id=product_id, price=9.0)
+    db.add(first)
+    db.commit()
+    assert _entry(db, product_id) == ("Martillo", first.id, 9.0, 10)
+
+    second = Sale(product_id=product_id, price=8.0)
+    db.add(second)
+    db.commit()
+    assert _entry(db, product_id) == ("Martillo", second.id, 8.0, 10)
+
+    second.price = 7.5
+    db.commit()
+    assert _entry(db, product_id)[2] == 7.5
+
+    db.delete(second)
+    db.commit()
+    assert _entry(db, product_id) == ("Martillo", first.id, 9.0, 10)
+    db.delete(first)
+    db.commit()
+    assert _entry(db, product_id) == ("Martillo", None, 10.0, 10)
+
+def test_moving_a_sale_to_another_product_refreshes_both(db):
+    hammer, saw = _product(db, price=10.0), _product(db, price=20.0)
+    sale = Sale(product_id=hammer, price=5.0)
+    db.add(sale)
+    db.commit()
+
+    sale.product_id = saw
+    db.commit()
+
+    assert _entry(db, hammer)[1:3] == (None, 10.0)
+    assert _entry(db, saw)[1:3] == (sale.id, 5.0)
+
+def test_stock_follows_the_ledger_and_snapshots(db, monkeypatch):
+    monkeypatch.setattr(settings, "STOCK_SNAPSHOT_INTERVAL", 3)
+    product_id = _product(db, quantity=10)
+    for _ in range(4):
+        ledger.record_movement(db, product_id, 2, "receipt")
+    ledger.record_movement(db, product_id, -5, "withdrawal", minimum=5)
+    ledger.adjust_to(db, product_id, 11)
+    db.commit()
+
+    assert db.get(Inventory, product_id).ledger_position > 0
+    assert _entry(db, product_id)[3] == 11
+    assert _matches_sources(db)
+
+def test_checkout_withdrawal_updates_stock(db):
+    product_id = _product(db, quantity=10)
+    user = User(nombre="Cliente", correo="cliente@example.com", hashed_password="x", role="Cliente")
+    sale = Sale(product_id=product_id, price=9.0)
+    db.add_all([user, sale])
+    db.flush()
+    db.add(CartItem(user_id=user.id, sale_id=sale.id, quantity=4))
+    db.commit()
+
+    checkout_repository.withdraw_cart_stock(db, user.id, utcnow())
+    db.commit()
+
+    assert _entry(db, product_id)[3] == 6
+
+def test_renaming_and_deleting_a_product(db):
+    product_id = _product(db)
+    product = db.get(Inventory, product_id)
+    product.product_name = "Martillo carpintero"
+    db.commit()
+    assert _entry(db, product_id)[0] == "Martillo carpintero"
+
+    db.delete(product)
+    db.commit()
+    assert _entry(db, product_id) is None
+
+def test_existing_database_is_backfilled(tmp_path):
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    legacy_tables = [table for table in Base.metadata.sorted_tables if table is not CatalogEntry.__table__]
+    Base.metadata.create_all(bind=legacy, tables=legacy_tables)
+    with sessionmaker(bind=legacy)() as db:
+        product_id = _product(db, quantity=4, price=3.0)
+        db.add(Sale(product_id=product_id, price=2.5))
+        db.commit()
+
+    Base.metadata.create_all(bind=legacy)
+
+    assert "catalog_entries" in inspect(legacy).get_table_names()
+    with sessionmaker(bind=legacy)() as db:
+        assert _entry(db, product_id)[2:] == (2.5, 4)
+        ledger.record_movement(db, product_id, -1, "withdrawal", minimum=1)
+        db.commit()
+        assert _entry(db, product_id)[3] == 3
+    legacy.dispose()
+
+def test_catalog_endpoint_lists_in_one_query(test_db):
+    name = faker.unique.word()
+    headers = _bodega()
+    created = client.post("/inventory/", json={"product_name": name, "description": "catalogo", "quantity": 3}, headers=headers).json()
+    empty = client.post("/inventory/", json={"product_name": faker.unique.word(), "description": "catalogo", "quantity": 0}, headers=headers).json()
+
+    with assert_max_queries(1):
+        response = client.get("/catalog/", params={"limit": 100, "in_stock": True})
+
+    assert response.status_code == 200, response.text
+    listed = {entry["product_id"]: entry for entry in response.json()}
+    assert listed[created["id"]]["product_name"] == name
+    assert listed[created["id"]]["stock"] == 3
+    assert empty["id"] not in listed
+
+    client.delete(f"/inventory/{created['id']}/1", headers=headers)
+    assert client.get(f"/catalog/{created['id']}").json()["stock"] == 2
+    assert client.get("/catalog/999999").status_code == 404
+
+def test_catalog_pages_follow_the_cursor(test_db):
+    headers = _bodega()
+    created = [
+        client.post("/inventory/", json={"product_name": faker.unique.word(), "description": "paginas", "quantity": 1}, headers=headers).json()["id"]
+        for _ in range(3)
+    ]
+    after = encode_cursor(created[0] - 1)
+
+    first = client.get("/catalog/", params={"limit": 2, "after": after})
+    assert first.status_code == 200, first.text
+    assert [entry["product_id"] for entry in first.json()] == created[:2]
+    second = client.get("/catalog/", params={"limit": 2, "after": first.headers[NEXT_CURSOR_HEADER]})
+    assert second.status_code == 200, second.text
+    assert [entry["product_id"] for entry in second.json()][:1] == created[2:]
+
+def _bodega():
+    user = {"nombre": faker.name(), "correo": faker.email(), "password": faker.password(), "role": "Bodega"}
+    assert client.post("/users/", json=user).status_code == 200
+    token = client.post("/token", data={"username": user["correo"], "password": user["password"]}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
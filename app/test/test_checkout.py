@@ -0,0 +1,156 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from faker import Faker
+from main import app
+from database import Base
+from app.domain.cart.models import CartItem
+from app.domain.dispatch.models import Dispatch
+from app.domain.inventory import ledger
+from app.domain.inventory.models import Inventory
+from app.domain.payment.models import Payment
+from app.domain.reservation.models import Reservation
+from app.domain.sales.models import Sale
+from app.test.query_count import assert_max_queries
+
+engine = create_engine("sqlite:///./test.db", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+client = TestClient(app)
+faker = Faker()
+
+DISPATCH = {"address": "Av. Siempre Viva 742", "username": "cliente", "email": "cliente@example.com", "phone": "555"}
+
+@pytest.fixture(scope="module")
+def test_db():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+def _customer():
+    user = {"nombre": faker.name(), "correo": faker.email(), "password": faker.password(), "role": "Cliente"}
+    response = client.post("/users/", json=user)
+    assert response.status_code == 200
+    user_id = response.json()["id"]
+    response = client.post("/token", data={"username": user["correo"], "password": user["password"]})
+    assert response.status_code == 200
+    return user_id, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def customer(test_db):
+    return _customer()
+
+def _product(quantity, price):
+    with TestingSessionLocal() as db:
+        product = Inventory(product_name=faker.word(), description="checkout", price=price, quantity=quantity)
+        db.add(product)
+        db.flush()
+        sale = Sale(product_id=product.id, price=price)
+        db.add(sale)
+        db.commit()
+        return product.id, sale.id
+
+def _on_hand(product_id):
+    with TestingSessionLocal() as db:
+        return db.get(Inventory, product_id).on_hand
+
+def _add_to_cart(headers, sale_id, quantity):
+    response = client.post("/cart/", json={"sale_id": sale_id, "quantity": quantity}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+def test_checkout_prices_withdraws_and_clears_the_cart(customer):
+    user_id, headers = customer
+    hammer, hammer_sale = _product(10, 1000.0)
+    nails, nails_sale = _product(100, 50.0)
+    _add_to_cart(headers, hammer_sale, 2)
+    _add_to_cart(headers, nails_sale, 30)
+    _add_to_cart(headers, nails_sale, 10)
+
+    response = client.post("/checkout/", json={"dispatch": DISPATCH}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [(item["quantity"], item["total"]) for item in body["items"]] == [(2, 2000.0), (40, 2000.0)]
+    assert body["total_amount"] == 4000.0
+    assert body["payment"]["amount"] == 4000 + 3000
+    assert body["payment"]["status"] == "pending"
+    assert body["dispatch"]["address"] == DISPATCH["address"]
+    assert (_on_hand(hammer), _on_hand(nails)) == (8, 60)
+    with TestingSessionLocal() as db:
+        assert db.query(CartItem).filter(CartItem.user_id == user_id).count() == 0
+        assert db.query(Reservation).filter(Reservation.product_id.in_([hammer, nails])).count() == 0
+        assert db.get(Payment, body["payment"]["id"]).user_id == user_id
+        assert db.get(Dispatch, body["dispatch"]["id"]).user_id == user_id
+
+def test_checkout_query_count_does_not_grow_with_the_cart(customer):
+    user_id, headers = customer
+    for _ in range(8):
+        _, sale_id = _product(10, 10.0)
+        _add_to_cart(headers, sale_id, 1)
+
+    # Líneas, movimientos de stock, holds, carrito, pago, despacho y los tres agregados de ventas:
+    # nueve sentencias con 8 o 800 líneas
+    with assert_max_queries(9):
+        response = client.post("/checkout/", json={"dispatch": DISPATCH}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()["items"]) == 8
+
+def test_checkout_with_an_empty_cart(customer):
+    _, headers = customer
+    response = client.post("/checkout/", json={"dispatch": DISPATCH}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cart is empty"
+
+def test_checkout_without_enough_stock_changes_nothing(customer):
+    user_id, headers = customer
+    plenty, plenty_sale = _product(50, 10.0)
+    scarce, scarce_sale = _product(5, 10.0)
+    _add_to_cart(headers, plenty_sale, 5)
+    _add_to_cart(headers, scarce_sale, 5)
+    with TestingSessionLocal() as db:
+        ledger.record_movement(db, scarce, -3, "withdrawal", minimum=3)
+        db.commit()
+
+    response = client.post("/checkout/", json={"dispatch": DISPATCH}, headers=headers)
+
+    assert response.status_code == 409
+    assert (_on_hand(plenty), _on_hand(scarce)) == (50, 2)
+    with TestingSessionLocal() as db:
+        assert db.query(CartItem).filter(CartItem.user_id == user_id).count() == 2
+        assert db.query(Payment).filter(Payment.user_id == user_id).count() == 0
+
+def test_checkout_respects_other_carts_holds(customer):
+    _, headers = customer
+    _, other_headers = _customer()
+    product, sale_id = _product(5, 10.0)
+    cart_item_id = _add_to_cart(headers, sale_id, 3)
+    _add_to_cart(other_headers, sale_id, 2)
+    with TestingSessionLocal() as db:
+        # Un recuento físico deja 4: el hold de 2 del otro cliente no puede usarse
+        ledger.adjust_to(db, product, 4)
+        db.commit()
+
+    assert client.post("/checkout/", json={"dispatch": DISPATCH}, headers=headers).status_code == 409
+    assert client.delete(f"/cart/{cart_item_id}", headers=headers).status_code == 200
+    assert client.post("/checkout/", json={"dispatch": DISPATCH}, headers=other_headers).status_code == 200
+    assert _on_hand(product) == 2
+
+def test_checkout_retry_with_idempotency_key(customer):
+    user_id, headers = customer
+    _, sale_id = _product(10, 10.0)
+    _add_to_cart(headers, sale_id, 1)
+    headers = {**headers, "Idempotency-Key": faker.uuid4()}
+
+    first = client.post("/checkout/", json={"dispatch": DISPATCH}, headers=headers)
+    second = client.post("/checkout/", json={"dispatch": DISPATCH}, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    with TestingSessionLocal() as db:
+        assert db.query(Payment).filter(Payment.user_id == user_id).count() == 1
+
+def test_checkout_requires_a_customer(test_db):
+    assert client.post("/checkout/", json={"dispatch": DISPATCH}).status_code == 401
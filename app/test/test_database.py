@@ -0,0 +1,60 @@
+import asyncio
+from unittest.mock import MagicMock
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.config import Settings
+from app.domain.inventory import async_service, schemas
+from database import Base, async_database_url, create_async_db_engine, create_db_engine
+import main  # noqa: F401  (registra todos los modelos en Base.metadata)
+
+def test_create_db_engine_applies_pragmas(tmp_path):
+    config = Settings(SQLITE_SYNCHRONOUS="NORMAL", SQLITE_BUSY_TIMEOUT_MS=1234, SQLITE_TEMP_STORE="MEMORY")
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pragmas.db'}", config)
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+        assert connection.execute(text("PRAGMA temp_store")).scalar() == 2
+        assert connection.execute(text("PRAGMA cache_size")).scalar() == config.SQLITE_CACHE_SIZE
+    engine.dispose()
+
+def test_create_db_engine_pool_settings(tmp_path):
+    config = Settings(DB_POOL_SIZE=3, DB_MAX_OVERFLOW=7)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}", config)
+    assert engine.pool.size() == 3
+    assert engine.pool._max_overflow == 7
+    engine.dispose()
+
+def test_create_db_engine_in_memory():
+    engine = create_db_engine("sqlite://")
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+    engine.dispose()
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert async_database_url("postgresql+asyncpg://db/ferremas") == "postgresql+asyncpg://db/ferremas"
+
+def test_async_engine_applies_pragmas_and_serves_async_services(tmp_path):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+
+    async def scenario():
+        engine = create_async_db_engine(url)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+            assert (await connection.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def read(item_id):
+            async with Session() as db:
+                return await async_service.get_inventory_item(db, item_id)
+
+        async with Session() as db:
+            item = schemas.InventoryCreate(product_name="Martillo", description="Acero", quantity=3)
+            created = await async_service.create_inventory_item(db, item, MagicMock(role="Bodega"))
+        items = await asyncio.gather(*(read(created.id) for _ in range(10)))
+        await engine.dispose()
+        return created, items
+
+    created, items = asyncio.run(scenario())
+    assert all(item.product_name == created.product_name for item in items)
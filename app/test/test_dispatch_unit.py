@@ -80,7 +80,7 @@ def test_list_dispatches_service():
     ]
     
     with patch.object(db.query(models.Dispatch), 'filter') as mock_filter:
-        mock_filter.return_value.offset.return_value.limit.return_value.all.return_value = expected_dispatches
+        mock_filter.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = expected_dispatches
         result = service.list_dispatches(db, user_id, skip=0, limit=10)
         assert len(result) == len(expected_dispatches)
         for res_dispatch, exp_dispatch in zip(result, expected_dispatches):
@@ -130,7 +130,7 @@ def test_list_dispatches_empty():
     user_id = 1
 
     with patch.object(db.query(models.Dispatch), 'filter') as mock_filter:
-        mock_filter.return_value.offset.return_value.limit.return_value.all.return_value = []
+        mock_filter.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = []
         result = service.list_dispatches(db, user_id, skip=0, limit=10)
         assert result == []
 
@@ -0,0 +1,196 @@
+import asyncio
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from faker import Faker
+from main import app
+from database import Base, create_async_db_engine
+from app.domain.idempotency import async_service, repository, service
+from app.domain.idempotency.models import IdempotencyKey
+from app.domain.payment import async_service as payment_async_service, schemas as payment_schemas
+from app.domain.payment.models import Payment
+from app.domain.user.models import User
+
+engine = create_engine("sqlite:///./test.db", connect_args={"check_same_thread": False})
+
+client = TestClient(app)
+faker = Faker()
+
+@pytest.fixture(scope="module")
+def test_db():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="module")
+def auth_headers(test_db):
+    user = {"nombre": faker.name(), "correo": faker.email(), "password": faker.password(), "role": "Cliente"}
+    assert client.post("/users/", json=user).status_code == 200
+    response = client.post("/token", data={"username": user["correo"], "password": user["password"]})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def test_retry_with_same_key_replays_the_stored_response(auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": faker.uuid4()}
+    first = client.post("/payments/", json={"amount": 1500}, headers=headers)
+    second = client.post("/payments/", json={"amount": 1500}, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+def test_same_key_with_a_different_body_is_rejected(auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": faker.uuid4()}
+    assert client.post("/payments/", json={"amount": 100}, headers=headers).status_code == 200
+    response = client.post("/payments/", json={"amount": 200}, headers=headers)
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Idempotency-Key was already used with a different request"
+
+def test_without_key_every_request_creates_a_payment(auth_headers):
+    first = client.post("/payments/", json={"amount": 300}, headers=auth_headers)
+    second = client.post("/payments/", json={"amount": 300}, headers=auth_headers)
+    assert first.json()["id"] != second.json()["id"]
+
+def test_fingerprint_ignores_key_order():
+    assert service.fingerprint("POST /payments", {"a": 1, "b": 2}) == service.fingerprint("POST /payments", {"b": 2, "a": 1})
+    assert service.fingerprint("POST /payments", {"a": 1}) != service.fingerprint("POST /checkout", {"a": 1})
+
+def test_in_flight_key_is_not_claimed_twice(db):
+    claim, _ = service.begin(db, 1, "k", "f")
+    assert claim is not None
+    duplicate, stored = service.begin(db, 1, "k", "f")
+    assert duplicate is None
+    assert stored.status_code is None
+    # La misma clave de otro usuario es independiente
+    assert service.begin(db, 2, "k", "f")[0] is not None
+
+def test_expired_key_is_reclaimed(db):
+    now = service.utcnow()
+    repository.claim_key(db, 1, "k", "old", now - timedelta(days=2), now - timedelta(days=1))
+    repository.complete_key(db, 1, "k", now - timedelta(days=2), 200, "{}", now - timedelta(days=1))
+    db.commit()
+
+    assert service.begin(db, 1, "k", "new")[0] is not None
+    row = db.get(IdempotencyKey, (1, "k"))
+    assert (row.fingerprint, row.status_code, row.response_body) == ("new", None, None)
+
+def test_release_keeps_completed_responses(db):
+    done, _ = service.begin(db, 1, "done", "f")
+    service.complete(db, done, 200, "{}")
+    db.commit()
+    failed, _ = service.begin(db, 1, "failed", "f")
+
+    service.release(db, done)
+    service.release(db, failed)
+    assert db.get(IdempotencyKey, (1, "done")) is not None
+    assert db.get(IdempotencyKey, (1, "failed")) is None
+
+def test_owner_whose_lease_expired_cannot_complete(db, monkeypatch):
+    monkeypatch.setattr(service.settings, "IDEMPOTENCY_LOCK_SECONDS", 0)
+    first, _ = service.begin(db, 1, "slow", "f")
+    # El lease del primero venció: el reintento reclama la clave y ejecuta
+    second, _ = service.begin(db, 1, "slow", "f")
+    assert second.claimed_at != first.claimed_at
+
+    db.add(Payment(user_id=1, amount=100, status="pending"))
+    with pytest.raises(HTTPException) as exc_info:
+        service.complete(db, first, 200, "{}")
+    assert exc_info.value.status_code == 409
+    # El efecto del perdedor se deshizo y su release no suelta el claim del nuevo dueño
+    assert db.query(Payment).count() == 0
+    service.release(db, first)
+    service.complete(db, second, 200, "{}")
+    db.commit()
+    assert db.get(IdempotencyKey, (1, "slow")).status_code == 200
+
+def test_begin_gives_up_after_a_few_attempts(db, monkeypatch):
+    # La clave desaparece cada vez entre el INSERT y la lectura
+    claims = []
+    monkeypatch.setattr(service.repository, "claim_key", lambda *args: claims.append(args) or False)
+    monkeypatch.setattr(service.repository, "get_key", lambda *args: None)
+    with pytest.raises(HTTPException) as exc_info:
+        service.begin(db, 1, "k", "f")
+    assert exc_info.value.status_code == 409
+    assert len(claims) == service.CLAIM_ATTEMPTS
+
+def test_sweep_removes_only_expired_keys(db):
+    now = service.utcnow()
+    repository.claim_key(db, 1, "old", "f", now - timedelta(days=2), now - timedelta(seconds=1))
+    repository.claim_key(db, 1, "fresh", "f", now, now + timedelta(days=1))
+    db.commit()
+
+    assert service.sweep_expired(db, batch_size=1) == 1
+    assert [row.key for row in db.query(IdempotencyKey)] == ["fresh"]
+
+def test_concurrent_duplicates_wait_for_the_first_request(tmp_path):
+    url = f"sqlite:///{tmp_path / 'idempotency.db'}"
+    payment = payment_schemas.PaymentCreate(amount=990)
+    fingerprint = service.fingerprint("POST /payments", payment.model_dump(mode="json"))
+
+    async def scenario():
+        engine = create_async_db_engine(url)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+        user = User(id=7, nombre="Cliente", correo="cliente@example.com", hashed_password="x", role="Cliente")
+        first_claimed = asyncio.Event()
+
+        async def first():
+            async with Session() as db:
+                claim, _ = await async_service.begin(db, user.id, "retry", fingerprint)
+                assert claim is not None
+                async with async_service.in_flight(db, claim):
+                    first_claimed.set()
+                    await asyncio.sleep(0.2)
+                    return await payment_async_service.create_payment(db, payment, user, claim)
+
+        async def duplicate():
+            await first_claimed.wait()
+            async with Session() as db:
+                return (await async_service.begin(db, user.id, "retry", fingerprint))[1]
+
+        created, stored = await asyncio.gather(first(), duplicate())
+        async with Session() as db:
+            payments = await db.run_sync(lambda session: session.query(Payment).count())
+        await engine.dispose()
+        return created, stored, payments
+
+    created, stored, payments = asyncio.run(scenario())
+    assert payments == 1
+    assert stored.status_code == 200
+    assert payment_schemas.PaymentResponse.model_validate_json(stored.response_body).id == created.id
+
+def test_waiting_on_a_stuck_request_times_out(tmp_path):
+    url = f"sqlite:///{tmp_path / 'stuck.db'}"
+
+    async def scenario():
+        engine = create_async_db_engine(url)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+        try:
+            async with Session() as db:
+                await db.run_sync(service.begin, 1, "stuck", "f")
+            async with Session() as db:
+                await async_service.begin(db, 1, "stuck", "f", wait_seconds=0.1)
+        finally:
+            await engine.dispose()
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(scenario())
+    assert exc_info.value.status_code == 409
@@ -7,6 +7,7 @@ from main import app
 from app.domain.inventory import models, schemas
 from app.domain.user.models import User
 from database import Base, get_db
+from app.test.query_count import assert_max_queries
 from faker import Faker
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -89,10 +90,11 @@ def test_read_inventory_item(test_db, token):
     assert create_response.status_code == 200
     item_id = create_response.json()["id"]
 
-    response = client.get(
-        f"/inventory/{item_id}",
-        headers={"Authorization": f"Bearer {token}"}
-    )
+    with assert_max_queries(1):
+        response = client.get(
+            f"/inventory/{item_id}",
+            headers={"Authorization": f"Bearer {token}"}
+        )
     assert response.status_code == 200
     data = response.json()
     assert data["product_name"] == fake_item["product_name"]
@@ -223,3 +225,151 @@ def test_delete_inventory_item_unauthorized(test_db, token):
     )
     assert response.status_code == 401  # Cambiado de 403 a 401
     assert response.json()["detail"] == "Not authenticated"
+
+def _create_item(token, product_name, description):
+    response = client.post(
+        "/inventory/",
+        json={"product_name": product_name, "description": description, "quantity": 5},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+def test_search_inventory_items(test_db, token):
+    hammer = _create_item(token, "Martillo carpintero", "Mango de madera")
+    _create_item(token, "Destornillador", "Punta de martillo magnética")
+
+    response = client.get("/inventory/search", params={"q": "martil"})
+    assert response.status_code == 200
+    data = response.json()
+    # El nombre pesa más que la descripción
+    assert [item["product_name"] for item in data] == ["Martillo carpintero", "Destornillador"]
+    assert data[0]["id"] == hammer["id"]
+
+    response = client.get("/inventory/search", params={"q": "martillo madera"})
+    assert [item["id"] for item in response.json()] == [hammer["id"]]
+
+    response = client.get("/inventory/search", params={"q": "martillo", "skip": 1, "limit": 1})
+    assert [item["product_name"] for item in response.json()] == ["Destornillador"]
+
+def test_search_ignores_fts_syntax(test_db, token):
+    response = client.get("/inventory/search", params={"q": '"* OR NEAR('})
+    assert response.status_code == 200
+    response = client.get("/inventory/search", params={"q": "***"})
+    assert response.status_code == 200
+    assert response.json() == []
+
+def test_search_follows_update_and_delete(test_db, token):
+    item = _create_item(token, "Serrucho", "Hoja de acero")
+    client.put(
+        f"/inventory/{item['id']}",
+        json={"product_name": "Sierra", "description": "Hoja de acero", "quantity": 5},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert client.get("/inventory/search", params={"q": "serrucho"}).json() == []
+    assert [i["id"] for i in client.get("/inventory/search", params={"q": "sierra"}).json()] == [item["id"]]
+
+    client.delete(f"/inventory/{item['id']}/5", headers={"Authorization": f"Bearer {token}"})
+    assert client.get("/inventory/search", params={"q": "sierra"}).json() == []
+
+def test_read_inventory_items_with_cursor(test_db, token):
+    for _ in range(3):
+        _create_item(token, faker.word(), faker.text())
+
+    seen = []
+    response = client.get("/inventory/", params={"limit": 2})
+    while True:
+        assert response.status_code == 200
+        seen += [item["id"] for item in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        # Una escritura entre páginas no duplica ni salta filas ya vistas
+        _create_item(token, faker.word(), faker.text())
+        response = client.get("/inventory/", params={"limit": 2, "after": cursor})
+        if not response.json():
+            break
+
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen))
+    all_ids = [item["id"] for item in client.get("/inventory/", params={"limit": 1000}).json()]
+    assert seen == all_ids
+
+def test_read_inventory_items_invalid_cursor(test_db):
+    response = client.get("/inventory/", params={"after": "xyz"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+def test_receive_stock_and_history(test_db, token):
+    item = _create_item(token, faker.word(), faker.text())
+    response = client.post(
+        f"/inventory/{item['id']}/receipts",
+        json={"quantity": 7},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["quantity"] == 12
+    assert client.get(f"/inventory/{item['id']}").json()["quantity"] == 12
+
+    response = client.get(f"/inventory/{item['id']}/stock", params={"at": "2100-01-01T00:00:00"})
+    assert response.status_code == 200, response.text
+    assert response.json()["quantity"] == 12
+    response = client.get(f"/inventory/{item['id']}/stock", params={"at": "2000-01-01T00:00:00"})
+    assert response.status_code == 404
+
+def test_receive_stock_unauthorized(test_db, token):
+    item = _create_item(token, faker.word(), faker.text())
+    response = client.post(f"/inventory/{item['id']}/receipts", json={"quantity": 7})
+    assert response.status_code == 401
+    response = client.post(
+        f"/inventory/{item['id']}/receipts",
+        json={"quantity": 0},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 422
+
+def test_read_inventory_item_is_cached_with_etag(test_db, token):
+    item = _create_item(token, "Taladro", "Percutor")
+
+    # La escritura solo invalida: la primera lectura llena la caché y la siguiente no toca la BD
+    client.get(f"/inventory/{item['id']}")
+    with assert_max_queries(0):
+        response = client.get(f"/inventory/{item['id']}")
+    assert response.status_code == 200
+    assert response.json() == item
+    etag = response.headers["ETag"]
+    assert "must-revalidate" in response.headers["Cache-Control"]
+
+    response = client.get(f"/inventory/{item['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    client.put(
+        f"/inventory/{item['id']}",
+        json={"product_name": "Taladro", "description": "Inalámbrico", "quantity": 7},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    response = client.get(f"/inventory/{item['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert (response.json()["description"], response.json()["quantity"]) == ("Inalámbrico", 7)
+    assert response.headers["ETag"] != etag
+
+def test_read_inventory_items_is_cached_until_a_write(test_db, token):
+    first = client.get("/inventory/", params={"limit": 1000})
+    with assert_max_queries(0):
+        second = client.get("/inventory/", params={"limit": 1000})
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+    item = _create_item(token, faker.word(), faker.text())
+    response = client.get("/inventory/", params={"limit": 1000}, headers={"If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.json()[-1]["id"] == item["id"]
+
+def test_withdrawal_refreshes_cached_stock(test_db, token):
+    item = _create_item(token, faker.word(), faker.text())
+    client.delete(f"/inventory/{item['id']}/2", headers={"Authorization": f"Bearer {token}"})
+    assert client.get(f"/inventory/{item['id']}").json()["quantity"] == 3
+    client.delete(f"/inventory/{item['id']}/3", headers={"Authorization": f"Bearer {token}"})
+    assert client.get(f"/inventory/{item['id']}").status_code == 404
@@ -0,0 +1,64 @@
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+from database import Base, create_db_engine
+from app.domain.inventory import service
+from app.domain.inventory.models import Inventory
+import main  # noqa: F401  (registra todas las tablas)
+
+WORKERS = 8
+HOT_SKUS = 3
+STOCK = 150
+
+@pytest.fixture
+def file_engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'stress.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+def test_concurrent_withdrawals_do_not_lose_updates(file_engine):
+    Session = sessionmaker(bind=file_engine, autoflush=False)
+    with Session() as db:
+        items = [Inventory(product_name=f"hot-{i}", description="stress", price=1.0, quantity=STOCK) for i in range(HOT_SKUS)]
+        db.add_all(items)
+        db.commit()
+        item_ids = [item.id for item in items]
+
+    bodega = SimpleNamespace(role="Bodega")
+    withdrawn = {item_id: 0 for item_id in item_ids}
+    rejected = []
+    lock = threading.Lock()
+    start = threading.Barrier(WORKERS)
+
+    def worker(n):
+        start.wait()
+        with Session() as db:
+            # Cada worker intenta sacar el doble de lo que le toca: el sobrante debe fallar
+            for attempt in range(STOCK * HOT_SKUS * 2 // WORKERS):
+                item_id = item_ids[(n + attempt) % HOT_SKUS]
+                try:
+                    service.delete_inventory_item(db, item_id, 1, bodega)
+                except HTTPException as exc:
+                    assert exc.status_code in (400, 404)
+                    rejected.append(exc.status_code)
+                    continue
+                with lock:
+                    withdrawn[item_id] += 1
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(WORKERS)]
+    started_at = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started_at
+
+    assert withdrawn == {item_id: STOCK for item_id in item_ids}
+    with Session() as db:
+        # Al llegar a 0 el ítem se elimina, igual que en el endpoint
+        assert db.query(Inventory).filter(Inventory.id.in_(item_ids)).count() == 0
+    print(f"{sum(withdrawn.values()) / elapsed:.0f} retiros/s con {WORKERS} workers")
@@ -0,0 +1,116 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from database import Base
+from app.config import settings
+from app.domain.inventory import ledger, repository, schemas, service
+from app.domain.inventory.models import Inventory, StockMovement, StockSnapshot
+import main  # noqa: F401  (registra todas las tablas)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+@pytest.fixture
+def product(db):
+    product = Inventory(product_name="Martillo", description="Acero", price=10.0, quantity=10)
+    db.add(product)
+    db.flush()
+    ledger.open_ledger(db, product.id, 10)
+    db.commit()
+    return product
+
+def _on_hand(db, product_id):
+    return db.get(Inventory, product_id, populate_existing=True).on_hand
+
+def test_movements_are_insert_only_until_snapshot(db, product, monkeypatch):
+    monkeypatch.setattr(settings, "STOCK_SNAPSHOT_INTERVAL", 100)
+    for _ in range(5):
+        ledger.record_movement(db, product.id, 2, "receipt")
+    ledger.record_movement(db, product.id, -3, "withdrawal", minimum=3)
+    db.commit()
+
+    row = db.get(Inventory, product.id, populate_existing=True)
+    assert (row.quantity, row.ledger_position) == (10, 0)
+    assert row.on_hand == 17
+    assert db.query(StockMovement).count() == 6
+
+def test_snapshot_folds_the_tail(db, product, monkeypatch):
+    monkeypatch.setattr(settings, "STOCK_SNAPSHOT_INTERVAL", 3)
+    movement_ids = [ledger.record_movement(db, product.id, 1, "receipt") for _ in range(4)]
+    db.commit()
+
+    row = db.get(Inventory, product.id, populate_existing=True)
+    assert (row.quantity, row.ledger_position) == (13, movement_ids[2])
+    assert ledger.tail_length(db, product.id) == 1
+    assert row.on_hand == 14
+    assert [s.quantity for s in db.query(StockSnapshot).order_by(StockSnapshot.movement_id)] == [10, 13]
+
+def test_conditional_withdrawal(db, product):
+    assert ledger.record_movement(db, product.id, -11, "withdrawal", minimum=11) is None
+    assert ledger.record_movement(db, product.id, -10, "withdrawal", minimum=10) is not None
+    db.commit()
+    assert _on_hand(db, product.id) == 0
+
+def test_unknown_product_records_nothing(db):
+    assert ledger.record_movement(db, 999, 5, "receipt") is None
+    assert repository.receive_stock(db, 999, 5) is None
+
+def test_adjust_to_records_the_difference(db, product):
+    ledger.record_movement(db, product.id, 5, "receipt")
+    ledger.adjust_to(db, product.id, 12)
+    assert ledger.adjust_to(db, product.id, 12) is None
+    db.commit()
+    assert _on_hand(db, product.id) == 12
+    assert [m.delta for m in db.query(StockMovement).order_by(StockMovement.id)] == [5, -3]
+
+def test_stock_at(db, product, monkeypatch):
+    monkeypatch.setattr(settings, "STOCK_SNAPSHOT_INTERVAL", 2)
+    opened_at = db.query(StockSnapshot).one().taken_at
+    db.add_all([
+        StockMovement(product_id=product.id, kind="receipt", delta=5, created_at=opened_at + timedelta(hours=1)),
+        StockMovement(product_id=product.id, kind="sale", delta=-2, created_at=opened_at + timedelta(hours=2)),
+    ])
+    db.commit()
+
+    assert ledger.stock_at(db, product.id, opened_at - timedelta(seconds=1)) is None
+    assert ledger.stock_at(db, product.id, opened_at) == 10
+    assert ledger.stock_at(db, product.id, opened_at + timedelta(minutes=90)) == 15
+    assert ledger.stock_at(db, product.id, opened_at + timedelta(hours=3)) == 13
+
+def test_ensure_schema_opens_the_ledger_of_existing_products(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE inventory (id INTEGER PRIMARY KEY, product_name VARCHAR, description VARCHAR, price FLOAT, quantity INTEGER)"
+        ))
+        connection.execute(text("INSERT INTO inventory (product_name, description, price, quantity) VALUES ('Martillo', 'Acero', 10.0, 7)"))
+
+    # Como en el arranque: el ledger primero y después create_all, que llena el catálogo
+    ledger.ensure_schema(engine)
+    Base.metadata.create_all(bind=engine)
+    ledger.ensure_schema(engine)
+
+    with sessionmaker(bind=engine)() as db:
+        assert [(s.product_id, s.movement_id, s.quantity) for s in db.query(StockSnapshot)] == [(1, 0, 7)]
+        assert ledger.stock_at(db, 1, datetime.utcnow() + timedelta(minutes=1)) == 7
+    engine.dispose()
+
+def test_create_inventory_item_commits_row_and_ledger_together(db):
+    item = schemas.InventoryCreate(product_name="Taladro", description="Percutor", quantity=4)
+    with patch.object(service.search, "index_item", side_effect=RuntimeError("fts")):
+        with pytest.raises(RuntimeError):
+            service.create_inventory_item(db, item, MagicMock(role="Bodega"))
+    db.rollback()
+
+    # Si falla el índice no queda ni la fila ni su snapshot
+    assert db.query(Inventory).count() == 0
+    assert db.query(StockSnapshot).count() == 0
@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import MagicMock, patch
 from sqlalchemy.orm import Session
 from app.domain.inventory import service, repository, schemas, models
+from app.domain.inventory.catalog_cache import CatalogCache, render_page
 from fastapi import HTTPException
 
 # Test repository functions
@@ -11,11 +12,12 @@ def test_create_inventory_item_repository():
     db_item = models.Inventory(id=1, **item.model_dump())
 
     with patch.object(db, 'add') as mock_add:
-        with patch.object(db, 'commit') as mock_commit:
+        with patch.object(db, 'flush') as mock_flush:
             with patch.object(db, 'refresh') as mock_refresh:
                 result = repository.create_inventory_item(db, item)
                 mock_add.assert_called_once_with(result)
-                mock_commit.assert_called_once()
+                mock_flush.assert_called_once()
+                db.commit.assert_not_called()
                 mock_refresh.assert_called_once_with(result)
                 assert result.product_name == item.product_name
                 assert result.description == item.description
@@ -39,7 +41,8 @@ def test_update_inventory_item_repository():
             result = repository.update_inventory_item(db, db_item, item_update)
             assert result.product_name == item_update.product_name
             assert result.description == item_update.description
-            assert result.quantity == item_update.quantity
+            # La cantidad va por el ledger, no se pisa el snapshot
+            assert result.quantity == 10
             mock_commit.assert_called_once()
             mock_refresh.assert_called_once_with(db_item)
 
@@ -77,6 +80,7 @@ def test_create_inventory_item_service():
     current_user = MagicMock()
     current_user.role = "Bodega"
     db_item = models.Inventory(id=1, **item.dict())
+    db_item.on_hand = 10
 
     with patch.object(repository, 'create_inventory_item', return_value=db_item):
         result = service.create_inventory_item(db, item, current_user)
@@ -100,11 +104,14 @@ def test_update_inventory_item_service():
     current_user = MagicMock()
     current_user.role = "Bodega"
     db_item = models.Inventory(id=item_id, product_name="Hammer", description="For hammering", quantity=10)
+    db_item.on_hand = 15
 
     with patch.object(repository, 'get_inventory_item', return_value=db_item):
-        with patch.object(repository, 'update_inventory_item', return_value=db_item):
+        with patch.object(repository, 'update_inventory_item', return_value=db_item), \
+             patch.object(service.ledger, 'adjust_to') as mock_adjust:
             result = service.update_inventory_item(db, item_id, item_update, current_user)
             assert result == db_item
+            mock_adjust.assert_called_once_with(db, item_id, item_update.quantity)
 
 def test_update_inventory_item_service_not_authorized():
     db = MagicMock(spec=Session)
@@ -124,12 +131,62 @@ def test_delete_inventory_item_service():
     quantity = 10
     current_user = MagicMock()
     current_user.role = "Bodega"
-    db_item = models.Inventory(id=item_id, product_name="Hammer", description="For hammering", quantity=quantity)
+    db_item = models.Inventory(id=item_id, product_name="Hammer", description="For hammering", quantity=0)
+    db_item.on_hand = 0
 
-    with patch.object(repository, 'get_inventory_item', return_value=db_item):
-        with patch.object(repository, 'delete_inventory_item', return_value=db_item):
+    with patch.object(repository, 'withdraw_stock', return_value=db_item) as mock_withdraw:
+        with patch.object(repository, 'delete_inventory_item', return_value=db_item) as mock_delete:
             result = service.delete_inventory_item(db, item_id, quantity, current_user)
             assert result == db_item
+            mock_withdraw.assert_called_once_with(db, item_id, quantity)
+            mock_delete.assert_called_once_with(db, db_item)
+
+def test_delete_inventory_item_service_partial():
+    db = MagicMock(spec=Session)
+    current_user = MagicMock()
+    current_user.role = "Bodega"
+    db_item = models.Inventory(id=1, product_name="Hammer", description="For hammering", quantity=4)
+    db_item.on_hand = 4
+
+    with patch.object(repository, 'withdraw_stock', return_value=db_item):
+        with patch.object(repository, 'delete_inventory_item') as mock_delete:
+            result = service.delete_inventory_item(db, 1, 6, current_user)
+            assert result.quantity == 4
+            mock_delete.assert_not_called()
+            db.commit.assert_called_once()
+
+def test_delete_inventory_item_service_insufficient_stock():
+    db = MagicMock(spec=Session)
+    current_user = MagicMock()
+    current_user.role = "Bodega"
+    db_item = models.Inventory(id=1, product_name="Hammer", description="For hammering", quantity=2)
+
+    with patch.object(repository, 'withdraw_stock', return_value=None):
+        with patch.object(repository, 'get_inventory_item', return_value=db_item):
+            with pytest.raises(HTTPException) as exc_info:
+                service.delete_inventory_item(db, 1, 5, current_user)
+    assert exc_info.value.status_code == 400
+    db.rollback.assert_called_once()
+
+def test_delete_inventory_item_service_not_found():
+    db = MagicMock(spec=Session)
+    current_user = MagicMock()
+    current_user.role = "Bodega"
+
+    with patch.object(repository, 'withdraw_stock', return_value=None):
+        with patch.object(repository, 'get_inventory_item', return_value=None):
+            with pytest.raises(HTTPException) as exc_info:
+                service.delete_inventory_item(db, 1, 5, current_user)
+    assert exc_info.value.status_code == 404
+
+def test_delete_inventory_item_service_rejects_non_positive_quantity():
+    db = MagicMock(spec=Session)
+    current_user = MagicMock()
+    current_user.role = "Bodega"
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.delete_inventory_item(db, 1, 0, current_user)
+    assert exc_info.value.status_code == 400
 
 def test_delete_inventory_item_service_not_authorized():
     db = MagicMock(spec=Session)
@@ -142,3 +199,35 @@ def test_delete_inventory_item_service_not_authorized():
         service.delete_inventory_item(db, item_id, quantity, current_user)
     assert exc_info.value.status_code == 403
     assert exc_info.value.detail == "Not authorized to delete inventory items"
+
+def test_catalog_cache_evicts_least_recently_used():
+    cache = CatalogCache(max_size=2)
+    version = cache.version
+    for key in ("a", "b"):
+        cache.put((key,), render_page(key.encode()), version)
+    cache.get(("a",))
+    cache.put(("c",), render_page(b"c"), version)
+    assert cache.get(("a",)) is not None
+    assert cache.get(("b",)) is None
+    assert len(cache) == 2
+
+def test_catalog_cache_drops_pages_read_before_a_write():
+    cache = CatalogCache(max_size=10)
+    version = cache.version
+    cache.publish()
+    # La página se leyó con la versión anterior: no debe quedar servida
+    assert not cache.put(("item", 1), render_page(b"old"), version)
+    assert cache.get(("item", 1)) is None
+
+def test_catalog_cache_publish_only_invalidates():
+    cache = CatalogCache(max_size=10)
+    cache.put(("list", 0, 10, None), render_page(b"[]"), cache.version)
+    cache.put(("item", 1), render_page(b'{"id": 1}'), cache.version)
+    version = cache.publish()
+    assert version == cache.version
+    assert len(cache) == 0
+    assert cache.get(("item", 1)) is None
+
+def test_render_page_etag_depends_on_content():
+    assert render_page(b"a").etag == render_page(b"a").etag
+    assert render_page(b"a").etag != render_page(b"b").etag
@@ -0,0 +1,40 @@
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException, Response
+from app.pagination import NEXT_CURSOR_HEADER, after_cursor, decode_cursor, encode_cursor, set_next_cursor
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == 42
+
+@pytest.mark.parametrize("cursor", ["no-es-base64!", encode_cursor("42"), "eyJpZCI6dHJ1ZX0", "e30"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor(cursor)
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == "Invalid cursor"
+
+def test_after_cursor_is_optional():
+    assert after_cursor(None) is None
+    assert after_cursor(encode_cursor(7)) == 7
+
+def test_next_cursor_only_on_full_page():
+    items = [SimpleNamespace(id=3), SimpleNamespace(id=5)]
+
+    response = Response()
+    assert set_next_cursor(response, items, 2) == items
+    assert decode_cursor(response.headers[NEXT_CURSOR_HEADER]) == 5
+
+    response = Response()
+    set_next_cursor(response, items, 10)
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+    response = Response()
+    set_next_cursor(response, items, None)
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+def test_next_cursor_with_another_key():
+    response = Response()
+    set_next_cursor(response, [SimpleNamespace(product_id=4), SimpleNamespace(product_id=9)], 2, key="product_id")
+    assert decode_cursor(response.headers[NEXT_CURSOR_HEADER]) == 9
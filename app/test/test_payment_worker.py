@@ -0,0 +1,175 @@
+import asyncio
+import pytest
+from datetime import timedelta
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from database import Base, create_async_db_engine
+from app.domain.payment import repository, service
+from app.domain.payment.gateway import GatewayResult, GatewayUnavailable, LocalGateway
+from app.domain.payment.models import Payment
+from app.domain.payment.worker import PaymentWorker
+import main  # noqa: F401  (registra todas las tablas)
+
+class ScriptedGateway:
+    def __init__(self, outcomes=None, latency_seconds=0.0):
+        self.outcomes = outcomes or {}
+        self.latency_seconds = latency_seconds
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def charge(self, payment_id, amount):
+        self.calls.append(payment_id)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency_seconds)
+            outcome = self.outcomes.get(amount, "approve")
+            if outcome == "error":
+                raise GatewayUnavailable("timeout")
+            return GatewayResult(approved=outcome == "approve", reference=f"ref-{payment_id}" if outcome == "approve" else None)
+        finally:
+            self.in_flight -= 1
+
+def _worker(gateway, **options):
+    config = {
+        "batch_size": 10,
+        "concurrency": 4,
+        "lease_seconds": 60,
+        "max_attempts": 3,
+        "retry_base_seconds": 2,
+        "retry_max_seconds": 30,
+    }
+    config.update(options)
+    return PaymentWorker(gateway, **config)
+
+@pytest.fixture
+def database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'payments.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    Session = sessionmaker(bind=sync_engine, autoflush=False)
+    yield url, Session
+    sync_engine.dispose()
+
+def _add_payments(Session, *amounts, **fields):
+    with Session() as db:
+        payments = [Payment(user_id=1, amount=amount, status="pending", **fields) for amount in amounts]
+        db.add_all(payments)
+        db.commit()
+        return [payment.id for payment in payments]
+
+def _run_once(url, worker):
+    async def scenario():
+        engine = create_async_db_engine(url)
+        try:
+            async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                return await worker.run_once(db)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(scenario())
+
+def _payments(Session):
+    with Session() as db:
+        return {payment.id: payment for payment in db.query(Payment).order_by(Payment.id)}
+
+def test_batch_is_charged_and_written_back(database):
+    url, Session = database
+    approved, declined = _add_payments(Session, 100, 200)
+    worker = _worker(ScriptedGateway({200: "decline"}))
+
+    assert _run_once(url, worker) == 2
+
+    payments = _payments(Session)
+    assert (payments[approved].status, payments[approved].gateway_reference) == ("approved", f"ref-{approved}")
+    assert (payments[declined].status, payments[declined].gateway_reference) == ("declined", None)
+    assert all(payment.attempts == 1 and payment.processed_at is not None for payment in payments.values())
+    assert worker.metrics()["outcomes"] == {"approved": 1, "declined": 1}
+    assert _run_once(url, worker) == 0
+
+def test_transient_failures_back_off_then_fail(database):
+    url, Session = database
+    (payment_id,) = _add_payments(Session, 500)
+    worker = _worker(ScriptedGateway({500: "error"}), max_attempts=2)
+
+    before = service.utcnow()
+    assert _run_once(url, worker) == 1
+    payment = _payments(Session)[payment_id]
+    assert (payment.status, payment.attempts, payment.processed_at) == ("pending", 1, None)
+    assert payment.next_attempt_at >= before + timedelta(seconds=2)
+    # Todavía en backoff: no se vuelve a reclamar
+    assert _run_once(url, worker) == 0
+
+    with Session() as db:
+        db.get(Payment, payment_id).next_attempt_at = before
+        db.commit()
+    assert _run_once(url, worker) == 1
+    payment = _payments(Session)[payment_id]
+    assert (payment.status, payment.attempts) == ("failed", 2)
+
+def test_expired_lease_is_reclaimed(database):
+    url, Session = database
+    now = service.utcnow()
+    with Session() as db:
+        stale_payment = Payment(user_id=1, amount=100, status="processing", attempts=1, next_attempt_at=now - timedelta(seconds=1))
+        live_payment = Payment(user_id=1, amount=100, status="processing", attempts=1, next_attempt_at=now + timedelta(minutes=1))
+        db.add_all([stale_payment, live_payment])
+        db.commit()
+        stale, live = stale_payment.id, live_payment.id
+    gateway = ScriptedGateway()
+
+    assert _run_once(url, _worker(gateway)) == 1
+    assert gateway.calls == [stale]
+    payments = _payments(Session)
+    assert (payments[stale].status, payments[stale].attempts) == ("approved", 2)
+    assert payments[live].status == "processing"
+
+def test_gateway_calls_respect_concurrency(database):
+    url, Session = database
+    _add_payments(Session, *[100] * 10)
+    gateway = ScriptedGateway(latency_seconds=0.02)
+
+    assert _run_once(url, _worker(gateway, concurrency=3)) == 10
+    assert gateway.max_in_flight == 3
+
+def test_retry_delay_is_exponential_and_capped():
+    worker = _worker(ScriptedGateway(), retry_base_seconds=2, retry_max_seconds=10)
+    assert [worker.retry_delay(attempts) for attempts in range(1, 6)] == [2, 4, 8, 10, 10]
+
+def test_backlog_counts_due_and_waiting_payments(database):
+    url, Session = database
+    now = service.utcnow()
+    _add_payments(Session, 100, next_attempt_at=now - timedelta(seconds=30))
+    _add_payments(Session, 100, next_attempt_at=now + timedelta(minutes=5))
+    with Session() as db:
+        db.add(Payment(user_id=1, amount=100, status="approved"))
+        db.commit()
+        backlog = service.get_backlog(db)
+
+    assert (backlog["queued"], backlog["due"]) == (2, 1)
+    assert backlog["oldest_due_age_seconds"] >= 30
+
+def test_local_gateway_declines_out_of_range_amounts():
+    gateway = LocalGateway(latency_seconds=0, max_amount=1000)
+    assert asyncio.run(gateway.charge(1, 500)).approved
+    assert not asyncio.run(gateway.charge(2, 5000)).approved
+    with pytest.raises(GatewayUnavailable):
+        asyncio.run(LocalGateway(latency_seconds=0, failure_rate=1.0).charge(3, 500))
+
+def test_ensure_schema_upgrades_legacy_payments(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE payments (id INTEGER PRIMARY KEY, user_id INTEGER, amount INTEGER NOT NULL, status VARCHAR)"))
+        connection.execute(text("INSERT INTO payments (user_id, amount, status) VALUES (1, 100, 'pending')"))
+
+    repository.ensure_schema(engine)
+    repository.ensure_schema(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("payments")}
+    assert {"attempts", "next_attempt_at", "created_at", "processed_at", "gateway_reference"} <= columns
+    with sessionmaker(bind=engine)() as db:
+        claimed = service.claim_payments(db, 10, 60)
+    assert [(row.id, row.attempts) for row in claimed] == [(1, 1)]
+    engine.dispose()
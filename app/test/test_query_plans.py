@@ -0,0 +1,358 @@
+import inspect
+import re
+import pytest
+from sqlalchemy import DateTime, create_engine, event, inspect as sql_inspect, literal, select, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from database import Base
+from app.indexes import CREATED_INDEXES, DROPPED_INDEXES, ensure_indexes
+from app.domain.analytics import repository as analytics_repository
+from app.domain.cart import repository as cart_repository, service as cart_service, schemas as cart_schemas
+from app.domain.cart.models import CartItem
+from app.domain.catalog import repository as catalog_repository
+from app.domain.checkout import repository as checkout_repository
+from app.domain.dispatch import repository as dispatch_repository, schemas as dispatch_schemas
+from app.domain.dispatch.models import Dispatch
+from datetime import date, datetime
+from app.domain.idempotency import repository as idempotency_repository
+from app.domain.inventory import ledger as inventory_ledger, repository as inventory_repository, schemas as inventory_schemas, search as inventory_search
+from app.domain.inventory.models import Inventory, StockMovement, StockSnapshot
+from app.domain.payment import repository as payment_repository, service as payment_service
+from app.domain.payment.models import Payment
+from app.domain.reservation import repository as reservation_repository, service as reservation_service
+from app.domain.sales import price_history as sales_price_history, repository as sales_repository, schemas as sales_schemas
+from app.domain.sales.models import Sale
+from app.domain.sucursal import repository as sucursal_repository, schemas as sucursal_schemas
+from app.domain.sucursal.models import Sucursal
+from app.domain.user import repository as user_repository, schemas as user_schemas
+from app.domain.user.models import User
+
+# Listados completos sin paginar: recorrer la tabla es el plan esperado
+FULL_LISTINGS = {
+    "app.domain.cart.repository.get_cart_item_details",
+    # Mantenimiento de una sola vez: buscar líneas repetidas obliga a agrupar la tabla entera
+    "app.domain.cart.repository.compact_cart_items",
+    # Reparación: recalcula el catálogo entero desde inventory
+    "app.domain.catalog.repository.rebuild",
+    # Top-N histórico: recorre el índice de la métrica en orden y corta en LIMIT
+    "app.domain.analytics.repository.get_top_products",
+    # Arranque: lee la definición de users en sqlite_master, que no tiene índices
+    "app.domain.user.repository.ensure_schema",
+}
+
+REPOSITORIES = [
+    analytics_repository,
+    cart_repository,
+    catalog_repository,
+    checkout_repository,
+    dispatch_repository,
+    idempotency_repository,
+    inventory_ledger,
+    inventory_repository,
+    inventory_search,
+    payment_repository,
+    reservation_repository,
+    sales_price_history,
+    sales_repository,
+    sucursal_repository,
+    user_repository,
+]
+
+def _dispatch_data():
+    return dispatch_schemas.DispatchCreate(address="Calle 1", username="juan", email="juan@example.com", phone="123")
+
+CASES = {
+    "app.domain.analytics.repository": {
+        "record_checkout": lambda db, ids: analytics_repository.record_checkout(
+            db, datetime(2024, 1, 3), [(ids["inventory"], 2, 19.0), (ids["spare_inventory"], 1, 5.0)]
+        ),
+        "get_top_products": lambda db, ids: analytics_repository.get_top_products(db, 5, "units"),
+        "get_top_products_between": lambda db, ids: analytics_repository.get_top_products_between(
+            db, date(2024, 1, 1), date(2024, 1, 31), 5
+        ),
+        "get_revenue": lambda db, ids: analytics_repository.get_revenue(db, date(2024, 1, 1), date(2024, 3, 31), "week"),
+        "get_product_sales": lambda db, ids: analytics_repository.get_product_sales(db, ids["inventory"]),
+    },
+    "app.domain.cart.repository": {
+        "get_cart_items": lambda db, ids: cart_repository.get_cart_items(db, after_id=0),
+        "create_cart_item": lambda db, ids: cart_repository.create_cart_item(
+            db, cart_schemas.CartItemCreate(sale_id=ids["sale"], quantity=1), ids["user"]
+        ),
+        "get_cart_item": lambda db, ids: cart_repository.get_cart_item(db, ids["cart_item"]),
+        "upsert_cart_items": lambda db, ids: cart_repository.upsert_cart_items(
+            db, [{"user_id": ids["user"], "sale_id": ids["sale"], "quantity": 1}, {"user_id": ids["user"], "sale_id": ids["spare_sale"], "quantity": 2}]
+        ),
+        "ensure_schema": lambda db, ids: cart_repository.ensure_schema(db.get_bind()),
+        "compact_cart_items": lambda db, ids: cart_repository.compact_cart_items(db),
+        "get_user_cart_items": lambda db, ids: cart_repository.get_user_cart_items(db, ids["user"], [ids["cart_item"]]),
+        "clear_cart": lambda db, ids: cart_repository.clear_cart(db, ids["user"]),
+        "delete_abandoned": lambda db, ids: cart_repository.delete_abandoned(db, datetime(2100, 1, 1), 100),
+        "get_cart_item_details": lambda db, ids: cart_repository.get_cart_item_details(db),
+        "get_cart_summary_lines": lambda db, ids: cart_repository.get_cart_summary_lines(db, ids["user"]),
+    },
+    "app.domain.cart.service": {
+        "get_cart_items": lambda db, ids: cart_service.get_cart_items(db, ids["user"], limit=10, after_id=0),
+        "get_cart_item": lambda db, ids: cart_service.get_cart_item(db, ids["cart_item"], ids["user"]),
+        "update_cart_item": lambda db, ids: cart_service.update_cart_item(
+            db, ids["cart_item"], cart_schemas.CartItemCreate(sale_id=ids["sale"], quantity=3), ids["user"]
+        ),
+        "delete_cart_item": lambda db, ids: cart_service.delete_cart_item(db, ids["cart_item"], ids["user"]),
+    },
+    "app.domain.catalog.repository": {
+        "get_entries": lambda db, ids: catalog_repository.get_entries(db, after_id=0, in_stock=True),
+        "get_entry": lambda db, ids: catalog_repository.get_entry(db, ids["inventory"]),
+        "rebuild": lambda db, ids: catalog_repository.rebuild(db),
+    },
+    "app.domain.checkout.repository": {
+        "get_checkout_lines": lambda db, ids: checkout_repository.get_checkout_lines(db, ids["user"]),
+        "withdraw_cart_stock": lambda db, ids: checkout_repository.withdraw_cart_stock(db, ids["user"], reservation_service.utcnow()),
+    },
+    "app.domain.dispatch.repository": {
+        "create_dispatch": lambda db, ids: dispatch_repository.create_dispatch(db, _dispatch_data(), ids["user"], 3000),
+        "get_dispatch": lambda db, ids: dispatch_repository.get_dispatch(db, ids["dispatch"]),
+        "update_dispatch": lambda db, ids: dispatch_repository.update_dispatch(db, ids["dispatch"], _dispatch_data()),
+        "delete_dispatch": lambda db, ids: dispatch_repository.delete_dispatch(db, ids["dispatch"]),
+        "list_dispatches": lambda db, ids: dispatch_repository.list_dispatches(db, ids["user"], after_id=0),
+    },
+    "app.domain.idempotency.repository": {
+        "claim_key": lambda db, ids: idempotency_repository.claim_key(
+            db, ids["user"], "retry", "f", datetime(2024, 1, 1), datetime(2024, 1, 2)
+        ),
+        "get_key": lambda db, ids: idempotency_repository.get_key(db, ids["user"], "retry"),
+        "complete_key": lambda db, ids: idempotency_repository.complete_key(
+            db, ids["user"], "retry", datetime(2024, 1, 1), 200, "{}", datetime(2024, 1, 2)
+        ),
+        "release_key": lambda db, ids: idempotency_repository.release_key(db, ids["user"], "retry", datetime(2024, 1, 1)),
+        "delete_expired": lambda db, ids: idempotency_repository.delete_expired(db, datetime(2024, 1, 3), 100),
+    },
+    "app.domain.inventory.repository": {
+        "get_inventory_item": lambda db, ids: inventory_repository.get_inventory_item(db, ids["inventory"]),
+        "get_inventory_items": lambda db, ids: inventory_repository.get_inventory_items(db, after_id=0),
+        "create_inventory_item": lambda db, ids: inventory_repository.create_inventory_item(
+            db, inventory_schemas.InventoryCreate(product_name="Taladro", description="Percutor", quantity=5)
+        ),
+        "update_inventory_item": lambda db, ids: inventory_repository.update_inventory_item(
+            db,
+            db.get(Inventory, ids["inventory"]),
+            inventory_schemas.InventoryCreate(product_name="Martillo", description="Acero", quantity=8),
+        ),
+        "delete_inventory_item": lambda db, ids: inventory_repository.delete_inventory_item(db, db.get(Inventory, ids["spare_inventory"])),
+        "withdraw_stock": lambda db, ids: inventory_repository.withdraw_stock(db, ids["inventory"], 2),
+        "receive_stock": lambda db, ids: inventory_repository.receive_stock(db, ids["inventory"], 2),
+    },
+    "app.domain.inventory.ledger": {
+        "ensure_schema": lambda db, ids: inventory_ledger.ensure_schema(db.get_bind()),
+        "record_movements": lambda db, ids: inventory_ledger.record_movements(
+            db, select(literal(ids["inventory"]), literal("receipt"), literal(1), literal(datetime(2024, 1, 3), type_=DateTime()))
+        ),
+        "record_movement": lambda db, ids: inventory_ledger.record_movement(db, ids["inventory"], -1, "withdrawal", minimum=1),
+        "adjust_to": lambda db, ids: inventory_ledger.adjust_to(db, ids["inventory"], 3),
+        "tail_length": lambda db, ids: inventory_ledger.tail_length(db, ids["inventory"]),
+        "take_snapshot": lambda db, ids: inventory_ledger.take_snapshot(db, ids["inventory"], 1),
+        "open_ledger": lambda db, ids: inventory_ledger.open_ledger(db, ids["spare_inventory"], 3),
+        "stock_at": lambda db, ids: inventory_ledger.stock_at(db, ids["inventory"], datetime(2100, 1, 1)),
+    },
+    "app.domain.inventory.search": {
+        "ensure_index": lambda db, ids: inventory_search.ensure_index(db.get_bind()),
+        "rebuild": lambda db, ids: inventory_search.rebuild(db),
+        "index_item": lambda db, ids: inventory_search.index_item(db, ids["inventory"], "Martillo", "Acero"),
+        "unindex_item": lambda db, ids: inventory_search.unindex_item(db, ids["inventory"]),
+        "match_expression": lambda db, ids: db.execute(
+            text("SELECT rowid FROM inventory_fts WHERE inventory_fts MATCH :q"),
+            {"q": inventory_search.match_expression("mart")},
+        ),
+        "search_inventory_items": lambda db, ids: inventory_search.search_inventory_items(db, "martillo acero"),
+    },
+    "app.domain.payment.repository": {
+        "ensure_schema": lambda db, ids: payment_repository.ensure_schema(db.get_bind()),
+        "claim_batch": lambda db, ids: payment_repository.claim_batch(db, datetime(2100, 1, 1), datetime(2100, 1, 2), 50),
+        "apply_results": lambda db, ids: payment_repository.apply_results(
+            db, [{"id": ids["payment"], "status": "approved", "next_attempt_at": datetime(2100, 1, 1), "processed_at": None, "gateway_reference": "ref"}]
+        ),
+        "get_backlog": lambda db, ids: payment_repository.get_backlog(db, datetime(2100, 1, 1)),
+    },
+    "app.domain.payment.service": {
+        "get_payment": lambda db, ids: payment_service.get_payment(db, ids["payment"]),
+        "list_payments": lambda db, ids: payment_service.list_payments(db, db.get(User, ids["user"])),
+    },
+    "app.domain.reservation.repository": {
+        "create_hold": lambda db, ids: reservation_repository.create_hold(
+            db, ids["cart_item"], ids["inventory"], 1, reservation_service.utcnow(), reservation_service.utcnow()
+        ),
+        "create_holds": lambda db, ids: reservation_repository.create_holds(
+            db, [ids["cart_item"]], reservation_service.utcnow(), reservation_service.utcnow()
+        ),
+        "get_hold": lambda db, ids: reservation_repository.get_hold(db, ids["cart_item"]),
+        "delete_holds": lambda db, ids: reservation_repository.delete_holds(db, [ids["cart_item"]]),
+        "delete_user_holds": lambda db, ids: reservation_repository.delete_user_holds(db, ids["user"]),
+        "delete_hold": lambda db, ids: reservation_repository.delete_hold(db, ids["cart_item"]),
+        "get_availability": lambda db, ids: reservation_repository.get_availability(db, ids["inventory"], reservation_service.utcnow()),
+        "release_expired": lambda db, ids: reservation_repository.release_expired(db, reservation_service.utcnow(), 100),
+    },
+    "app.domain.sales.price_history": {
+        "record_price": lambda db, ids: sales_price_history.record_price(db, ids["sale"], 9.75, datetime(2024, 1, 3)),
+        "record_prices": lambda db, ids: sales_price_history.record_prices(
+            db, Sale.product_id == ids["inventory"], datetime(2024, 1, 3)
+        ),
+        "get_sale_prices": lambda db, ids: sales_price_history.get_sale_prices(
+            db, ids["sale"], datetime(2024, 1, 1), datetime(2024, 2, 1)
+        ),
+        "get_price_changes": lambda db, ids: sales_price_history.get_price_changes(
+            db, datetime(2024, 1, 1), datetime(2024, 2, 1), ids["sale"]
+        ),
+    },
+    "app.domain.sales.repository": {
+        "update_prices": lambda db, ids: sales_repository.update_prices(db, None, "martillo", 10, None),
+        "count_non_positive_prices": lambda db, ids: sales_repository.count_non_positive_prices(db, [ids["inventory"]], None),
+        "get_sales": lambda db, ids: sales_repository.get_sales(db, after_id=0, expand_product=True),
+        "create_sale": lambda db, ids: sales_repository.create_sale(db, sales_schemas.SaleCreate(product_id=ids["inventory"], price=9.5)),
+        "get_sale": lambda db, ids: sales_repository.get_sale(db, ids["sale"], expand_product=True),
+        "get_existing_sale_ids": lambda db, ids: sales_repository.get_existing_sale_ids(db, {ids["sale"], ids["spare_sale"]}),
+        "update_sale": lambda db, ids: sales_repository.update_sale(
+            db, ids["sale"], sales_schemas.SaleCreate(product_id=ids["inventory"], price=11.0)
+        ),
+        "delete_sale": lambda db, ids: sales_repository.delete_sale(db, ids["spare_sale"]),
+    },
+    "app.domain.sucursal.repository": {
+        "create_sucursal": lambda db, ids: sucursal_repository.create_sucursal(
+            db, sucursal_schemas.SucursalCreate(nombre="Centro", direccion="Calle 2", telefono="456")
+        ),
+        "get_sucursal": lambda db, ids: sucursal_repository.get_sucursal(db, ids["sucursal"]),
+        "get_sucursales": lambda db, ids: sucursal_repository.get_sucursales(db, after_id=0),
+        "update_sucursal": lambda db, ids: sucursal_repository.update_sucursal(
+            db,
+            db.get(Sucursal, ids["sucursal"]),
+            sucursal_schemas.SucursalCreate(nombre="Norte", direccion="Calle 3", telefono="789"),
+        ),
+        "delete_sucursal": lambda db, ids: sucursal_repository.delete_sucursal(db, db.get(Sucursal, ids["sucursal"])),
+    },
+    "app.domain.user.repository": {
+        "get_user": lambda db, ids: user_repository.get_user(db, ids["user"]),
+        "get_user_by_email": lambda db, ids: user_repository.get_user_by_email(db, "plan@example.com"),
+        "get_token_version": lambda db, ids: user_repository.get_token_version(db, "plan@example.com"),
+        "ensure_schema": lambda db, ids: user_repository.ensure_schema(db.get_bind()),
+        "get_users": lambda db, ids: user_repository.get_users(db, after_id=0),
+        "create_user": lambda db, ids: user_repository.create_user(
+            db, User(nombre="Ana", correo="ana@example.com", hashed_password="x", role="Cliente")
+        ),
+        "update_user": lambda db, ids: user_repository.update_user(
+            db,
+            db.get(User, ids["user"]),
+            user_schemas.UserUpdate(nombre="Ana", correo="ana@example.com", role="Cliente"),
+        ),
+        "delete_user": lambda db, ids: user_repository.delete_user(db, db.get(User, ids["spare_user"])),
+    },
+}
+
+def _seed(db):
+    user = User(nombre="Plan", correo="plan@example.com", hashed_password="x", role="Cliente")
+    product = Inventory(product_name="Martillo", description="Acero", price=10.0, quantity=10)
+    sucursal = Sucursal(nombre="Centro", direccion="Calle 1", telefono="123")
+    # Filas sin dependientes para los casos de borrado
+    spare_user = User(nombre="Libre", correo="libre@example.com", hashed_password="x", role="Cliente")
+    spare_product = Inventory(product_name="Alicate", description="Corte", price=5.0, quantity=3)
+    db.add_all([user, product, sucursal, spare_user, spare_product])
+    db.flush()
+    sale = Sale(product_id=product.id, price=9.5)
+    spare_sale = Sale(product_id=product.id, price=7.5)
+    db.add_all([sale, spare_sale])
+    db.flush()
+    cart_item = CartItem(user_id=user.id, sale_id=sale.id, quantity=2)
+    dispatch = Dispatch(address="Calle 1", username="plan", email="plan@example.com", phone="1", user_id=user.id)
+    payment = Payment(user_id=user.id, amount=100, status="pending")
+    snapshot = StockSnapshot(product_id=product.id, movement_id=0, quantity=10, taken_at=datetime(2024, 1, 1))
+    movement = StockMovement(product_id=product.id, kind="receipt", delta=5, created_at=datetime(2024, 1, 2))
+    db.add_all([cart_item, dispatch, payment, snapshot, movement])
+    db.commit()
+    return {
+        "user": user.id,
+        "inventory": product.id,
+        "sucursal": sucursal.id,
+        "sale": sale.id,
+        "cart_item": cart_item.id,
+        "dispatch": dispatch.id,
+        "payment": payment.id,
+        "spare_user": spare_user.id,
+        "spare_inventory": spare_product.id,
+        "spare_sale": spare_sale.id,
+    }
+
+def _full_scans(connection, statements):
+    scans = []
+    for statement, parameters in statements:
+        if not re.match(r"\s*(SELECT|UPDATE|DELETE|INSERT INTO \w+ .*SELECT|WITH)", statement, re.S | re.I):
+            continue
+        plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        # Recorrer el resultado de una subconsulta (co-rutina o materializada) no es recorrer una tabla
+        subqueries = {match.group(1) for detail in plan if (match := re.match(r"(?:CO-ROUTINE|MATERIALIZE) (\w+)", detail))}
+        for detail in plan:
+            match = re.match(r"SCAN (?!CONSTANT ROW)(\w+)", detail)
+            if match and match.group(1) not in subqueries and "VIRTUAL TABLE" not in detail:
+                scans.append(f"{detail} <- {statement}")
+    return scans
+
+@pytest.fixture
+def plan_db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    ids = _seed(db)
+    db.expunge_all()
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # executemany: el plan es el mismo para todas las filas, basta el primer juego de parámetros
+        statements.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    yield db, ids, statements, engine
+    event.remove(engine, "before_cursor_execute", capture)
+    db.close()
+    engine.dispose()
+
+@pytest.mark.parametrize(
+    "module_name,function_name",
+    [(module_name, function_name) for module_name, cases in CASES.items() for function_name in cases],
+)
+def test_query_plan_has_no_full_scan(plan_db, module_name, function_name):
+    db, ids, statements, engine = plan_db
+    CASES[module_name][function_name](db, ids)
+    captured = list(statements)
+    statements.clear()
+    assert captured, f"{module_name}.{function_name} did not run any SQL"
+
+    with engine.connect() as connection:
+        scans = _full_scans(connection, captured)
+    if f"{module_name}.{function_name}" in FULL_LISTINGS:
+        return
+    assert not scans, "\n".join(scans)
+
+def test_every_repository_function_has_a_plan_case():
+    for module in REPOSITORIES:
+        functions = {
+            name
+            for name, function in inspect.getmembers(module, inspect.isfunction)
+            if function.__module__ == module.__name__ and not name.startswith("_")
+        }
+        missing = functions - set(CASES[module.__name__])
+        assert not missing, f"{module.__name__} has no query plan case for {sorted(missing)}"
+
+def test_ensure_indexes_upgrades_legacy_databases(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    # Base anterior a la revisión: sin los índices nuevos y con los de escritura
+    with engine.begin() as connection:
+        for name in CREATED_INDEXES:
+            connection.execute(text(f"DROP INDEX {name}"))
+        connection.execute(text("CREATE INDEX ix_dispatches_address ON dispatches (address)"))
+        connection.execute(text("CREATE INDEX ix_users_nombre ON users (nombre)"))
+        connection.execute(text("CREATE INDEX ix_inventory_product_name ON inventory (product_name)"))
+
+    ensure_indexes(engine)
+    ensure_indexes(engine)
+
+    inspector = sql_inspect(engine)
+    indexes = {index["name"] for table in inspector.get_table_names() for index in inspector.get_indexes(table)}
+    assert set(CREATED_INDEXES) <= indexes
+    assert not indexes & set(DROPPED_INDEXES)
+    engine.dispose()
@@ -0,0 +1,89 @@
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from database import Base
+from app.domain.cart.models import CartItem
+from app.domain.inventory.models import Inventory
+from app.domain.reservation import repository, service
+from app.domain.reservation.models import Reservation
+from app.domain.sales.models import Sale
+from app.domain.user.models import User
+import main  # noqa: F401  (registra todas las tablas)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+@pytest.fixture
+def product(db):
+    user = User(nombre="Cliente", correo="cliente@example.com", hashed_password="x", role="Cliente")
+    product = Inventory(product_name="Martillo", description="Acero", price=10.0, quantity=10)
+    db.add_all([user, product])
+    db.flush()
+    # Una oferta por línea: el carrito no admite dos líneas de la misma oferta
+    sales = [Sale(product_id=product.id, price=9.5) for _ in range(6)]
+    db.add_all(sales)
+    db.flush()
+    db.add_all(CartItem(user_id=user.id, sale_id=sale.id, quantity=1) for sale in sales)
+    db.commit()
+    return product
+
+def _cart_item_ids(db):
+    return [item.id for item in db.query(CartItem).order_by(CartItem.id)]
+
+def test_hold_reduces_availability(db, product):
+    first, second = _cart_item_ids(db)[:2]
+    service.hold_stock(db, first, product.id, 4)
+    service.hold_stock(db, second, product.id, 5)
+    db.commit()
+
+    availability = service.get_availability(db, product.id)
+    assert (availability.on_hand, availability.held, availability.available) == (10, 9, 1)
+
+def test_hold_beyond_available_is_rejected(db, product):
+    first, second = _cart_item_ids(db)[:2]
+    service.hold_stock(db, first, product.id, 8)
+    with pytest.raises(HTTPException) as exc_info:
+        service.hold_stock(db, second, product.id, 3)
+    assert exc_info.value.status_code == 409
+    assert repository.get_hold(db, second) is None
+
+def test_hold_is_renewed_per_cart_item(db, product):
+    first = _cart_item_ids(db)[0]
+    service.hold_stock(db, first, product.id, 8)
+    # Cambiar la cantidad de la misma línea reemplaza su hold, no lo suma
+    service.hold_stock(db, first, product.id, 10)
+    db.commit()
+    assert db.query(Reservation).count() == 1
+    assert service.get_availability(db, product.id).available == 0
+
+def test_expired_holds_do_not_count(db, product):
+    first = _cart_item_ids(db)[0]
+    past = service.utcnow() - timedelta(minutes=1)
+    db.add(Reservation(cart_item_id=first, product_id=product.id, quantity=10, expires_at=past))
+    db.commit()
+    assert service.get_availability(db, product.id).available == 10
+
+def test_sweep_releases_expired_in_batches(db, product):
+    ids = _cart_item_ids(db)
+    past = service.utcnow() - timedelta(minutes=1)
+    future = service.utcnow() + timedelta(minutes=10)
+    db.add_all(Reservation(cart_item_id=cart_item_id, product_id=product.id, quantity=1, expires_at=past) for cart_item_id in ids[:5])
+    db.add(Reservation(cart_item_id=ids[5], product_id=product.id, quantity=1, expires_at=future))
+    db.commit()
+
+    assert service.sweep_expired(db, batch_size=2) == 5
+    assert [hold.cart_item_id for hold in db.query(Reservation)] == [ids[5]]
+
+def test_availability_unknown_product(db):
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_availability(db, 999)
+    assert exc_info.value.status_code == 404
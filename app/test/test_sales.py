@@ -5,8 +5,12 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from main import app
 from app.domain.sales import models, schemas
+from app.domain.inventory import search
+from app.domain.inventory.models import Inventory
 from app.domain.user.models import User
 from database import Base, get_db
+from app.test.query_count import assert_max_queries
+from app.pagination import encode_cursor
 from faker import Faker
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -107,10 +111,11 @@ def test_read_sales(test_db, token):
         headers={"Authorization": f"Bearer {token}"}
     )
 
-    response = client.get(
-        "/sales/",
-        headers={"Authorization": f"Bearer {token}"}
-    )
+    with assert_max_queries(1):
+        response = client.get(
+            "/sales/",
+            headers={"Authorization": f"Bearer {token}"}
+        )
     assert response.status_code == 200
     data = response.json()
     assert len(data) > 0
@@ -225,3 +230,190 @@ def test_delete_sale_unauthorized(test_db, token):
     )
     assert response.status_code == 401
     assert response.json()["detail"] == "Not authenticated"
+
+def _product_with_sales(count):
+    with TestingSessionLocal() as db:
+        product = Inventory(product_name=faker.word(), description=faker.text(), price=10.0, quantity=8)
+        db.add(product)
+        db.flush()
+        sales = [models.Sale(product_id=product.id, price=5.0 + i) for i in range(count)]
+        db.add_all(sales)
+        db.commit()
+        return product.id, [sale.id for sale in sales]
+
+def _cursor_before(sale_id):
+    return encode_cursor(sale_id - 1)
+
+def test_read_sales_expand_product(test_db, token):
+    product_id, sale_ids = _product_with_sales(3)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Ofertas y productos en una sola sentencia, sin una consulta por producto
+    with assert_max_queries(1):
+        response = client.get("/sales/", params={"expand": "product", "after": _cursor_before(sale_ids[0])}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    data = [sale for sale in response.json() if sale["id"] in sale_ids]
+    assert [sale["id"] for sale in data] == sale_ids
+    assert all(sale["product"]["id"] == product_id for sale in data)
+    assert data[0]["product"]["quantity"] == 8
+    assert "product_name" in data[0]["product"]
+
+    plain = client.get("/sales/", params={"after": _cursor_before(sale_ids[0])}, headers=headers).json()
+    assert all("product" not in sale for sale in plain)
+
+def test_read_sale_expand_product(test_db, token):
+    product_id, (sale_id,) = _product_with_sales(1)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get(f"/sales/{sale_id}", params={"expand": "product"}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["product"]["id"] == product_id
+    assert "product" not in client.get(f"/sales/{sale_id}", headers=headers).json()
+
+def test_read_sales_rejects_unknown_expansion(test_db, token):
+    response = client.get("/sales/", params={"expand": "cart_items"}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 422
+
+def _prices(sale_ids):
+    with TestingSessionLocal() as db:
+        return [db.get(models.Sale, sale_id).price for sale_id in sale_ids]
+
+def test_update_prices_by_product_ids(test_db, token):
+    first, first_sales = _product_with_sales(2)
+    second, second_sales = _product_with_sales(1)
+    untouched, untouched_sales = _product_with_sales(1)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # UPDATE, historial y control de precios: tres sentencias con 3 o 50.000 ofertas
+    with assert_max_queries(3):
+        response = client.patch("/sales/prices", json={"product_ids": [first, second], "percent": -10}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"updated": 3}
+    assert _prices(first_sales + second_sales) == [4.5, 5.4, 4.5]
+    assert _prices(untouched_sales) == [5.0]
+    # El catálogo lo siguen los triggers de la misma sentencia: precio de la oferta más reciente
+    assert client.get(f"/catalog/{first}").json()["price"] == 5.4
+
+    response = client.patch("/sales/prices", json={"product_ids": [untouched], "amount": 1.25}, headers=headers)
+    assert response.json() == {"updated": 1}
+    assert _prices(untouched_sales) == [6.25]
+
+def test_update_prices_by_product_name(test_db, token):
+    with TestingSessionLocal() as db:
+        products = [
+            Inventory(product_name=name, description="precios", price=10.0, quantity=1)
+            for name in ("Taladro percutor", "Taladro inalámbrico", "Sierra circular")
+        ]
+        db.add_all(products)
+        db.flush()
+        for product in products:
+            search.index_item(db, product.id, product.product_name, product.description)
+        sales = [models.Sale(product_id=product.id, price=20.0) for product in products]
+        db.add_all(sales)
+        db.commit()
+        sale_ids = [sale.id for sale in sales]
+
+    response = client.patch(
+        "/sales/prices", json={"product_name": "taladro", "amount": -5}, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.json() == {"updated": 2}
+    assert _prices(sale_ids) == [15.0, 15.0, 20.0]
+
+def test_update_prices_rejects_non_positive_results(test_db, token):
+    product_id, sale_ids = _product_with_sales(2)
+
+    response = client.patch(
+        "/sales/prices", json={"product_ids": [product_id], "amount": -5.5}, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Price change would leave 1 sales at or below zero"
+    # Todo o nada: tampoco cambió la oferta que sí quedaba positiva
+    assert _prices(sale_ids) == [5.0, 6.0]
+
+@pytest.mark.parametrize("body", [
+    {"percent": 5},
+    {"product_ids": [1], "product_name": "martillo", "percent": 5},
+    {"product_ids": [1]},
+    {"product_ids": [1], "percent": 5, "amount": 1},
+    {"product_ids": [], "percent": 5},
+    {"product_ids": [1], "percent": -100},
+])
+def test_update_prices_validates_the_request(test_db, token, body):
+    response = client.patch("/sales/prices", json=body, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 422
+
+def test_update_prices_unauthorized(test_db):
+    fake_user = {"nombre": faker.name(), "correo": faker.email(), "password": faker.password(), "role": "Cliente"}
+    assert client.post("/users/", json=fake_user).status_code == 200
+    token = client.post("/token", data={"username": fake_user["correo"], "password": fake_user["password"]}).json()["access_token"]
+
+    response = client.patch("/sales/prices", json={"product_ids": [1], "percent": 5}, headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 403
+
+def test_price_history_records_every_price(test_db, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    product_id, _ = _product_with_sales(0)
+    sale_id = client.post("/sales/", json={"product_id": product_id, "price": 10.0}, headers=headers).json()["id"]
+    client.put(f"/sales/{sale_id}", json={"product_id": product_id, "price": 12.35}, headers=headers)
+    # Mismo precio: no es un cambio
+    client.put(f"/sales/{sale_id}", json={"product_id": product_id, "price": 12.35}, headers=headers)
+    client.patch("/sales/prices", json={"product_ids": [product_id], "percent": 10}, headers=headers)
+
+    with assert_max_queries(1):
+        response = client.get(f"/sales/{sale_id}/prices", headers=headers)
+
+    points = response.json()
+    assert [point["price"] for point in points] == [10.0, 12.35, 13.59]
+    assert [point["changed_at"] for point in points] == sorted(point["changed_at"] for point in points)
+    with TestingSessionLocal() as db:
+        assert [row.price_cents for row in db.query(models.SalePrice).filter(models.SalePrice.sale_id == sale_id)] == [1000, 1235, 1359]
+
+    since = points[1]["changed_at"]
+    ranged = client.get(f"/sales/{sale_id}/prices", params={"since": since, "until": points[2]["changed_at"]}, headers=headers).json()
+    assert [point["price"] for point in ranged] == [12.35]
+
+    # La oferta borrada conserva su historial
+    client.delete(f"/sales/{sale_id}", headers=headers)
+    assert len(client.get(f"/sales/{sale_id}/prices", headers=headers).json()) == 3
+    assert client.get("/sales/999999/prices", headers=headers).status_code == 404
+
+def test_price_changes_feed_pages_through_a_bulk_change(test_db, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    product_id, sale_ids = _product_with_sales(3)
+    client.patch("/sales/prices", json={"product_ids": [product_id], "amount": 1}, headers=headers)
+    with TestingSessionLocal() as db:
+        changed_at = db.query(models.SalePrice).filter(models.SalePrice.sale_id == sale_ids[0]).order_by(models.SalePrice.changed_at.desc()).first().changed_at_time
+
+    # Las tres ofertas comparten changed_at: se sigue con (since, after_sale_id)
+    first = client.get("/sales/price-changes", params={"since": changed_at.isoformat(), "limit": 2}, headers=headers).json()
+    assert [(point["sale_id"], point["price"]) for point in first] == [(sale_ids[0], 6.0), (sale_ids[1], 7.0)]
+    rest = client.get(
+        "/sales/price-changes",
+        params={"since": first[-1]["changed_at"], "after_sale_id": first[-1]["sale_id"], "limit": 2},
+        headers=headers,
+    ).json()
+    assert [(point["sale_id"], point["price"]) for point in rest] == [(sale_ids[2], 8.0)]
+
+def test_price_history_is_seeded_on_existing_databases(tmp_path):
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=legacy, tables=[table for table in Base.metadata.sorted_tables if table is not models.SalePrice.__table__])
+    with sessionmaker(bind=legacy)() as db:
+        product = Inventory(product_name="Martillo", description="Acero", price=10.0, quantity=1)
+        db.add(product)
+        db.flush()
+        sale = models.Sale(product_id=product.id, price=9.99)
+        db.add(sale)
+        db.commit()
+        sale_id = sale.id
+
+    Base.metadata.create_all(bind=legacy)
+
+    with sessionmaker(bind=legacy)() as db:
+        assert [(row.sale_id, row.price_cents) for row in db.query(models.SalePrice)] == [(sale_id, 999)]
+    legacy.dispose()
@@ -0,0 +1,150 @@
+from datetime import date, datetime
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from faker import Faker
+from main import app
+from database import Base
+from app.domain.analytics import repository
+from app.domain.analytics.models import DailySales
+from app.domain.inventory.models import Inventory
+from app.domain.reservation.service import utcnow
+from app.domain.sales.models import Sale
+from app.test.query_count import assert_max_queries
+
+engine = create_engine("sqlite:///./test.db", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+client = TestClient(app)
+faker = Faker()
+
+DISPATCH = {"address": "Av. Siempre Viva 742", "username": "cliente", "email": "cliente@example.com", "phone": "555"}
+
+@pytest.fixture(scope="module")
+def test_db():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def db(test_db):
+    # Cada test parte de agregados vacíos
+    with TestingSessionLocal() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            if table.name.startswith("sales_daily") or table.name.startswith("sales_product"):
+                session.execute(table.delete())
+        session.commit()
+        yield session
+
+def _headers(role):
+    user = {"nombre": faker.name(), "correo": faker.email(), "password": faker.password(), "role": role}
+    assert client.post("/users/", json=user).status_code == 200
+    response = client.post("/token", data={"username": user["correo"], "password": user["password"]})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def _product(price, quantity=100):
+    with TestingSessionLocal() as session:
+        product = Inventory(product_name=faker.unique.word(), description="analytics", price=price, quantity=quantity)
+        session.add(product)
+        session.flush()
+        sale = Sale(product_id=product.id, price=price)
+        session.add(sale)
+        session.commit()
+        return product.id, sale.id
+
+def _buy(headers, *lines):
+    for sale_id, quantity in lines:
+        response = client.post("/cart/", json={"sale_id": sale_id, "quantity": quantity}, headers=headers)
+        assert response.status_code == 200, response.text
+    response = client.post("/checkout/", json={"dispatch": DISPATCH}, headers=headers)
+    assert response.status_code == 200, response.text
+
+def test_checkout_feeds_the_rollups(db):
+    seller = _headers("Vendedor")
+    customer = _headers("Cliente")
+    hammer, hammer_sale = _product(1000.0)
+    nails, nails_sale = _product(50.0)
+    discounted_nails = Sale(product_id=nails, price=40.0)
+    db.add(discounted_nails)
+    db.commit()
+
+    _buy(customer, (hammer_sale, 2), (nails_sale, 10), (discounted_nails.id, 5))
+    _buy(customer, (nails_sale, 30))
+
+    with assert_max_queries(1):
+        response = client.get("/sales/analytics/top-products", params={"by": "units"}, headers=seller)
+    assert response.status_code == 200, response.text
+    top = [(row["product_id"], row["orders"], row["units"], row["revenue"]) for row in response.json()]
+    assert top == [(nails, 2, 45, 2200.0), (hammer, 1, 2, 2000.0)]
+
+    top = client.get("/sales/analytics/top-products", params={"limit": 1}, headers=seller).json()
+    assert [row["product_id"] for row in top] == [nails]
+
+    today = utcnow().date().isoformat()
+    with assert_max_queries(1):
+        response = client.get("/sales/analytics/revenue", headers=seller)
+    assert response.json() == [{"period": today, "orders": 2, "units": 47, "revenue": 4200.0}]
+
+    with assert_max_queries(1):
+        response = client.get(f"/sales/analytics/products/{hammer}", headers=seller)
+    assert response.json()["units"] == 2
+    assert response.json()["revenue"] == 2000.0
+
+def test_ranges_and_periods(db):
+    hammer, _ = _product(10.0)
+    saw, _ = _product(20.0)
+    # Lunes 2024-01-01 .. miércoles 2024-01-31
+    repository.record_checkout(db, datetime(2024, 1, 1, 10), [(hammer, 1, 10.0)])
+    repository.record_checkout(db, datetime(2024, 1, 3, 10), [(hammer, 2, 20.0), (saw, 1, 20.0)])
+    repository.record_checkout(db, datetime(2024, 1, 8, 10), [(saw, 5, 100.0)])
+    repository.record_checkout(db, datetime(2024, 2, 1, 10), [(hammer, 1, 10.0)])
+    db.commit()
+    admin = _headers("Administrador")
+    january = {"since": "2024-01-01", "until": "2024-01-31"}
+
+    weeks = client.get("/sales/analytics/revenue", params={**january, "period": "week"}, headers=admin).json()
+    assert [(row["period"], row["orders"], row["revenue"]) for row in weeks] == [("2024-01-01", 2, 50.0), ("2024-01-08", 1, 100.0)]
+    months = client.get("/sales/analytics/revenue", params={"since": "2024-01-01", "until": "2024-02-29", "period": "month"}, headers=admin).json()
+    assert [(row["period"], row["units"]) for row in months] == [("2024-01-01", 9), ("2024-02-01", 1)]
+
+    top = client.get("/sales/analytics/top-products", params={"since": "2024-01-01", "until": "2024-01-03"}, headers=admin).json()
+    assert [(row["product_id"], row["revenue"]) for row in top] == [(hammer, 30.0), (saw, 20.0)]
+    top = client.get("/sales/analytics/top-products", headers=admin).json()
+    assert [(row["product_id"], row["revenue"]) for row in top] == [(saw, 120.0), (hammer, 40.0)]
+
+    response = client.get(f"/sales/analytics/products/{hammer}", params={"since": "2024-02-01"}, headers=admin)
+    assert (response.json()["orders"], response.json()["units"]) == (1, 1)
+    assert db.get(DailySales, date(2024, 1, 3)).units == 3
+
+def test_deleted_products_keep_their_history(db):
+    admin = _headers("Administrador")
+    product = Inventory(product_name="Descontinuado", description="analytics", price=10.0, quantity=0)
+    db.add(product)
+    db.flush()
+    product_id = product.id
+    repository.record_checkout(db, datetime(2024, 1, 1), [(product_id, 3, 30.0)])
+    db.commit()
+    db.delete(product)
+    db.commit()
+
+    response = client.get(f"/sales/analytics/products/{product_id}", headers=admin)
+    assert response.status_code == 200
+    assert (response.json()["product_name"], response.json()["units"]) == (None, 3)
+    assert client.get("/sales/analytics/products/999999", headers=admin).status_code == 404
+
+def test_a_product_without_sales_reports_zero(db):
+    product_id, _ = _product(10.0)
+    response = client.get(f"/sales/analytics/products/{product_id}", headers=_headers("Vendedor"))
+    assert response.status_code == 200
+    assert (response.json()["orders"], response.json()["units"], response.json()["revenue"]) == (0, 0, 0.0)
+
+def test_analytics_require_seller_or_admin(db):
+    customer = _headers("Cliente")
+    assert client.get("/sales/analytics/top-products", headers=customer).status_code == 403
+    assert client.get("/sales/analytics/revenue", headers=customer).status_code == 403
+    assert client.get("/sales/analytics/revenue").status_code == 401
+
+def test_invalid_range(db):
+    response = client.get("/sales/analytics/revenue", params={"since": "2024-02-01", "until": "2024-01-01"}, headers=_headers("Vendedor"))
+    assert response.status_code == 400
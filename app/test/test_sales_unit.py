@@ -26,7 +26,7 @@ def test_get_sales_repository():
         models.Sale(id=1, product_id=1, price=20.5),
         models.Sale(id=2, product_id=2, price=30.0)
     ]
-    db.query().offset().limit().all.return_value = expected_sales
+    db.query().order_by().offset().limit().all.return_value = expected_sales
     actual_sales = repository.get_sales(db, skip=0, limit=10)
     assert actual_sales == expected_sales
 
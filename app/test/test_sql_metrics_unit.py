@@ -0,0 +1,85 @@
+import logging
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from app.sql_metrics import QueryStats, SQLStatsMiddleware, capture_queries, endpoint_stats, instrument_engine
+from app.test.query_count import assert_max_queries
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+instrument_engine(engine)
+
+def _app(debug=True, threshold=3):
+    app = FastAPI()
+    app.add_middleware(SQLStatsMiddleware, debug=debug, n_plus_one_threshold=threshold)
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        with engine.connect() as connection:
+            return {"value": connection.execute(text("SELECT :id"), {"id": item_id}).scalar()}
+
+    @app.get("/loop")
+    def loop():
+        with engine.connect() as connection:
+            for i in range(5):
+                connection.execute(text("SELECT :i"), {"i": i})
+        return {}
+
+    return app
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    endpoint_stats.reset()
+    yield
+    endpoint_stats.reset()
+
+def test_query_stats_tracks_slowest_and_repeated():
+    stats = QueryStats()
+    stats.record("SELECT 1", 0.001)
+    stats.record("SELECT 2", 0.005)
+    stats.record("SELECT 1", 0.002)
+    assert stats.count == 3
+    assert stats.total_time == pytest.approx(0.008)
+    assert stats.slowest_statement == "SELECT 2"
+    assert stats.repeated(2) == {"SELECT 1": 2}
+
+def test_debug_headers():
+    client = TestClient(_app(debug=True))
+    response = client.get("/items/7")
+    assert response.status_code == 200
+    assert response.headers["X-DB-Query-Count"] == "1"
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
+    assert float(response.headers["X-DB-Slowest-Ms"]) <= float(response.headers["X-DB-Time-Ms"])
+
+def test_no_headers_outside_debug():
+    client = TestClient(_app(debug=False))
+    response = client.get("/items/7")
+    assert "X-DB-Query-Count" not in response.headers
+
+def test_aggregates_by_route_template():
+    client = TestClient(_app())
+    client.get("/items/1")
+    client.get("/items/2")
+    metrics = endpoint_stats.metrics()
+    assert metrics["GET /items/{item_id}"]["requests"] == 2
+    assert metrics["GET /items/{item_id}"]["queries_max"] == 1
+
+def test_n_plus_one_is_logged(caplog):
+    client = TestClient(_app(threshold=3))
+    with caplog.at_level(logging.WARNING, logger="app.sql_metrics"):
+        client.get("/loop")
+    assert "N+1" in caplog.text
+    assert endpoint_stats.metrics()["GET /loop"]["n_plus_one_requests"] == 1
+
+def test_capture_queries_across_threads():
+    client = TestClient(_app())
+    with capture_queries() as stats:
+        client.get("/loop")
+    assert stats.count == 5
+
+def test_assert_max_queries_fails_over_limit():
+    client = TestClient(_app())
+    with pytest.raises(AssertionError, match="at most 2 queries, got 5"):
+        with assert_max_queries(2):
+            client.get("/loop")
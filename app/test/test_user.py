@@ -2,10 +2,10 @@ import pytest
 from fastapi import Depends
 from fastapi.testclient import TestClient
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from main import app
-from app.domain.user import models, schemas
+from app.domain.user import models, repository, schemas
 from database import Base, get_db
 from faker import Faker
 
@@ -156,3 +156,24 @@ def test_delete_user(test_db, test_user):
     # Verificar que el usuario ha sido eliminado
     response = client.get(f"/users/{user_id}")
     assert response.status_code == 404
+
+def test_ensure_schema_stops_reusing_user_ids(tmp_path):
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy.begin() as connection:
+        connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, nombre VARCHAR, correo VARCHAR, hashed_password VARCHAR, role VARCHAR)"))
+        connection.execute(text("CREATE UNIQUE INDEX ix_users_correo ON users (correo)"))
+        connection.execute(text("INSERT INTO users (nombre, correo, hashed_password, role) VALUES ('Ana', 'ana@example.com', 'x', 'Administrador')"))
+    Base.metadata.create_all(bind=legacy)
+
+    repository.ensure_schema(legacy)
+    repository.ensure_schema(legacy)
+
+    with legacy.begin() as connection:
+        assert connection.execute(text("SELECT id, correo, token_version FROM users")).all() == [(1, "ana@example.com", 0)]
+        connection.execute(text("DELETE FROM users WHERE id = 1"))
+        connection.execute(text("INSERT INTO users (nombre, correo, hashed_password, role) VALUES ('Ana', 'ana@example.com', 'x', 'Cliente')"))
+        assert connection.execute(text("SELECT id FROM users")).scalar_one() == 2
+    # Las demás tablas siguen apuntando a users
+    assert inspect(legacy).get_foreign_keys("payments")[0]["referred_table"] == "users"
+    assert {index["name"] for index in inspect(legacy).get_indexes("users")} == {"ix_users_correo"}
+    legacy.dispose()
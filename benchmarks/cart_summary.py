@@ -0,0 +1,80 @@
+"""Compara GET /cart_summary antes (2N+1 consultas) y después (una consulta).
+
+Uso: python -m benchmarks.cart_summary
+"""
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from app.domain.cart import service
+from app.domain.cart.models import CartItem
+from app.domain.inventory.models import Inventory
+from app.domain.sales.models import Sale
+from app.domain.user.models import User
+import app.domain.dispatch.models  # noqa: F401  (relaciones de User)
+import app.domain.payment.models  # noqa: F401
+
+CART_SIZES = [10, 100, 250, 500]
+REPEAT = 20
+
+
+def legacy_summary(db, user_id):
+    cart_items = db.query(CartItem).filter(CartItem.user_id == user_id).all()
+    summary = []
+    for item in cart_items:
+        sale = db.query(Sale).filter(Sale.id == item.sale_id).first()
+        inventory = db.query(Inventory).filter(Inventory.id == sale.product_id).first()
+        summary.append({
+            "product_name": inventory.product_name,
+            "quantity": item.quantity,
+            "price": sale.price,
+            "total": item.quantity * sale.price,
+        })
+    return {"items": summary, "total_amount": sum(item["total"] for item in summary)}
+
+
+def seed(db, user_id, size):
+    for i in range(size):
+        product = Inventory(product_name=f"producto-{user_id}-{i}", description="bench", price=10.0, quantity=100)
+        db.add(product)
+        db.flush()
+        sale = Sale(product_id=product.id, price=9.99)
+        db.add(sale)
+        db.flush()
+        db.add(CartItem(user_id=user_id, sale_id=sale.id, quantity=2))
+    db.commit()
+
+
+def timed(fn, db, user_id):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        db.expire_all()
+        fn(db, user_id)
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        print(f"{'items':>6} {'legacy ms':>10} {'single ms':>10} {'speedup':>8}")
+        with Session() as db:
+            for size in CART_SIZES:
+                user = User(nombre="bench", correo=f"bench{size}@example.com", hashed_password="x", role="Cliente")
+                db.add(user)
+                db.commit()
+                seed(db, user.id, size)
+
+                legacy_ms = timed(legacy_summary, db, user.id)
+                single_ms = timed(service.get_cart_summary, db, user.id)
+                print(f"{size:>6} {legacy_ms:>10.2f} {single_ms:>10.2f} {legacy_ms / single_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
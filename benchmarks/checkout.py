@@ -0,0 +1,105 @@
+"""Latencia de un pedido: flujo de varias llamadas (resumen, pago, despacho, stock y carrito) vs POST /checkout.
+
+Corre en proceso con TestClient: no incluye la red, que en el flujo viejo se paga en cada llamada.
+
+Uso: python -m benchmarks.checkout [pedidos] [líneas]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# La app lee DATABASE_URL al importarse: la base del benchmark va antes que cualquier import de la app
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+# Sin el worker de pagos compitiendo por la escritura durante la medición
+os.environ.setdefault("PAYMENT_WORKER_ENABLED", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from database import SessionLocal  # noqa: E402
+from main import app  # noqa: E402
+from app.domain.sales.models import Sale  # noqa: E402
+from app.sql_metrics import capture_queries  # noqa: E402
+
+STOCK = 1_000_000
+DISPATCH = {"address": "Av. Siempre Viva 742", "username": "bench", "email": "bench@example.com", "phone": "555"}
+
+
+def login(client, role):
+    user = {"nombre": role, "correo": f"{role.lower()}@example.com", "password": "secret", "role": role}
+    client.post("/users/", json=user)
+    token = client.post("/token", data={"username": user["correo"], "password": user["password"]}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def seed_products(client, bodega, lines):
+    products = []
+    for i in range(lines):
+        item = {"product_name": f"producto-{i}", "description": "bench", "price": 10.0, "quantity": STOCK}
+        product_id = client.post("/inventory/", json=item, headers=bodega).json()["id"]
+        with SessionLocal() as db:
+            sale = Sale(product_id=product_id, price=10.0)
+            db.add(sale)
+            db.commit()
+            products.append((product_id, sale.id))
+    return products
+
+
+def fill_cart(client, cliente, products):
+    for _, sale_id in products:
+        client.post("/cart/", json={"sale_id": sale_id, "quantity": 2}, headers=cliente)
+
+
+def legacy_order(client, cliente, bodega, products):
+    summary = client.get("/cart_summary/", headers=cliente).json()
+    client.post("/payments/", json={"amount": round(summary["total_amount"]) + 3000}, headers=cliente)
+    client.post("/dispatch/", json=DISPATCH, headers=cliente)
+    for product_id, _ in products:
+        client.delete(f"/inventory/{product_id}/2", headers=bodega)
+    for item in client.get("/cart/", headers=cliente).json():
+        client.delete(f"/cart/{item['id']}", headers=cliente)
+    return 4 + 2 * len(products)
+
+
+def checkout_order(client, cliente, bodega, products):
+    response = client.post("/checkout/", json={"dispatch": DISPATCH}, headers=cliente)
+    assert response.status_code == 200, response.text
+    return 1
+
+
+def run(name, order, client, cliente, bodega, products, orders):
+    timings, requests, queries = [], 0, 0
+    for _ in range(orders):
+        fill_cart(client, cliente, products)
+        with capture_queries() as stats:
+            start = time.perf_counter()
+            requests = order(client, cliente, bodega, products)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = stats.count
+    timings.sort()
+    p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+    print(
+        f"{name:<10} peticiones={requests:>4} sql={queries:>4} "
+        f"mediana={statistics.median(timings):>8.2f} ms p95={p95:>8.2f} ms"
+    )
+    return statistics.median(timings)
+
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    with TestClient(app) as client:
+        cliente = login(client, "Cliente")
+        bodega = login(client, "Bodega")
+        products = seed_products(client, bodega, lines)
+        print(f"{orders} pedidos de {lines} líneas")
+        legacy = run("multi", legacy_order, client, cliente, bodega, products, orders)
+        single = run("checkout", checkout_order, client, cliente, bodega, products, orders)
+        print(f"speedup {legacy / single:.1f}x")
+    _tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
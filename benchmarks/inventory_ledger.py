@@ -0,0 +1,92 @@
+"""Escrituras concurrentes de stock: contador único en inventory vs ledger de movimientos.
+
+Uso: python -m benchmarks.inventory_ledger [hilos] [segundos] [skus]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, create_db_engine
+from app.config import settings
+from app.domain.inventory import ledger
+from app.domain.inventory.models import Inventory
+import app.domain.cart.models  # noqa: F401  (registra el resto de tablas)
+import app.domain.dispatch.models  # noqa: F401
+import app.domain.payment.models  # noqa: F401
+import app.domain.reservation.models  # noqa: F401
+import app.domain.sales.models  # noqa: F401
+import app.domain.user.models  # noqa: F401
+
+STOCK = 1_000_000
+
+
+def counter_write(db, item_id, delta):
+    db.execute(update(Inventory).where(Inventory.id == item_id).values(quantity=Inventory.quantity + delta))
+    db.commit()
+
+
+def ledger_write(db, item_id, delta):
+    ledger.record_movement(db, item_id, delta, "receipt" if delta > 0 else "withdrawal")
+    db.commit()
+
+
+def run(name, write, threads, seconds, skus):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            db.add_all(Inventory(product_name=f"hot-{i}", description="bench", price=1.0, quantity=STOCK) for i in range(skus))
+            db.commit()
+
+        counts, errors = [], []
+        deadline = time.perf_counter() + seconds
+
+        def worker():
+            done = 0
+            rng = random.Random()
+            with Session() as db:
+                while time.perf_counter() < deadline:
+                    try:
+                        write(db, rng.randint(1, skus), rng.choice((1, -1)))
+                        done += 1
+                    except OperationalError:
+                        db.rollback()
+                        errors.append(1)
+            counts.append(done)
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+        # Lectura del stock vigente: snapshot + cola
+        with Session() as db:
+            start = time.perf_counter()
+            for item_id in range(1, skus + 1):
+                db.get(Inventory, item_id, populate_existing=True).on_hand
+            read_ms = (time.perf_counter() - start) / skus * 1000
+        engine.dispose()
+
+    print(f"{name:<8} escrituras/s={sum(counts) / seconds:>8.0f} errores={len(errors):>5} lectura on_hand={read_ms:.3f} ms")
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    skus = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    print(f"snapshot cada {settings.STOCK_SNAPSHOT_INTERVAL} movimientos")
+    run("counter", counter_write, threads, seconds, skus)
+    run("ledger", ledger_write, threads, seconds, skus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Búsqueda de productos: LIKE sobre inventory vs índice FTS5 ordenado por bm25.
+
+LIKE corta en las primeras 10 filas sin ordenar, así que solo gana en términos
+muy frecuentes; con pocos resultados recorre la tabla completa.
+
+Uso: python -m benchmarks.inventory_search [productos]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, create_db_engine
+from app.domain.inventory import search
+from app.domain.inventory.models import FTS_TABLE, Inventory
+import app.domain.cart.models  # noqa: F401  (registra el resto de tablas)
+import app.domain.dispatch.models  # noqa: F401
+import app.domain.payment.models  # noqa: F401
+import app.domain.sales.models  # noqa: F401
+import app.domain.user.models  # noqa: F401
+
+CATEGORIES = ["martillo", "taladro", "sierra", "llave", "tornillo", "clavo", "alicate", "lija", "pintura", "cemento",
+         "tubo", "cable", "brocha", "nivel", "huincha", "pala", "rastrillo", "manguera", "candado", "bisagra"] + [
+    f"categoria{k}" for k in range(180)
+]
+VOCABULARY = [f"palabra{k}" for k in range(50_000)] + ["cobre", "blanca", "acero"]
+BRANDS = ["stanley", "bosch", "makita", "dewalt", "truper", "bauker", "black", "irwin", "tramontina", "ubermann"]
+QUERIES = ["martillo", "tala", "llave tubo bosch", "cable cobre", "tx42424"]
+REPEAT = 20
+
+
+def seed(engine, products):
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    with engine.begin() as connection:
+        connection.execute(
+            Inventory.__table__.insert(),
+            [
+                {
+                    "product_name": f"{rng.choice(CATEGORIES)} {rng.choice(BRANDS)} tx{i}",
+                    "description": " ".join(rng.choices(VOCABULARY, k=8)),
+                    "price": 10.0,
+                    "quantity": 100,
+                }
+                for i in range(products)
+            ],
+        )
+    with sessionmaker(bind=engine)() as db:
+        search.rebuild(db)
+
+
+def like_search(db, query):
+    conditions = " AND ".join(f"(product_name LIKE :t{i} OR description LIKE :t{i})" for i in range(len(query.split())))
+    params = {f"t{i}": f"%{term}%" for i, term in enumerate(query.split())}
+    return db.execute(text(f"SELECT id FROM inventory WHERE {conditions} LIMIT 10"), params).all()
+
+
+def timed(fn, db, query):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn(db, query)
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        seed(engine, products)
+        print(f"{products} productos")
+        print(f"{'query':<22} {'matches':>8} {'like ms':>9} {'fts ms':>9}")
+        with sessionmaker(bind=engine)() as db:
+            for query in QUERIES:
+                like_ms = timed(like_search, db, query)
+                fts_ms = timed(search.search_inventory_items, db, query)
+                matches = db.execute(
+                    text(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q"),
+                    {"q": search.match_expression(query)},
+                ).scalar()
+                print(f"{query:<22} {matches:>8} {like_ms:>9.2f} {fts_ms:>9.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
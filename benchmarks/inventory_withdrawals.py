@@ -0,0 +1,91 @@
+"""Retiros de stock concurrentes sobre SKUs calientes: leer-comprobar-escribir vs UPDATE condicional.
+
+Uso: python -m benchmarks.inventory_withdrawals [hilos] [segundos] [skus]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, create_db_engine
+from app.domain.inventory import repository
+from app.domain.inventory.models import Inventory
+import app.domain.cart.models  # noqa: F401  (registra el resto de tablas)
+import app.domain.dispatch.models  # noqa: F401
+import app.domain.payment.models  # noqa: F401
+import app.domain.sales.models  # noqa: F401
+import app.domain.user.models  # noqa: F401
+
+STOCK = 10_000_000
+
+
+def legacy_withdraw(db, item_id, quantity):
+    item = db.get(Inventory, item_id, populate_existing=True)
+    if item.quantity < quantity:
+        db.rollback()
+        return False
+    item.quantity -= quantity
+    db.commit()
+    return True
+
+
+def conditional_withdraw(db, item_id, quantity):
+    ok = repository.withdraw_stock(db, item_id, quantity) is not None
+    db.commit() if ok else db.rollback()
+    return ok
+
+
+def run(name, withdraw, threads, seconds, skus):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            db.add_all(Inventory(product_name=f"hot-{i}", description="bench", price=1.0, quantity=STOCK) for i in range(skus))
+            db.commit()
+
+        counts, errors = [], []
+        deadline = time.perf_counter() + seconds
+
+        def worker():
+            done = 0
+            rng = random.Random()
+            with Session() as db:
+                while time.perf_counter() < deadline:
+                    try:
+                        done += withdraw(db, rng.randint(1, skus), 1)
+                    except OperationalError:
+                        db.rollback()
+                        errors.append(1)
+            counts.append(done)
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+        with Session() as db:
+            remaining = sum(item.on_hand for item in db.query(Inventory))
+        engine.dispose()
+
+    done = sum(counts)
+    lost = remaining - (STOCK * skus - done)
+    print(f"{name:<12} retiros/s={done / seconds:>8.0f} errores={len(errors):>6} actualizaciones perdidas={lost}")
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    skus = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    run("legacy", legacy_withdraw, threads, seconds, skus)
+    run("condicional", conditional_withdraw, threads, seconds, skus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Throughput de lectura/escritura mixta: engine por defecto vs perfil de producción.
+
+Uso: python -m benchmarks.sqlite_profile [hilos] [segundos]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, create_db_engine
+from app.domain.inventory.models import Inventory
+import app.domain.cart.models  # noqa: F401  (registra el resto de tablas)
+import app.domain.dispatch.models  # noqa: F401
+import app.domain.payment.models  # noqa: F401
+import app.domain.sales.models  # noqa: F401
+import app.domain.user.models  # noqa: F401
+
+PRODUCTS = 1000
+WRITE_RATIO = 0.2
+
+
+def seed(engine):
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all(
+            Inventory(product_name=f"producto-{i}", description="bench", price=10.0, quantity=1000)
+            for i in range(PRODUCTS)
+        )
+        db.commit()
+
+
+def worker(Session, deadline, counters, errors):
+    reads = writes = 0
+    rng = random.Random()
+    with Session() as db:
+        while time.perf_counter() < deadline:
+            product_id = rng.randint(1, PRODUCTS)
+            try:
+                if rng.random() < WRITE_RATIO:
+                    item = db.get(Inventory, product_id)
+                    item.quantity += 1
+                    db.commit()
+                    writes += 1
+                else:
+                    db.get(Inventory, product_id, populate_existing=True)
+                    db.rollback()
+                    reads += 1
+            except Exception:
+                db.rollback()
+                errors.append(1)
+    counters.append((reads, writes))
+
+
+def run(name, engine, threads, seconds):
+    seed(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    counters, errors = [], []
+    deadline = time.perf_counter() + seconds
+    pool = [threading.Thread(target=worker, args=(Session, deadline, counters, errors)) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    reads = sum(r for r, _ in counters)
+    writes = sum(w for _, w in counters)
+    print(f"{name:<10} reads/s={reads / seconds:>9.0f} writes/s={writes / seconds:>8.0f} errors={len(errors)}")
+    engine.dispose()
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'baseline.db')}", connect_args={"check_same_thread": False}
+        )
+        run("baseline", baseline, threads, seconds)
+        run("tuned", create_db_engine(f"sqlite:///{os.path.join(tmp, 'tuned.db')}"), threads, seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,69 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from app.config import Settings, settings
+from app.sql_metrics import instrument_engine
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+def sqlite_pragmas(config: Settings = settings):
+    return [
+        f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size={config.SQLITE_CACHE_SIZE}",
+        f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}",
+        f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA temp_store={config.SQLITE_TEMP_STORE}",
+    ]
+
+def _is_memory_url(url: str):
+    return ":memory:" in url or url.split("://", 1)[1] == ""
+
+def _install_pragmas(sync_engine, config: Settings):
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(sync_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, config: Settings = settings):
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_size=config.DB_POOL_SIZE, max_overflow=config.DB_MAX_OVERFLOW)
+
+    options = {"connect_args": {"check_same_thread": False}}
+    if not _is_memory_url(url):
+        options.update(pool_size=config.DB_POOL_SIZE, max_overflow=config.DB_MAX_OVERFLOW)
+    engine = create_engine(url, **options)
+    _install_pragmas(engine, config)
+    return engine
+
+def async_database_url(url: str):
+    # sqlite:///./test.db -> sqlite+aiosqlite:///./test.db
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+def create_async_db_engine(url: str = SQLALCHEMY_DATABASE_URL, config: Settings = settings):
+    url = async_database_url(url)
+    options = {}
+    if not (url.startswith("sqlite") and _is_memory_url(url)):
+        options.update(pool_size=config.DB_POOL_SIZE, max_overflow=config.DB_MAX_OVERFLOW)
+    engine = create_async_engine(url, **options)
+    if url.startswith("sqlite"):
+        _install_pragmas(engine.sync_engine, config)
+    return engine
+
+engine = create_db_engine()
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_db_engine()
+instrument_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -14,3 +72,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
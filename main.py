@@ -1,19 +1,63 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
-from database import engine, Base
-from app.routers import user, auth, inventory, sales, cart, cart_summary, dispatch, payment, sucursal
+from database import engine, Base, AsyncSessionLocal
+from app.config import settings
+from app.domain.cart import async_service as cart_async_service, repository as cart_repository
+from app.domain.idempotency import async_service as idempotency_async_service
+from app.domain.payment import repository as payment_repository
+from app.domain.payment.worker import payment_worker
+from app.domain.reservation import async_service as reservation_async_service
+from app.domain.user import repository as user_repository
+from app.sql_metrics import SQLStatsMiddleware
+from app.indexes import ensure_indexes
+from app.domain.inventory import ledger as inventory_ledger, search as inventory_search
+from app.routers import user, auth, inventory, sales, sales_analytics, catalog, cart, cart_summary, checkout, dispatch, payment, sucursal, metrics
 
+# El ledger va antes de create_all: al crear catalog_entries se llena leyendo inventory.ledger_position
+inventory_ledger.ensure_schema(engine)
 Base.metadata.create_all(bind=engine)
+cart_repository.ensure_schema(engine)
+payment_repository.ensure_schema(engine)
+user_repository.ensure_schema(engine)
+ensure_indexes(engine)
+inventory_search.ensure_index(engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweeper = asyncio.create_task(
+        reservation_async_service.run_sweeper(AsyncSessionLocal, settings.RESERVATION_SWEEP_INTERVAL_SECONDS)
+    )
+    idempotency_sweeper = asyncio.create_task(
+        idempotency_async_service.run_sweeper(AsyncSessionLocal, settings.IDEMPOTENCY_SWEEP_INTERVAL_SECONDS)
+    )
+    cart_janitor = asyncio.create_task(
+        cart_async_service.run_janitor(AsyncSessionLocal, settings.CART_JANITOR_INTERVAL_SECONDS)
+    )
+    tasks = [sweeper, idempotency_sweeper, cart_janitor]
+    if settings.PAYMENT_WORKER_ENABLED:
+        tasks.append(asyncio.create_task(payment_worker.run(AsyncSessionLocal, settings.PAYMENT_WORKER_POLL_SECONDS)))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(SQLStatsMiddleware)
 
 print("App initialized")
 
 app.include_router(user.router, prefix="/users", tags=["users"])
 app.include_router(auth.router, tags=["auth"])
 app.include_router(inventory.router, prefix="/inventory", tags=["inventory"])
+app.include_router(sales_analytics.router, prefix="/sales/analytics", tags=["sales"])
 app.include_router(sales.router, prefix="/sales", tags=["sales"])
+app.include_router(catalog.router, prefix="/catalog", tags=["catalog"])
 app.include_router(cart.router, prefix="/cart", tags=["cart"])
 app.include_router(cart_summary.router, prefix="/cart_summary", tags=["cart_summary"])
+app.include_router(checkout.router, prefix="/checkout", tags=["checkout"])
 app.include_router(dispatch.router, prefix="/dispatch", tags=["dispatch"])
 app.include_router(payment.router, prefix="/payments", tags=["payments"])
 app.include_router(sucursal.router, prefix="/sucursales", tags=["sucursales"])
+app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])